@@ -552,6 +552,11 @@ output "vpc_id" {
   value       = module.network.vpc_id
 }
 
+output "instance_id" {
+  description = "EC2 instance ID"
+  value       = module.panel_server.instance_id
+}
+
 output "server_public_ip" {
   description = "Server public IP"
   value       = module.panel_server.public_ip
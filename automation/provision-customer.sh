@@ -55,11 +55,14 @@ Required Options:
 Optional Options:
     -t, --instance-type TYPE     EC2 instance type (default: t3.medium)
     -s, --storage SIZE           Data volume size in GB (default: 100)
-    -p, --plan PLAN              Hosting plan (basic|standard|premium, default: standard)
+    -p, --plan PLAN              Hosting plan (a Plans/*.yaml slug, or basic|standard|premium; default: standard)
+    --panel PANEL                Control panel (cyberpanel|cpanel|directadmin|none, default: cyberpanel)
+    --os OS                      Operating system (almalinux-8|rocky-9|ubuntu-22.04, default: almalinux-8)
     -r, --region REGION          AWS region (default: us-east-1)
     --ssh-ip IP                  IP address allowed for SSH (CIDR format)
     --admin-ip IP                IP address allowed for admin panels (CIDR format)
     --dry-run                    Show what would be created without actually creating it
+    --generate-only              Write the Terraform files and exit (no prompt, no apply)
     -h, --help                   Show this help message
 
 Examples:
@@ -86,10 +89,13 @@ EOF
 INSTANCE_TYPE="t3.medium"
 STORAGE_SIZE="100"
 PLAN="standard"
+PANEL="cyberpanel"
+OS="almalinux-8"
 REGION="us-east-1"
 SSH_IP=""
 ADMIN_IP=""
 DRY_RUN=false
+GENERATE_ONLY=false
 DOMAIN=""
 EMAIL=""
 
@@ -123,6 +129,14 @@ while [[ $# -gt 0 ]]; do
             REGION="$2"
             shift 2
             ;;
+        --panel)
+            PANEL="$2"
+            shift 2
+            ;;
+        --os)
+            OS="$2"
+            shift 2
+            ;;
         --ssh-ip)
             SSH_IP="$2"
             shift 2
@@ -135,6 +149,10 @@ while [[ $# -gt 0 ]]; do
             DRY_RUN=true
             shift
             ;;
+        --generate-only)
+            GENERATE_ONLY=true
+            shift
+            ;;
         -h|--help)
             usage
             ;;
@@ -171,11 +189,25 @@ if ! [[ "$DOMAIN" =~ ^[a-zA-Z0-9][a-zA-Z0-9-]{0,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}$ ]]
     exit 1
 fi
 
-# Validate plan
-if ! [[ "$PLAN" =~ ^(basic|standard|premium)$ ]]; then
-    log_error "Invalid plan: $PLAN (must be basic, standard, or premium)"
+# Validate plan (catalog slugs come from Plans/*.yaml)
+if ! [[ "$PLAN" =~ ^(basic|standard|premium)$ ]] && ! [[ -f "Plans/$PLAN.yaml" ]]; then
+    log_error "Invalid plan: $PLAN (must be a Plans/*.yaml slug, or basic, standard, or premium)"
+    exit 1
+fi
+
+# Validate panel
+if ! [[ "$PANEL" =~ ^(cyberpanel|cpanel|directadmin|none)$ ]]; then
+    log_error "Invalid panel: $PANEL (must be cyberpanel, cpanel, directadmin, or none)"
+    exit 1
+fi
+
+# Validate OS: <type>-<version>, as the panel-server module takes them
+if ! [[ "$OS" =~ ^(almalinux|rocky|ubuntu)-([0-9.]+)$ ]]; then
+    log_error "Invalid OS: $OS (e.g. almalinux-8, rocky-9, ubuntu-22.04)"
     exit 1
 fi
+OS_TYPE="${BASH_REMATCH[1]}"
+OS_VERSION="${BASH_REMATCH[2]}"
 
 # ===================================
 # CONFIGURATION
@@ -208,6 +240,8 @@ echo "  Email:        $EMAIL"
 echo "  Plan:         $PLAN"
 echo ""
 echo "Infrastructure:"
+echo "  Panel:        $PANEL"
+echo "  OS:           $OS"
 echo "  Instance:     $INSTANCE_TYPE"
 echo "  Storage:      ${STORAGE_SIZE}GB"
 echo "  Region:       $REGION"
@@ -231,7 +265,7 @@ fi
 # CONFIRMATION
 # ===================================
 
-if [[ "$DRY_RUN" == false ]]; then
+if [[ "$DRY_RUN" == false ]] && [[ "$GENERATE_ONLY" == false ]]; then
     read -p "Proceed with provisioning? (yes/no): " CONFIRM
     if [[ "$CONFIRM" != "yes" ]]; then
         log_info "Provisioning cancelled"
@@ -245,7 +279,10 @@ fi
 
 log_info "Creating directory structure..."
 
-if [[ -d "$CUSTOMER_PATH" ]]; then
+if [[ -d "$CUSTOMER_PATH" ]] && [[ "$GENERATE_ONLY" == true ]]; then
+    # Resumed orchestrator runs regenerate into the existing directory
+    log_warning "Customer directory exists, regenerating: $CUSTOMER_PATH"
+elif [[ -d "$CUSTOMER_PATH" ]]; then
     log_error "Customer directory already exists: $CUSTOMER_PATH"
     log_error "This customer may already be provisioned. Use a different domain or remove the existing directory."
     exit 1
@@ -303,6 +340,7 @@ provider "aws" {
     tags = {
       Customer   = var.customer_domain
       Plan       = var.plan_type
+      Panel      = var.control_panel
       ManagedBy  = "Terraform"
       Email      = var.admin_email
       CreatedAt  = timestamp()
@@ -354,36 +392,36 @@ module "security" {
 }
 
 # ===================================
-# CPANEL SERVER MODULE
+# PANEL SERVER MODULE
 # ===================================
 
-module "cpanel_server" {
-  source = "../../modules/cpanel-server"
+module "panel_server" {
+  source = "../../modules/panel-server"
 
+  customer_id     = var.customer_id
   customer_domain = var.customer_domain
+  customer_email  = var.admin_email
   environment     = var.environment
-  region          = var.region
+
+  control_panel = var.control_panel
+  os_type       = var.os_type
+  os_version    = var.os_version
 
   vpc_id            = module.network.vpc_id
   subnet_id         = module.network.public_subnet_ids[0]
-  security_group_id = module.security.cpanel_security_group_id
+  security_group_id = module.security.panel_security_group_id
 
   instance_type       = var.instance_type
   root_volume_size    = var.root_volume_size
-  root_volume_type    = var.root_volume_type
   data_volume_size    = var.data_volume_size
-  data_volume_type    = var.data_volume_type
 
-  cpanel_hostname             = var.cpanel_hostname
-  admin_email                 = var.admin_email
-  enable_backups              = var.enable_backups
+  enable_daily_snapshots      = var.enable_backups
   backup_retention_days       = var.backup_retention_days
   enable_detailed_monitoring  = var.enable_detailed_monitoring
 
-  plan_type = var.plan_type
-
-  tags = {
-    Module = "cPanel-Server"
+  additional_tags = {
+    Module = "Panel-Server"
+    Plan   = var.plan_type
   }
 }
 EOF
@@ -412,12 +450,36 @@ variable "region" {
   default     = "$REGION"
 }
 
+variable "customer_id" {
+  description = "Customer identifier"
+  type        = string
+  default     = "$CUSTOMER_DIR"
+}
+
 variable "plan_type" {
   description = "Hosting plan type"
   type        = string
   default     = "$PLAN"
 }
 
+variable "control_panel" {
+  description = "Control panel to install"
+  type        = string
+  default     = "$PANEL"
+}
+
+variable "os_type" {
+  description = "Operating system type"
+  type        = string
+  default     = "$OS_TYPE"
+}
+
+variable "os_version" {
+  description = "Operating system version"
+  type        = string
+  default     = "$OS_VERSION"
+}
+
 # Network Variables
 variable "vpc_cidr" {
   description = "VPC CIDR block"
@@ -487,30 +549,12 @@ variable "root_volume_size" {
   default     = 50
 }
 
-variable "root_volume_type" {
-  description = "Root volume type"
-  type        = string
-  default     = "gp3"
-}
-
 variable "data_volume_size" {
   description = "Data volume size (GB)"
   type        = number
   default     = $STORAGE_SIZE
 }
 
-variable "data_volume_type" {
-  description = "Data volume type"
-  type        = string
-  default     = "gp3"
-}
-
-variable "cpanel_hostname" {
-  description = "cPanel hostname"
-  type        = string
-  default     = "cpanel.$DOMAIN"
-}
-
 variable "admin_email" {
   description = "Administrator email"
   type        = string
@@ -552,9 +596,19 @@ output "vpc_id" {
   value       = module.network.vpc_id
 }
 
+output "instance_id" {
+  description = "EC2 instance ID"
+  value       = module.panel_server.instance_id
+}
+
 output "server_public_ip" {
   description = "Server public IP"
-  value       = module.cpanel_server.public_ip
+  value       = module.panel_server.public_ip
+}
+
+output "elastic_ip" {
+  description = "Server Elastic IP"
+  value       = module.panel_server.elastic_ip
 }
 
 output "nameservers" {
@@ -565,13 +619,9 @@ output "nameservers" {
   ]
 }
 
-output "access_urls" {
-  description = "Access URLs"
-  value = {
-    whm     = "https://\${module.cpanel_server.public_ip}:2087"
-    cpanel  = "https://\${module.cpanel_server.public_ip}:2083"
-    webmail = "https://\${module.cpanel_server.public_ip}:2096"
-  }
+output "panel_url" {
+  description = "Control panel URL"
+  value       = module.panel_server.control_panel_url
 }
 
 output "next_steps" {
@@ -582,22 +632,14 @@ output "next_steps" {
   
   Next Steps:
   1. Update DNS records for ${DOMAIN}:
-     - Point ${DOMAIN} A record to \${module.cpanel_server.public_ip}
-     - Create ns1.${DOMAIN} A record pointing to \${module.cpanel_server.public_ip}
-     - Create ns2.${DOMAIN} A record pointing to \${module.cpanel_server.public_ip}
-  
-  2. SSH to server and install cPanel:
-     ssh root@\${module.cpanel_server.public_ip}
-     cd /home && curl -o latest -L https://securedownloads.cpanel.net/latest
-     sh latest
+     - Point ${DOMAIN} A record to \${module.panel_server.public_ip}
+     - Create ns1.${DOMAIN} A record pointing to \${module.panel_server.public_ip}
+     - Create ns2.${DOMAIN} A record pointing to \${module.panel_server.public_ip}
   
-  3. Access WHM: https://\${module.cpanel_server.public_ip}:2087
+  2. ${PANEL} is installed by the server's user-data; follow it with:
+     scripts/health-checks/check-provisioning.sh ${DOMAIN} ${PANEL} \${module.panel_server.public_ip}
   
-  4. Configure:
-     - Enter cPanel license
-     - Set up nameservers
-     - Configure mail server
-     - Enable AutoSSL
+  3. Access the panel: \${module.panel_server.control_panel_url}
   
   EOT
 }
@@ -605,6 +647,11 @@ EOF
 
 log_success "Terraform configuration generated"
 
+if [[ "$GENERATE_ONLY" == true ]]; then
+    log_info "Generate-only mode - Terraform execution is left to the caller"
+    exit 0
+fi
+
 # ===================================
 # TERRAFORM EXECUTION
 # ===================================
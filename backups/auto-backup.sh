@@ -8,24 +8,18 @@ log() {
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1"
 }
 
-# 1. Create EBS snapshot
-log "Creating EBS snapshot for $INSTANCE_ID"
+# 1. Create EBS snapshots (all volumes at one point in time)
+log "Creating EBS snapshots for $INSTANCE_ID"
+
+SCRIPTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/../scripts" && pwd)"
+if ! OUTPUT=$(cd "$SCRIPTS_DIR" && python3 -m neo.backups backup "$INSTANCE_ID" "$DOMAIN" --type daily); then
+    echo "$OUTPUT"
+    log "❌ Snapshot backup failed for $INSTANCE_ID"
+    exit 1
+fi
+BACKUP_ID=$(echo "$OUTPUT" | tail -1)
 
-VOLUME_IDS=$(aws ec2 describe-instances \
-    --instance-ids $INSTANCE_ID \
-    --query 'Reservations[0].Instances[0].BlockDeviceMappings[*].Ebs.VolumeId' \
-    --output text)
-
-for VOLUME_ID in $VOLUME_IDS; do
-    SNAPSHOT_ID=$(aws ec2 create-snapshot \
-        --volume-id $VOLUME_ID \
-        --description "Auto backup for $DOMAIN - $(date +%Y-%m-%d)" \
-        --tag-specifications "ResourceType=snapshot,Tags=[{Key=Domain,Value=$DOMAIN},{Key=Type,Value=AutoBackup},{Key=Date,Value=$(date +%Y-%m-%d)}]" \
-        --query 'SnapshotId' \
-        --output text)
-    
-    log "✅ Created snapshot: $SNAPSHOT_ID for volume $VOLUME_ID"
-done
+log "✅ Started backup: $BACKUP_ID"
 
 # 2. Backup panel configs (if cPanel/CyberPanel)
 log "Backing up panel configurations"
@@ -7,15 +7,33 @@ Automates DNS zone creation and management for customer domains
 import boto3
 import subprocess
 import json
+import os
 import time
 import sys
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+def _scripts_dir() -> str:
+    """The repository's scripts/ directory (holds the shared neo package), above either copy of this tool"""
+    path = os.path.dirname(os.path.abspath(__file__))
+    while not os.path.isdir(os.path.join(path, 'scripts', 'neo')):
+        parent = os.path.dirname(path)
+        if parent == path:
+            raise ImportError(f"scripts/neo not found above {__file__}")
+        path = parent
+    return os.path.join(path, 'scripts')
+
+if _scripts_dir() not in sys.path:
+    sys.path.insert(0, _scripts_dir())
+from neo.config import DNS_ZONES_TABLE
+# Shared Route53 record cache, kept current with every change submitted here
+from neo.dns_cache import zone_cache
+# Table handles built once per process
+from neo.store import table as dynamodb_table
+
 # AWS Clients
 route53 = boto3.client('route53')
 ec2 = boto3.client('ec2')
-dynamodb = boto3.resource('dynamodb')
 sns = boto3.client('sns')
 
 class DNSAutomation:
@@ -28,6 +46,7 @@ class DNSAutomation:
         self.ns2_ip = ns2_ip
         self.zone_id = None
         self.nameservers = []
+        self.change_id = None
         
     def create_hosted_zone(self) -> Tuple[str, List[str]]:
         """Create Route53 hosted zone"""
@@ -183,6 +202,8 @@ class DNSAutomation:
             )
             
             change_id = response['ChangeInfo']['Id']
+            self.change_id = change_id
+            zone_cache.apply_changes(self.zone_id, changes, change_id)
             print(f"✅ Created {len(changes)} DNS records")
             print(f"📌 Change ID: {change_id}")
             
@@ -269,13 +290,13 @@ class DNSAutomation:
         
         return results
     
-    def save_to_dynamodb(self, table_name: str = 'neo-dns-zones'):
+    def save_to_dynamodb(self, table_name: str = DNS_ZONES_TABLE):
         """Save DNS configuration to DynamoDB"""
         
         print(f"💾 Saving DNS configuration to DynamoDB")
         
         try:
-            table = dynamodb.Table(table_name)
+            table = dynamodb_table(table_name)
             
             item = {
                 'domain': self.domain,
@@ -292,6 +313,10 @@ class DNSAutomation:
                 item['ns2_ip'] = self.ns2_ip
                 item['ns2_hostname'] = f'ns2.{self.domain}'
             
+            # Versions the zone's records for API clients
+            if self.change_id:
+                item['last_change_id'] = self.change_id
+            
             table.put_item(Item=item)
             
             print(f"✅ Saved to DynamoDB table: {table_name}")
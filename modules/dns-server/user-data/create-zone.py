@@ -1,6 +1,7 @@
 import boto3
 import subprocess
 import json
+import sys
 from datetime import datetime
 
 route53 = boto3.client('route53')
@@ -124,9 +125,9 @@ def verify_dns_propagation(domain, expected_ip, max_retries=10):
     print(f"⚠️  DNS not yet propagated for {domain}")
     return False
 
-if __name__ == '__main__':
-    import sys
-    
+def main():
+    """Main execution"""
+
     if len(sys.argv) < 5:
         print("Usage: create-zone.py <domain> <server_ip> <ns1_ip> <ns2_ip>")
         sys.exit(1)
@@ -152,4 +153,7 @@ if __name__ == '__main__':
     print(f"Zone ID: {zone_id}")
     print(f"Name Servers: {', '.join(nameservers)}")
     print(f"Custom NS: ns1.{domain}, ns2.{domain}")
-    print("="*50)
\ No newline at end of file
+    print("="*50)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,11 +1,13 @@
 import boto3
 import json
+import sys
 
 cloudwatch = boto3.client('cloudwatch')
 
-def create_customer_dashboard(domain, instance_id):
-    """Create CloudWatch dashboard for customer"""
+def create_customer_dashboard(domain, instance_id, region=None):
+    """Create CloudWatch dashboard for customer (widgets read the instance's region)"""
     
+    region = region or cloudwatch.meta.region_name
     dashboard_name = f"neo-vps-{domain.replace('.', '-')}"
     
     dashboard_body = {
@@ -17,7 +19,7 @@ def create_customer_dashboard(domain, instance_id):
                         ["AWS/EC2", "CPUUtilization", {"stat": "Average", "label": "CPU"}],
                     ],
                     "view": "timeSeries",
-                    "region": "us-east-1",
+                    "region": region,
                     "title": "CPU Utilization",
                     "period": 300,
                     "yAxis": {"left": {"min": 0, "max": 100}}
@@ -31,7 +33,7 @@ def create_customer_dashboard(domain, instance_id):
                         [".", "MEM_USED", {"stat": "Average"}]
                     ],
                     "view": "timeSeries",
-                    "region": "us-east-1",
+                    "region": region,
                     "title": "Disk & Memory Usage",
                     "period": 300
                 }
@@ -45,8 +47,10 @@ def create_customer_dashboard(domain, instance_id):
     )
     
     print(f"✅ Created dashboard: {dashboard_name}")
-    print(f"🔗 https://console.aws.amazon.com/cloudwatch/home?region=us-east-1#dashboards:name={dashboard_name}")
+    print(f"🔗 https://console.aws.amazon.com/cloudwatch/home?region={region}#dashboards:name={dashboard_name}")
 
 if __name__ == '__main__':
-    import sys
-    create_customer_dashboard(sys.argv[1], sys.argv[2])
+    if len(sys.argv) < 3:
+        print("Usage: create-dashboard.py <domain> <instance_id> [aws_region]")
+        sys.exit(1)
+    create_customer_dashboard(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
@@ -285,6 +285,7 @@ resource "aws_instance" "panel_server" {
     ManagedBy     = "Terraform"
     Project       = "Neo-VPS"
     BillingStatus = "active"
+    RetentionDays = var.snapshot_retention_days
   }
 
   lifecycle {
@@ -2,20 +2,12 @@
 CUSTOMER_EMAIL="$1"
 DOMAIN="$2"
 
-# Get server details from Terraform
-cd "environments/customers/${DOMAIN//./-}"
-SERVER_IP=$(terraform output -raw elastic_ip)
-PANEL_URL=$(terraform output -raw panel_url)
+SCRIPTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
-# Replace template variables
-sed -e "s/{{domain}}/$DOMAIN/g" \
-    -e "s/{{server_ip}}/$SERVER_IP/g" \
-    -e "s/{{panel_url}}/$PANEL_URL/g" \
-    templates/emails/server-ready.html > /tmp/email.html
-
-# Send via SES or SMTP
-aws ses send-email \
-  --from "noreply@nexus-dxb.com" \
-  --to "$CUSTOMER_EMAIL" \
-  --subject "Your NEO VPS Server is Ready!" \
-  --html file:///tmp/email.html
+# Server details come from the inventory cache, and the template is stored
+# in SES once and sent with templated sends. For many customers at once,
+# pass a file of "email domain" lines with --file. To use a local SMTP
+# stand-in, set MAIL_SMTP=host:port. See scripts/neo/mailer.py
+cd "$SCRIPTS_DIR" && python3 -m neo.mailer \
+  "$CUSTOMER_EMAIL" "$DOMAIN" \
+  ${MAIL_SMTP:+--smtp "$MAIL_SMTP"}
@@ -1,41 +1,61 @@
-import boto3
 import requests
 import subprocess
 import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
+from botocore.exceptions import ClientError
 
-ec2 = boto3.client('ec2')
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from neo import aws
+from neo.config import DEFAULT_REGION
+from neo.health_codec import (BAD_STATUS, CONNECTION_ERROR, ERROR, INSTANCE_IMPAIRED, NO_ANSWER, NOT_APPLICABLE,
+                              NOT_FOUND, OK, SYSTEM_IMPAIRED, TIMEOUT, CheckResult, decode, encode, is_healthy)
+from neo.inventory import InventoryCache
+from neo.panels import PANEL_PORTS, READY_CODES
+from neo.profiling import profiling
+from neo.regions import alert_topic_arn, arn_region, fan_out, group_by_region
+from neo.store import instances
 
-table = dynamodb.Table('neo-instances')
+# One instance's checks run side by side and must all finish within this
+# many seconds (the panel probe alone may take 10s, the DNS query 5s)
+CHECK_DEADLINE = 12
 
-def check_ec2_status(instance_id):
-    """Check EC2 instance status"""
-    response = ec2.describe_instance_status(InstanceIds=[instance_id])
+# Shared by every run_health_check() in the process (fleet checks run many)
+check_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='health-check')
+
+# Instances checked at once across all regions; each holds up to three
+# check_pool workers, so this stays below a third of its size
+instance_pool = ThreadPoolExecutor(max_workers=10, thread_name_prefix='health-instance')
+
+def check_ec2_status(instance_id, region=None, statuses=None):
+    """Check EC2 instance status (in the instance's own region, or from a batched describe)"""
+    if statuses is None:
+        statuses = ec2_statuses([instance_id], region)
     
-    if not response['InstanceStatuses']:
-        return False, "Instance not found"
+    if instance_id not in statuses:
+        return False, NOT_FOUND, "Instance not found"
     
-    status = response['InstanceStatuses'][0]
+    status = statuses[instance_id]
     
-    instance_ok = status['InstanceStatus']['Status'] == 'ok'
-    system_ok = status['SystemStatus']['Status'] == 'ok'
+    instance_status = status['InstanceStatus']['Status']
+    system_status = status['SystemStatus']['Status']
     
-    return (instance_ok and system_ok), status
+    if system_status != 'ok':
+        return False, SYSTEM_IMPAIRED, f"system={system_status} instance={instance_status}"
+    if instance_status != 'ok':
+        return False, INSTANCE_IMPAIRED, f"instance={instance_status}"
+    return True, OK, ''
 
 def check_panel_http(ip, panel_type):
     """Check if control panel is responding"""
-    ports = {
-        'cpanel': 2087,
-        'cyberpanel': 8090,
-        'directadmin': 2222
-    }
+    if panel_type not in PANEL_PORTS:
+        return True, NOT_APPLICABLE, "No panel to check"
     
-    if panel_type not in ports:
-        return True, "No panel to check"
-    
-    port = ports[panel_type]
+    port = PANEL_PORTS[panel_type]
     
     try:
         response = requests.get(
@@ -43,9 +63,15 @@ def check_panel_http(ip, panel_type):
             timeout=10,
             verify=False
         )
-        return response.status_code in [200, 302, 401], f"HTTP {response.status_code}"
+        if response.status_code in READY_CODES:
+            return True, OK, f"HTTP {response.status_code}"
+        return False, BAD_STATUS, f"HTTP {response.status_code}"
+    except requests.Timeout as e:
+        return False, TIMEOUT, str(e)
+    except requests.ConnectionError as e:
+        return False, CONNECTION_ERROR, str(e)
     except Exception as e:
-        return False, str(e)
+        return False, ERROR, str(e)
 
 def check_dns_resolution(domain):
     """Check if DNS is resolving"""
@@ -56,74 +82,126 @@ def check_dns_resolution(domain):
             text=True,
             timeout=5
         )
-        return bool(result.stdout.strip()), result.stdout.strip()
+        answer = result.stdout.strip()
+        if not answer:
+            return False, NO_ANSWER, "No answer from 8.8.8.8"
+        return True, OK, answer
+    except subprocess.TimeoutExpired:
+        return False, TIMEOUT, "DNS query timed out"
     except:
-        return False, "DNS query failed"
+        return False, ERROR, "DNS query failed"
+
+def timed(check, *args):
+    """Run one check; its (ok, reason, details) plus latency as a CheckResult"""
+    started = time.perf_counter()
+    ok, reason, details = check(*args)
+    return CheckResult(ok, reason, int((time.perf_counter() - started) * 1000), details)
+
+def submit(check, *args):
+    """Start a timed check on the shared pool"""
+    return check_pool.submit(timed, check, *args), time.perf_counter()
+
+def collect(pending, deadline):
+    """Wait for submitted checks; one still running at the deadline counts as timed out"""
+    future, started = pending
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        # The check's own timeout will end its thread; its result is dropped
+        return CheckResult(False, TIMEOUT, int((time.perf_counter() - started) * 1000),
+                           f"No result within the {CHECK_DEADLINE}s deadline")
 
 def update_health_status(instance_id, health_data):
-    """Update DynamoDB with health status"""
-    table.update_item(
+    """Update DynamoDB with health status (compact record, see neo.health_codec)"""
+    instances.table.update_item(
         Key={'instance_id': instance_id},
-        UpdateExpression='SET health_status = :health, last_health_check = :time',
+        UpdateExpression='SET health_status = :health, last_health_check = :time ADD #version :one',
+        ExpressionAttributeNames={'#version': 'version'},
         ExpressionAttributeValues={
             ':health': health_data,
-            ':time': datetime.utcnow().isoformat()
+            ':time': datetime.utcnow().isoformat(),
+            ':one': 1
         }
     )
 
+def ec2_statuses(instance_ids, region=None):
+    """instance_id -> status for many instances in one region (100 per call)"""
+    ec2 = aws.client('ec2', region)
+    statuses = {}
+    for offset in range(0, len(instance_ids), 100):
+        batch = instance_ids[offset:offset + 100]
+        while batch:
+            try:
+                response = ec2.describe_instance_status(InstanceIds=batch)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                    raise
+                # One terminated instance fails the batch; drop the IDs named in the error and retry
+                missing = set(re.findall(r"i-[0-9a-zA-Z]+", e.response['Error']['Message']))
+                if not missing & set(batch):
+                    raise
+                batch = [i for i in batch if i not in missing]
+                continue
+            for status in response['InstanceStatuses']:
+                statuses[status['InstanceId']] = status
+            break
+    return statuses
+
 def send_alert(subject, message):
     """Send SNS alert"""
-    sns.publish(
-        TopicArn='arn:aws:sns:us-east-1:ACCOUNT:neo-alerts',
+    topic_arn = alert_topic_arn()
+    aws.client('sns', arn_region(topic_arn)).publish(
+        TopicArn=topic_arn,
         Subject=subject,
         Message=message
     )
 
-def run_health_check(instance_id):
+def get_instance_details(instance_id):
+    """Instance details: one projected read (the attributes the checks use)"""
+    # Cheaper and fresher than loading (and syncing) the whole inventory for one instance
+    item = instances.get(instance_id)
+    if item is None:
+        raise KeyError(f"Instance {instance_id} not found")
+    return item
+
+def run_health_check(instance_id, item=None, statuses=None):
     """Run complete health check"""
     
     print(f"🔍 Running health check for {instance_id}")
+    started = time.monotonic()
+    deadline = started + CHECK_DEADLINE
     
-    # Get instance details from DynamoDB
-    response = table.get_item(Key={'instance_id': instance_id})
-    item = response['Item']
+    # Get instance details (callers holding the inventory pass them in);
+    # the region they carry decides where the EC2 status is read
+    if item is None:
+        # The read overlaps a speculative home-region EC2 check, which is
+        # only redone for an instance that lives in another region
+        ec2_check = submit(check_ec2_status, instance_id, DEFAULT_REGION, statuses)
+        item = check_pool.submit(get_instance_details, instance_id).result()
+        if (item.get('aws_region') or DEFAULT_REGION) != DEFAULT_REGION:
+            ec2_check = submit(check_ec2_status, instance_id, item['aws_region'], statuses)
+    else:
+        ec2_check = submit(check_ec2_status, instance_id, item.get('aws_region') or None, statuses)
     
     domain = item['domain']
     public_ip = item['public_ip']
     panel = item['panel']
     
-    health_data = {
-        'timestamp': datetime.utcnow().isoformat(),
-        'checks': {}
-    }
-    
-    # Check 1: EC2 Status
-    ec2_ok, ec2_status = check_ec2_status(instance_id)
-    health_data['checks']['ec2_status'] = {
-        'ok': ec2_ok,
-        'details': str(ec2_status)
+    # All three checks run at once; the instance takes as long as the slowest
+    pending = {
+        'ec2_status': ec2_check,
+        'panel_http': submit(check_panel_http, public_ip, panel),
+        'dns_resolution': submit(check_dns_resolution, domain),
     }
-    print(f"  EC2 Status: {'✅' if ec2_ok else '❌'}")
+    results = {name: collect(check, deadline) for name, check in pending.items()}
     
-    # Check 2: Panel HTTP
-    panel_ok, panel_status = check_panel_http(public_ip, panel)
-    health_data['checks']['panel_http'] = {
-        'ok': panel_ok,
-        'details': panel_status
-    }
-    print(f"  Panel HTTP: {'✅' if panel_ok else '❌'}")
-    
-    # Check 3: DNS Resolution
-    dns_ok, dns_result = check_dns_resolution(domain)
-    health_data['checks']['dns_resolution'] = {
-        'ok': dns_ok,
-        'details': dns_result
-    }
-    print(f"  DNS: {'✅' if dns_ok else '❌'}")
+    for label, name in (('EC2 Status', 'ec2_status'), ('Panel HTTP', 'panel_http'), ('DNS', 'dns_resolution')):
+        print(f"  {label}: {'✅' if results[name].ok else '❌'} ({results[name].latency_ms} ms)")
+    print(f"  Total: {int((time.monotonic() - started) * 1000)} ms")
     
-    # Overall health
-    all_ok = ec2_ok and panel_ok and dns_ok
-    health_data['overall'] = 'healthy' if all_ok else 'unhealthy'
+    # Overall health; details are only stored for failed checks
+    health_data = encode(results)
+    all_ok = is_healthy(health_data)
     
     # Update DynamoDB
     update_health_status(instance_id, health_data)
@@ -133,19 +211,67 @@ def run_health_check(instance_id):
         send_alert(
             f"⚠️ Health Check Failed: {domain}",
             f"Instance {instance_id} ({domain}) failed health checks:\n\n" +
-            json.dumps(health_data, indent=2)
+            json.dumps(decode(health_data), indent=2)
         )
     
     return all_ok
 
-if __name__ == '__main__':
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: check-server.py <instance_id>")
-        sys.exit(1)
+def check_region(region, items):
+    """Check one region's servers side by side, with one batched EC2 status describe"""
+    statuses = ec2_statuses([item['instance_id'] for item in items], region)
+    futures = {item['instance_id']: instance_pool.submit(run_health_check, item['instance_id'], item, statuses)
+               for item in items}
+    results = {}
+    for instance_id, future in futures.items():
+        try:
+            results[instance_id] = future.result()
+        except Exception as e:
+            # One instance's failed update or alert doesn't lose the region's other results
+            print(f"❌ {instance_id}: {e}")
+            results[instance_id] = False
+    return results
+
+def check_instances(instance_ids):
+    """Check the given servers; their details come from one batched, projected read"""
+    items = instances.get_many(instance_ids)
     
-    instance_id = sys.argv[1]
-    healthy = run_health_check(instance_id)
+    found = list(items.values())
+    for instance_id in instance_ids:
+        if not items.get(instance_id):
+            print(f"❌ {instance_id}: not found")
+    return check_groups(group_by_region(found)) and len(found) == len(set(instance_ids))
+
+def check_fleet():
+    """Check every active server, all regions in parallel"""
+    inventory = InventoryCache()
+    inventory.sync()
+    return check_groups(inventory.by_region())
+
+def check_groups(groups):
+    """Check servers grouped by region, all regions in parallel"""
+    sweep = fan_out(lambda region: check_region(region, groups[region]), groups)
+    for region, error in sweep.errors.items():
+        print(f"❌ {region}: {error}")
     
-    sys.exit(0 if healthy else 1)
\ No newline at end of file
+    results = {}
+    for region_results in sweep.results.values():
+        results.update(region_results)
+    healthy = sum(1 for ok in results.values() if ok)
+    print(f"🌍 {healthy}/{len(results)} healthy across {len(groups)} region(s) "
+          f"(slowest {max(sweep.timings.values(), default=0):.1f}s)")
+    return healthy == len(results) and not sweep.errors
+
+if __name__ == '__main__':
+    with profiling(sys.argv):
+        if len(sys.argv) < 2:
+            print("Usage: check-server.py <instance_id> [instance_id ...]|--all [--profile[=PREFIX]] [--profile-stacks]")
+            sys.exit(1)
+
+        if sys.argv[1] == '--all':
+            healthy = check_fleet()
+        elif len(sys.argv) > 2:
+            healthy = check_instances(sys.argv[1:])
+        else:
+            healthy = run_health_check(sys.argv[1])
+
+        sys.exit(0 if healthy else 1)
\ No newline at end of file
@@ -12,6 +12,8 @@ set -euo pipefail
 CHECK_INTERVAL=300  # 5 minutes
 LOG_FILE="/var/log/neo-health-monitor.log"
 API_ENDPOINT="${API_ENDPOINT:-}"
+USE_INVENTORY_CACHE="${USE_INVENTORY_CACHE:-true}"
+SCRIPTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
 # Color codes
 RED='\033[0;31m'
@@ -31,11 +33,26 @@ log_error() {
     echo -e "${RED}[✗]${NC} $1" | tee -a "$LOG_FILE"
 }
 
-# Get list of active servers from API or file
+# Get list of active servers from the inventory cache, API or file
 get_active_servers() {
+    local servers
+
+    # Incremental cache: only changes since the last cycle are read
+    if [[ "$USE_INVENTORY_CACHE" == "true" ]] && \
+        servers=$(cd "$SCRIPTS_DIR" && python3 -m neo.inventory --active); then
+        echo "$servers"
+        return
+    fi
+
     if [[ -n "$API_ENDPOINT" ]]; then
-        # Get from API
-        curl -s "$API_ENDPOINT/servers?status=active" | jq -r '.[] | "\(.domain) \(.elastic_ip) \(.panel)"'
+        # Get from API, following the pagination cursor
+        local page cursor=""
+        while :; do
+            page=$(curl -s "$API_ENDPOINT/servers?status=active&limit=100${cursor:+&cursor=$cursor}")
+            jq -r '.data.servers[] | "\(.customer_domain) \(.public_ip) \(.control_panel)"' <<< "$page"
+            cursor=$(jq -r '.data.next_cursor // empty' <<< "$page")
+            [[ -n "$cursor" ]] || break
+        done
     else
         # Get from local file (fallback)
         if [[ -f /etc/neo/active-servers.txt ]]; then
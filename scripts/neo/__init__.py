@@ -0,0 +1,7 @@
+"""
+Neo VPS platform library
+Shared provisioning, inventory and API helpers used by the scripts in this tree
+
+Run modules from the scripts/ directory, e.g.:
+  cd scripts && python3 -m neo.orchestrator --domain example.com --email admin@example.com
+"""
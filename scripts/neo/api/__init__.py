@@ -0,0 +1,24 @@
+"""
+Neo VPS API
+HTTP endpoints from API-Contract.md, served as a plain WSGI app
+
+    cd scripts && python3 -m neo.api --port 8080
+"""
+
+from neo.api import backups, dns, events, metrics, servers
+from neo.api.app import App, log_requests, require_api_key
+from neo.api.ratelimit import RateLimiter, rate_limit
+
+
+def create_app(limiter: RateLimiter = None, allow_open: bool = False) -> App:
+    """App with every endpoint module registered; allow_open serves without NEO_API_KEYS"""
+    app = App()
+    app.use(log_requests)
+    app.use(rate_limit(limiter or RateLimiter()))
+    app.use(require_api_key(allow_open))
+    servers.register(app)
+    dns.register(app)
+    metrics.register(app)
+    backups.register(app)
+    events.register(app)
+    return app
@@ -0,0 +1,26 @@
+import argparse
+import os
+
+from neo.api import create_app
+from neo.api.app import is_loopback, serve
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Run the Neo VPS API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--insecure', action='store_true',
+                        help='Serve without NEO_API_KEYS on a non-loopback address')
+    args = parser.parse_args()
+
+    allow_open = args.insecure or is_loopback(args.host)
+    if not os.environ.get('NEO_API_KEYS') and not allow_open:
+        parser.error(f"NEO_API_KEYS is not set; refusing to serve {args.host} without auth (use --insecure)")
+
+    serve(create_app(allow_open=allow_open), args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
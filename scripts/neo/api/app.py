@@ -0,0 +1,252 @@
+"""
+Neo VPS API application
+Minimal WSGI router with the response envelope from API-Contract.md
+
+Handlers take a Request and return a Response. Middleware wraps the whole
+dispatch (auth, rate limiting, conditional requests) and can short-circuit
+or decorate responses.
+"""
+
+import ipaddress
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, make_server
+
+API_PREFIX = '/api/v1'
+
+STATUS_TEXT = {
+    200: 'OK',
+    201: 'Created',
+    202: 'Accepted',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+}
+
+
+class Request:
+    """Parsed WSGI request"""
+
+    def __init__(self, environ: Dict):
+        self.environ = environ
+        self.method = environ['REQUEST_METHOD'].upper()
+        self.path = environ.get('PATH_INFO', '') or '/'
+        self.query = {k: v[-1] for k, v in parse_qs(environ.get('QUERY_STRING', '')).items()}
+        self.params: Dict[str, str] = {}
+        self.request_id = f"req_{uuid.uuid4().hex[:12]}"
+        self._body: Optional[bytes] = None
+
+    def header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        if name.lower() == 'content-type':
+            key = 'CONTENT_TYPE'
+        return self.environ.get(key, default)
+
+    @property
+    def api_key(self) -> Optional[str]:
+        auth = self.header('Authorization') or ''
+        return auth[7:].strip() if auth.startswith('Bearer ') else None
+
+    def body(self) -> bytes:
+        if self._body is None:
+            length = int(self.environ.get('CONTENT_LENGTH') or 0)
+            self._body = self.environ['wsgi.input'].read(length) if length else b''
+        return self._body
+
+    def json(self) -> Dict:
+        try:
+            return json.loads(self.body() or b'{}')
+        except ValueError:
+            raise ApiError(400, 'VALIDATION_ERROR', 'Request body must be valid JSON')
+
+
+class Response:
+    """Status, headers and a body (bytes or an iterable of bytes for streaming)"""
+
+    def __init__(self, status: int = 200, body=b'', headers: Optional[Dict[str, str]] = None,
+                 content_type: str = 'application/json'):
+        self.status = status
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+        self.headers.update(headers or {})
+
+    def wsgi_status(self) -> str:
+        return f"{self.status} {STATUS_TEXT.get(self.status, '')}".strip()
+
+
+class ApiError(Exception):
+    """Raised by handlers to return a contract error envelope"""
+
+    def __init__(self, status: int, code: str, message: str, details: Optional[List] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+        self.headers = headers or {}
+
+
+def _metadata(request: Request) -> Dict:
+    return {
+        'request_id': request.request_id,
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+
+def encode(payload: Dict) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), default=str).encode()
+
+
+def success(request: Request, data, status: int = 200, message: Optional[str] = None,
+            headers: Optional[Dict[str, str]] = None) -> Response:
+    payload = {'status': 'success'}
+    if message:
+        payload['message'] = message
+    payload['data'] = data
+    payload['metadata'] = _metadata(request)
+    return Response(status, encode(payload), headers)
+
+
+def success_encoded(request: Request, data_json: bytes, status: int = 200,
+                    headers: Optional[Dict[str, str]] = None) -> Response:
+    """Success envelope around an already encoded `data` document"""
+    body = b'{"status":"success","data":%s,"metadata":%s}' % (data_json, encode(_metadata(request)))
+    return Response(status, body, headers)
+
+
+def error(request: Request, err: ApiError) -> Response:
+    body = {'code': err.code, 'message': err.message}
+    if err.details:
+        body['details'] = err.details
+    payload = {'status': 'error', 'error': body, 'metadata': _metadata(request)}
+    return Response(err.status, encode(payload), err.headers)
+
+
+Handler = Callable[[Request], Response]
+Middleware = Callable[[Request, Handler], Response]
+
+
+class App:
+    """WSGI application: routes plus a middleware chain"""
+
+    def __init__(self):
+        self.routes: List[Tuple[str, re.Pattern, Handler]] = []
+        self.middleware: List[Middleware] = []
+
+    def route(self, method: str, pattern: str):
+        """Register a handler; `{name}` segments become request.params"""
+        regex = re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', API_PREFIX + pattern) + '$')
+
+        def register(handler: Handler) -> Handler:
+            self.routes.append((method.upper(), regex, handler))
+            return handler
+        return register
+
+    def use(self, middleware: Middleware):
+        self.middleware.append(middleware)
+
+    def _dispatch(self, request: Request) -> Response:
+        allowed = False
+        for method, regex, handler in self.routes:
+            match = regex.match(request.path)
+            if not match:
+                continue
+            allowed = True
+            if method == request.method:
+                request.params = match.groupdict()
+                return handler(request)
+
+        if allowed:
+            raise ApiError(405, 'METHOD_NOT_ALLOWED', f"{request.method} not allowed on {request.path}")
+        raise ApiError(404, 'NOT_FOUND', f"No route for {request.path}")
+
+    def handle(self, request: Request) -> Response:
+        """Run the middleware chain around dispatch"""
+        def call(index: int, req: Request) -> Response:
+            try:
+                if index == len(self.middleware):
+                    return self._dispatch(req)
+                return self.middleware[index](req, lambda r: call(index + 1, r))
+            except ApiError as e:
+                return error(req, e)
+
+        try:
+            return call(0, request)
+        except Exception as e:
+            print(f"❌ {request.method} {request.path} failed: {e}")
+            return error(request, ApiError(500, 'INTERNAL_ERROR', 'An unexpected error occurred'))
+
+    def __call__(self, environ: Dict, start_response) -> Iterable[bytes]:
+        request = Request(environ)
+        response = self.handle(request)
+
+        body = response.body
+        if isinstance(body, (bytes, str)):
+            body = body.encode() if isinstance(body, str) else body
+            response.headers['Content-Length'] = str(len(body))
+            body = [body]
+
+        start_response(response.wsgi_status(), list(response.headers.items()))
+        return body
+
+
+def api_keys() -> List[str]:
+    """Keys accepted by require_api_key (NEO_API_KEYS, comma separated)"""
+    return [k for k in os.environ.get('NEO_API_KEYS', '').split(',') if k]
+
+
+def require_api_key(allow_open: bool = False) -> Middleware:
+    """Middleware: Bearer auth against NEO_API_KEYS (comma separated)
+
+    With no keys configured every request is refused, unless allow_open
+    (a loopback bind, or --insecure) says otherwise.
+    """
+
+    def middleware(request: Request, next_handler: Handler) -> Response:
+        keys = api_keys()
+        if keys or not allow_open:
+            if request.api_key not in keys:
+                raise ApiError(401, 'UNAUTHORIZED', 'Invalid or missing API key')
+        return next_handler(request)
+
+    return middleware
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def log_requests(request: Request, next_handler: Handler) -> Response:
+    started = time.monotonic()
+    response = next_handler(request)
+    print(f"{request.method} {request.path} {response.status} "
+          f"{(time.monotonic() - started) * 1000:.1f}ms")
+    return response
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve(app: App, host: str = '127.0.0.1', port: int = 8080):
+    """Run the app on a threaded wsgiref server"""
+    with make_server(host, port, app, server_class=ThreadingWSGIServer) as server:
+        print(f"🚀 Neo API listening on http://{host}:{port}{API_PREFIX}")
+        server.serve_forever()
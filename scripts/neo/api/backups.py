@@ -0,0 +1,69 @@
+"""
+Neo VPS API - backups
+GET and POST /api/v1/servers/{instance_id}/backups
+
+Listing reads the local backup index (neo.backups), never describe_snapshots.
+Creating a backup snapshots all of the server's volumes in one call and
+returns 202; the engine's tracker thread follows progress for every
+in-flight backup with a single batched describe loop.
+"""
+
+from neo import aws
+from neo.api.app import ApiError, Request, Response, success
+from neo.api.servers import server_location
+from neo.backups import TYPE_TAGS, BackupEngine
+from neo.config import INSTANCES_TABLE
+
+LIST_FIELDS = ('id', 'timestamp', 'size_gb', 'type', 'status', 'volumes')
+
+engine = BackupEngine()
+
+
+def list_backups(request: Request) -> Response:
+    """GET /servers/{instance_id}/backups?limit=&type="""
+    instance_id = request.params['instance_id']
+    backup_type = request.query.get('type', 'all')
+    if backup_type != 'all' and backup_type not in TYPE_TAGS:
+        raise ApiError(400, 'VALIDATION_ERROR', f"type must be one of all, {', '.join(sorted(TYPE_TAGS))}")
+    try:
+        limit = int(request.query.get('limit', 10))
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', 'limit must be an integer')
+
+    item = aws.resource('dynamodb').Table(INSTANCES_TABLE).get_item(
+        Key={'instance_id': instance_id}, ProjectionExpression='backup_bucket_name').get('Item')
+    if item is None:
+        raise ApiError(404, 'NOT_FOUND', f"Server with instance_id {instance_id} not found")
+
+    backups = [{k: b.get(k) for k in LIST_FIELDS} for b in engine.index.list(instance_id, backup_type, limit)]
+    return success(request, {
+        'bucket': item.get('backup_bucket_name'),
+        'backups': backups,
+        'total_count': len(backups),
+    })
+
+
+def create_backup(request: Request) -> Response:
+    """POST /servers/{instance_id}/backups"""
+    instance_id = request.params['instance_id']
+    body = request.json()
+    backup_type = body.get('type', 'snapshot')
+    if backup_type not in TYPE_TAGS:
+        raise ApiError(400, 'VALIDATION_ERROR', f"type must be one of {', '.join(sorted(TYPE_TAGS))}")
+
+    domain, region = server_location(instance_id)
+    estimate = engine.estimate_completion(instance_id)
+    record = engine.start_backup(instance_id, domain, backup_type, str(body.get('description', '')), region)
+
+    return success(request, {
+        'backup_id': record['id'],
+        'status': record['status'],
+        'volumes': record['volumes'],
+        'estimated_completion': estimate,
+    }, status=202, message='Backup initiated successfully')
+
+
+def register(app):
+    app.route('GET', '/servers/{instance_id}/backups')(list_backups)
+    app.route('POST', '/servers/{instance_id}/backups')(create_backup)
+    engine.start()
@@ -0,0 +1,137 @@
+"""
+Neo VPS API - DNS records
+GET /api/v1/servers/{instance_id}/dns and POST .../dns/records
+
+Records are served from neo.dns_cache, so repeated reads never list the
+zone in Route53. The cached copy's version (the last change ID written
+through it, or a digest after a refresh) is the ETag, and new records are
+submitted to Route53 and written through to the cache in the same call.
+"""
+
+import hashlib
+import re
+from typing import Dict, List
+
+from neo import aws
+from neo.api.app import ApiError, Request, Response, success
+from neo.api.etags import conditional, make_etag
+from neo.api.servers import server_domain
+from neo.config import DNS_ZONES_TABLE
+from neo.dns_cache import zone_cache
+from neo.store import dns_zones
+
+RECORD_TYPES = ('A', 'AAAA', 'CNAME', 'MX', 'TXT', 'NS', 'SRV', 'CAA')
+MIN_TTL, MAX_TTL = 60, 86400
+NAME_PATTERN = re.compile(r'^(\*\.)?([A-Za-z0-9_-]+\.)*[A-Za-z0-9-]+$')
+
+_zones: Dict[str, str] = {}
+
+
+def zone_for(domain: str) -> str:
+    """Route53 zone ID for a domain, from neo-dns-zones (memoised)"""
+    zone_id = _zones.get(domain)
+    if zone_id is None:
+        item = dns_zones.get(domain, ('zone_id',))
+        if not item or not item.get('zone_id'):
+            raise ApiError(404, 'NOT_FOUND', f"No DNS zone for {domain}")
+        zone_id = _zones[domain] = item['zone_id']
+    return zone_id
+
+
+def flatten(rrsets: List[Dict]) -> List[Dict]:
+    """One entry per record value, as in the contract"""
+    records = []
+    for rrset in rrsets:
+        name = rrset['Name'].rstrip('.')
+        if 'AliasTarget' in rrset:
+            records.append({'name': name, 'type': rrset['Type'],
+                            'value': rrset['AliasTarget']['DNSName'].rstrip('.'), 'ttl': None})
+            continue
+        for record in rrset.get('ResourceRecords', []):
+            records.append({'name': name, 'type': rrset['Type'], 'value': record['Value'], 'ttl': rrset.get('TTL')})
+    return records
+
+
+def get_dns(request: Request) -> Response:
+    """GET /servers/{instance_id}/dns"""
+    domain = server_domain(request.params['instance_id'])
+    zone_id = zone_for(domain)
+    entry = zone_cache.get(zone_id)
+
+    def build():
+        return {'zone_id': zone_id, 'domain': domain, 'records': flatten(entry['rrsets'])}
+
+    return conditional(request, make_etag('dns', zone_id, entry['version']), build)
+
+
+def _validate_record(body: Dict, domain: str) -> Dict:
+    errors = []
+    name = str(body.get('name', '')).rstrip('.').lower()
+    record_type = str(body.get('type', '')).upper()
+    value = str(body.get('value', '')).strip()
+    ttl = body.get('ttl', 300)
+
+    if not NAME_PATTERN.match(name) or not (name == domain or name.endswith('.' + domain)):
+        errors.append({'field': 'name', 'issue': f"Must be {domain} or a name under it"})
+    if record_type not in RECORD_TYPES:
+        errors.append({'field': 'type', 'issue': f"Must be one of {', '.join(RECORD_TYPES)}"})
+    if not value:
+        errors.append({'field': 'value', 'issue': 'Required'})
+    if not isinstance(ttl, int) or not MIN_TTL <= ttl <= MAX_TTL:
+        errors.append({'field': 'ttl', 'issue': f"Must be an integer between {MIN_TTL} and {MAX_TTL}"})
+    if errors:
+        raise ApiError(400, 'VALIDATION_ERROR', 'Invalid DNS record', details=errors)
+
+    if record_type == 'TXT' and not value.startswith('"'):
+        value = f'"{value}"'
+    return {'name': name, 'type': record_type, 'value': value, 'ttl': ttl}
+
+
+def create_record(request: Request) -> Response:
+    """POST /servers/{instance_id}/dns/records"""
+    domain = server_domain(request.params['instance_id'])
+    record = _validate_record(request.json(), domain)
+    zone_id = zone_for(domain)
+
+    # Another value for an existing name/type joins its record set
+    values = [record['value']]
+    for rrset in zone_cache.rrsets(zone_id):
+        if rrset['Name'].rstrip('.').lower() == record['name'] and rrset['Type'] == record['type']:
+            if 'AliasTarget' in rrset:
+                raise ApiError(400, 'VALIDATION_ERROR', f"{record['name']} {record['type']} is an alias record")
+            existing = [r['Value'] for r in rrset.get('ResourceRecords', [])]
+            if record['value'] in existing:
+                raise ApiError(400, 'VALIDATION_ERROR', 'Record already exists')
+            if record['type'] == 'CNAME':
+                raise ApiError(400, 'VALIDATION_ERROR', 'A CNAME record set holds a single value')
+            values = existing + values
+            break
+
+    changes = [{
+        'Action': 'UPSERT',
+        'ResourceRecordSet': {
+            'Name': record['name'],
+            'Type': record['type'],
+            'TTL': record['ttl'],
+            'ResourceRecords': [{'Value': v} for v in values],
+        },
+    }]
+    response = aws.client('route53').change_resource_record_sets(
+        HostedZoneId=zone_id, ChangeBatch={'Changes': changes})
+    change_id = response['ChangeInfo']['Id']
+
+    zone_cache.apply_changes(zone_id, changes, change_id)
+    aws.resource('dynamodb').Table(DNS_ZONES_TABLE).update_item(
+        Key={'domain': domain}, UpdateExpression='SET last_change_id = :change',
+        ExpressionAttributeValues={':change': change_id})
+
+    record_id = 'record-' + hashlib.sha1(
+        f"{record['name']}|{record['type']}|{record['value']}".encode()).hexdigest()[:10]
+    return success(request, {'record_id': record_id, **record}, status=201,
+                   message='DNS record created successfully')
+
+
+def register(app):
+    app.route('GET', '/servers/{instance_id}/dns')(get_dns)
+    app.route('POST', '/servers/{instance_id}/dns/records')(create_record)
+    zone_cache.start()
@@ -0,0 +1,81 @@
+"""
+Neo VPS API - conditional requests
+Version-based ETags, If-None-Match handling and a representation cache
+
+A resource's ETag is derived from a cheap version signal (a DynamoDB item
+version, a Route53 change ID, a metrics period boundary) rather than from
+the response body, so a matching If-None-Match is answered with 304 before
+the expensive read happens, and a changed-but-already-seen version is
+served from the representation cache keyed by that ETag.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from neo.api.app import Request, Response, success_encoded
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag for a resource at a given version"""
+    digest = hashlib.sha1('\x1f'.join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match already names `etag`"""
+    header = request.header('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in candidates
+
+
+class RepresentationCache:
+    """LRU of encoded `data` documents keyed by ETag"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self.lock:
+            body = self.entries.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(etag)
+            self.hits += 1
+            return body
+
+    def put(self, etag: str, body: bytes):
+        with self.lock:
+            self.entries[etag] = body
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+representations = RepresentationCache()
+
+
+def conditional(request: Request, etag: str, build: Callable[[], Dict],
+                cache_control: str = 'private, no-cache') -> Response:
+    """304 if the client has `etag`, else the cached or freshly built representation"""
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if matches(request, etag):
+        return Response(304, b'', headers)
+
+    body = representations.get(etag)
+    if body is None:
+        body = json.dumps(build(), separators=(',', ':'), default=str).encode()
+        representations.put(etag, body)
+    return success_encoded(request, body, headers=headers)
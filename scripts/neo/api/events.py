@@ -0,0 +1,330 @@
+"""
+Neo VPS API - provisioning events
+Live provisioning progress over Server-Sent Events
+
+Every state transition (neo.orchestrator.write_state and track-state.sh) is
+appended as one JSON line to /var/neo/states/events.log. A single hub thread
+per API process tails that journal and fans new events out to subscriber
+queues, so N watching clients cost one file read per tick instead of N.
+
+Event IDs are the `seq` the writers number each line with, under the same
+lock that rotates a full journal to events.log.1, so they increase across
+rotations and mean the same in every API process. A client reconnecting
+with Last-Event-ID gets the missed events from the hub's in-memory history,
+or from the two journal files if they are older than that; an ID the hub
+has not reached (the journals were removed) gets the current state instead.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set
+
+from neo.api.app import ApiError, Request, Response, success
+from neo.config import STATE_DIR
+from neo.orchestrator import EVENTS_JOURNAL, journal_seq
+
+ALL_DOMAINS = '*'
+TERMINAL_STATES = ('completed', 'failed')
+KEEPALIVE = 15.0
+DOMAIN_PATTERN = re.compile(r'^[A-Za-z0-9.-]+$')
+
+
+class Event(NamedTuple):
+    id: int          # the line's seq
+    domain: str
+    state: str
+    data: bytes      # JSON line as written
+
+    def sse(self) -> bytes:
+        return b'id: %d\nevent: state\ndata: %s\n\n' % (self.id, self.data)
+
+
+class Subscription:
+    """One client's queue; `None` in the queue ends the stream"""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.queue: queue.Queue = queue.Queue()
+
+
+def parse_events(chunk: bytes) -> List[Event]:
+    """Numbered journal lines in `chunk`"""
+    events = []
+    for line in chunk.splitlines():
+        data = line.strip()
+        if not data:
+            continue
+        try:
+            record = json.loads(data)
+            seq = int(record['seq'])
+        except (ValueError, KeyError, TypeError):
+            continue
+        events.append(Event(seq, record.get('domain', ''), record.get('state', ''), data))
+    return events
+
+
+class EventHub:
+    """Tails the event journal and fans events out to subscribers"""
+
+    def __init__(self, journal: str = os.path.join(STATE_DIR, EVENTS_JOURNAL),
+                 poll_interval: float = 0.25, history: int = 10000, max_backlog: int = 1000):
+        self.journal = journal
+        self.state_dir = os.path.dirname(journal)
+        self.poll_interval = poll_interval
+        self.max_backlog = max_backlog
+        self.history: deque = deque(maxlen=history)
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.position = 0   # seq of the last event read
+        self.offset = 0     # bytes read of the open journal file
+        self.file = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def _open(self) -> bool:
+        try:
+            self.file = open(self.journal, 'rb')
+        except FileNotFoundError:
+            return False
+        self.offset = 0
+        return True
+
+    def seek_end(self):
+        """Skip what the journal already holds; later events are delivered"""
+        with self.lock:
+            if self.file or self._open():
+                self.offset = os.fstat(self.file.fileno()).st_size
+            self.position = journal_seq(self.journal)
+
+    def start(self):
+        """Follow the journal from its current end"""
+        if self.thread:
+            return
+        self.seek_end()
+        self.thread = threading.Thread(target=self._run, name='event-hub', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except OSError as e:
+                print(f"⚠️  Event journal read failed: {e}")
+
+    def read_journal(self) -> List[Event]:
+        """Every event still on disk (rotated journal first), in seq order"""
+        events: Dict[int, Event] = {}
+        for path in (f"{self.journal}.1", self.journal):
+            try:
+                with open(path, 'rb') as f:
+                    chunk = f.read()
+            except FileNotFoundError:
+                continue
+            # Only whole lines; a half-written tail is picked up next time
+            for event in parse_events(chunk[:chunk.rfind(b'\n') + 1]):
+                events[event.id] = event
+        return [events[seq] for seq in sorted(events)]
+
+    def _follow(self) -> List[Event]:
+        """New whole lines, moving on to the new file after a rotation"""
+        start = self.position
+        events: List[Event] = []
+        while self.file or self._open():
+            if os.fstat(self.file.fileno()).st_size < self.offset:
+                # Truncated in place
+                self.offset = 0
+            self.file.seek(self.offset)
+            chunk = self.file.read()
+            chunk = chunk[:chunk.rfind(b'\n') + 1]
+            self.offset += len(chunk)
+            for event in parse_events(chunk):
+                if event.id > self.position:
+                    events.append(event)
+                    self.position = event.id
+
+            try:
+                current = os.stat(self.journal).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(self.file.fileno()).st_ino:
+                break
+            # Rotated: the old file is drained, continue with the new one
+            self.file.close()
+            self.file = None
+
+        gap = events[0].id > start + 1 if events else not self.file and journal_seq(self.journal) > start
+        if gap:
+            # Lines rotated away before they were read (no journal was open yet); they are still on disk
+            read = {e.id for e in events}
+            events = sorted(events + [e for e in self.read_journal() if e.id > start and e.id not in read])
+            self.position = events[-1].id
+        return events
+
+    def poll_once(self) -> int:
+        """Read new journal lines and deliver them; returns how many"""
+        with self.lock:
+            events = self._follow()
+            self.history.extend(events)
+            for event in events:
+                for key in (event.domain, ALL_DOMAINS):
+                    for sub in list(self.subscribers.get(key, ())):
+                        if sub.queue.qsize() >= self.max_backlog:
+                            # Too slow: end its stream, it resumes via Last-Event-ID
+                            self._remove(sub)
+                            sub.queue.put(None)
+                        else:
+                            sub.queue.put(event)
+        return len(events)
+
+    def subscribe(self, domain: str = ALL_DOMAINS) -> Subscription:
+        sub = Subscription(domain)
+        with self.lock:
+            self.subscribers.setdefault(domain, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self.lock:
+            self._remove(sub)
+
+    def _remove(self, sub: Subscription):
+        subs = self.subscribers.get(sub.domain)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                del self.subscribers[sub.domain]
+
+    def replay(self, domain: str, after: int, until: int) -> List[Event]:
+        """Events for `domain` with after < id <= until"""
+        if after >= until:
+            return []
+        with self.lock:
+            buffered = list(self.history)
+
+        if buffered and buffered[0].id <= after + 1:
+            events = [e for e in buffered if after < e.id <= until]
+        else:
+            # Older than the in-memory history (or from before this process started)
+            events = [e for e in self.read_journal() if after < e.id <= until]
+        return [e for e in events if domain == ALL_DOMAINS or e.domain == domain]
+
+    def stream(self, domain: str, last_event_id: Optional[int] = None) -> Iterator[bytes]:
+        """SSE byte stream for one client"""
+        sub = self.subscribe(domain)
+        try:
+            with self.lock:
+                position = self.position
+
+            if last_event_id is not None and last_event_id <= position:
+                backlog = self.replay(domain, last_event_id, position)
+                last = last_event_id
+            else:
+                # A new client, or an ID from journals that are gone: start from the current state
+                state = current_state(domain, position, self.state_dir) if domain != ALL_DOMAINS else None
+                backlog = [state] if state else []
+                last = position
+
+            yield b'retry: 3000\n\n'
+            for event in backlog:
+                yield event.sse()
+                last = max(last, event.id)
+            if backlog and domain != ALL_DOMAINS and backlog[-1].state in TERMINAL_STATES:
+                return
+
+            while True:
+                try:
+                    event = sub.queue.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    # Comment line: keeps proxies open and detects gone clients
+                    yield b': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                if event.id <= last:
+                    continue
+                yield event.sse()
+                last = event.id
+                if domain != ALL_DOMAINS and event.state in TERMINAL_STATES:
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+
+def _state_file(domain: str, state_dir: str = STATE_DIR) -> str:
+    if not DOMAIN_PATTERN.match(domain):
+        raise ApiError(400, 'VALIDATION_ERROR', f"Invalid domain '{domain}'")
+    return os.path.join(state_dir, f"{domain}.json")
+
+
+def current_state(domain: str, position: int, state_dir: str = STATE_DIR) -> Optional[Event]:
+    """The domain's state file as an event, with its own seq (or `position` if it predates numbering)"""
+    try:
+        with open(_state_file(domain, state_dir), 'rb') as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    data = json.dumps(record, separators=(',', ':')).encode()
+    return Event(int(record.get('seq', position)), domain, record.get('state', ''), data)
+
+
+# ================================================================
+# ENDPOINTS
+# ================================================================
+
+hub = EventHub()
+
+
+def get_state(request: Request) -> Response:
+    """GET /provisioning/{domain}"""
+    domain = request.params['domain']
+    try:
+        with open(_state_file(domain)) as f:
+            return success(request, json.load(f))
+    except FileNotFoundError:
+        raise ApiError(404, 'NOT_FOUND', f"No provisioning state for {domain}")
+
+
+def _last_event_id(request: Request) -> Optional[int]:
+    value = request.header('Last-Event-ID') or request.query.get('last_event_id')
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', 'Last-Event-ID must be an event id')
+
+
+def _sse(request: Request, domain: str) -> Response:
+    return Response(200, hub.stream(domain, _last_event_id(request)), content_type='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def stream_domain(request: Request) -> Response:
+    """GET /provisioning/{domain}/events"""
+    domain = request.params['domain']
+    _state_file(domain)
+    return _sse(request, domain)
+
+
+def stream_all(request: Request) -> Response:
+    """GET /provisioning/events"""
+    return _sse(request, ALL_DOMAINS)
+
+
+def register(app):
+    app.route('GET', '/provisioning/events')(stream_all)
+    app.route('GET', '/provisioning/{domain}')(get_state)
+    app.route('GET', '/provisioning/{domain}/events')(stream_domain)
+    hub.start()
@@ -0,0 +1,145 @@
+"""
+Neo VPS API - server metrics
+GET /api/v1/servers/{instance_id}/metrics
+
+The window always ends on a period boundary that has had time to settle,
+so the boundary is the representation's version: every poll within one
+period shares an ETag and is served as a 304 or from the representation
+cache, and CloudWatch is queried once per period per window instead of on
+every dashboard refresh. Windows entirely in the past never change.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from neo import aws
+from neo.api.app import ApiError, Request, Response
+from neo.api.etags import conditional, make_etag
+from neo.api.servers import server_location
+
+DEFAULT_PERIOD = 300
+MAX_PERIOD = 86400
+DEFAULT_WINDOW = 3 * 3600
+
+# CloudWatch keeps filling a period for a while after it closes
+SETTLE_SECONDS = 120
+
+# Contract field -> (namespace, metric name, statistic, extra dimensions)
+METRICS = {
+    'cpu_utilization': ('AWS/EC2', 'CPUUtilization', 'Average', []),
+    'disk_used_percent': ('CWAgent', 'disk_used_percent', 'Average', [{'Name': 'path', 'Value': '/'}]),
+    'memory_used_percent': ('CWAgent', 'mem_used_percent', 'Average', []),
+    'network_in_bytes': ('AWS/EC2', 'NetworkIn', 'Sum', []),
+    'network_out_bytes': ('AWS/EC2', 'NetworkOut', 'Sum', []),
+    'disk_read_bytes': ('AWS/EC2', 'EBSReadBytes', 'Sum', []),
+    'disk_write_bytes': ('AWS/EC2', 'EBSWriteBytes', 'Sum', []),
+}
+
+
+def _timestamp(value: str, name: str) -> int:
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', f"{name} must be an ISO 8601 timestamp")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def metric_window(request: Request, now: float):
+    """(start, end, period, names, closed) with end on a settled period boundary"""
+    try:
+        period = int(request.query.get('period', DEFAULT_PERIOD))
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', 'period must be an integer')
+    if not 60 <= period <= MAX_PERIOD or period % 60:
+        raise ApiError(400, 'VALIDATION_ERROR', f"period must be a multiple of 60 up to {MAX_PERIOD}")
+
+    names = request.query.get('metrics')
+    names = [n.strip() for n in names.split(',')] if names else list(METRICS)
+    unknown = [n for n in names if n not in METRICS]
+    if unknown:
+        raise ApiError(400, 'VALIDATION_ERROR', f"Unknown metrics: {', '.join(unknown)}")
+
+    settled = int(now - SETTLE_SECONDS) // period * period
+    end = settled
+    if request.query.get('end_time'):
+        end = min(_timestamp(request.query['end_time'], 'end_time') // period * period, settled)
+    start = end - DEFAULT_WINDOW
+    if request.query.get('start_time'):
+        start = _timestamp(request.query['start_time'], 'start_time') // period * period
+    if start >= end:
+        raise ApiError(400, 'VALIDATION_ERROR', 'start_time must be before end_time')
+
+    return start, end, period, names, end < settled
+
+
+def fetch_metrics(instance_id: str, start: int, end: int, period: int, names: List[str],
+                  region: Optional[str] = None) -> List[Dict]:
+    """One row per period with every requested metric (GetMetricData)"""
+    queries = []
+    for i, name in enumerate(names):
+        namespace, metric, stat, dimensions = METRICS[name]
+        queries.append({
+            'Id': f"m{i}",
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': namespace,
+                    'MetricName': metric,
+                    'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}] + dimensions,
+                },
+                'Period': period,
+                'Stat': stat,
+            },
+        })
+
+    rows: Dict[int, Dict] = {}
+    kwargs = {
+        'MetricDataQueries': queries,
+        'StartTime': datetime.fromtimestamp(start, timezone.utc),
+        'EndTime': datetime.fromtimestamp(end, timezone.utc),
+        'ScanBy': 'TimestampAscending',
+    }
+    # Metrics live in the instance's own region
+    cloudwatch = aws.client('cloudwatch', region)
+    while True:
+        response = cloudwatch.get_metric_data(**kwargs)
+        for result in response['MetricDataResults']:
+            name = names[int(result['Id'][1:])]
+            for ts, value in zip(result['Timestamps'], result['Values']):
+                row = rows.setdefault(int(ts.timestamp()), {})
+                row[name] = round(value, 2)
+        if not response.get('NextToken'):
+            break
+        kwargs['NextToken'] = response['NextToken']
+
+    return [{'timestamp': _iso(ts), **rows[ts]} for ts in sorted(rows)]
+
+
+def get_metrics(request: Request) -> Response:
+    """GET /servers/{instance_id}/metrics"""
+    instance_id = request.params['instance_id']
+    start, end, period, names, closed = metric_window(request, time.time())
+    region = server_location(instance_id)[1]
+
+    def build():
+        return {
+            'instance_id': instance_id,
+            'period': period,
+            'start_time': _iso(start),
+            'end_time': _iso(end),
+            'metrics': fetch_metrics(instance_id, start, end, period, names, region),
+        }
+
+    etag = make_etag('metrics', instance_id, start, end, period, ','.join(names))
+    # A closed window never changes; a rolling one is revalidated each poll
+    return conditional(request, etag, build, 'private, max-age=86400' if closed else 'private, no-cache')
+
+
+def register(app):
+    app.route('GET', '/servers/{instance_id}/metrics')(get_metrics)
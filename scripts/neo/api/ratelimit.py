@@ -0,0 +1,216 @@
+"""
+Neo VPS API - rate limiting
+Per-key limits shared by every API worker process on the host
+
+Counters live in a fixed-size table in an mmap'd file (under /dev/shm when
+available), so all workers see the same buckets without a network round
+trip. Keys hash to a group of slots; each group is guarded by a byte-range
+lock on its slice of the file plus a thread lock, so an update is a hash,
+a lock, a few float operations and an unlock.
+
+Two algorithms share the slot layout:
+  token_bucket    - burst up to `limit`, refilled at limit/window per second
+  sliding_window  - weighted count over the current and previous window
+"""
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from neo.api.app import ApiError, Request, Response, api_keys
+from neo.config import CACHE_DIR
+
+DEFAULT_LIMIT = int(os.environ.get('RATE_LIMIT', 100))
+DEFAULT_WINDOW = float(os.environ.get('RATE_LIMIT_WINDOW', 60))
+DEFAULT_ALGORITHM = os.environ.get('RATE_LIMIT_ALGORITHM', 'token_bucket')
+
+DEFAULT_PATH = '/dev/shm/neo-ratelimit' if os.path.isdir('/dev/shm') else \
+    os.path.join(CACHE_DIR, 'ratelimit.mmap')
+
+MAGIC = b'NEORL001'
+HEADER = struct.Struct('<8sII')          # magic, groups, slots per group
+SLOT = struct.Struct('<Qddd')            # key hash, a, b, c
+HEADER_SIZE = 64
+ALGORITHMS = ('token_bucket', 'sliding_window')
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int           # epoch seconds when the key is back at full quota
+    retry_after: float   # seconds until the next request would be allowed
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(math.ceil(self.retry_after))
+        return headers
+
+
+class RateLimiter:
+    """Shared-memory rate limiter; safe across threads and processes"""
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, window: float = DEFAULT_WINDOW,
+                 algorithm: str = DEFAULT_ALGORITHM, path: str = DEFAULT_PATH,
+                 groups: int = 4096, slots_per_group: int = 4):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm '{algorithm}'")
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        self.algorithm = algorithm
+        self.groups = groups
+        self.slots_per_group = slots_per_group
+        self.group_size = SLOT.size * slots_per_group
+        self.size = HEADER_SIZE + groups * self.group_size
+        self.path = path
+
+        self.fd = self._open()
+        self.map = mmap.mmap(self.fd, self.size)
+        self.locks = [threading.Lock() for _ in range(64)]
+
+    def _open(self) -> int:
+        """Open the shared table, initialising it under a header lock"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        header = HEADER.pack(MAGIC, self.groups, self.slots_per_group)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            if os.fstat(fd).st_size != self.size or os.pread(fd, HEADER.size, 0) != header:
+                # New, or laid out differently: start from empty buckets
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.size)
+                os.pwrite(fd, header, 0)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+        return fd
+
+    def _slot_key(self, key: str) -> int:
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+    def hit(self, key: str, now: Optional[float] = None) -> Decision:
+        """Count one request for `key` and decide whether it may proceed"""
+        now = time.time() if now is None else now
+        key_hash = self._slot_key(key)
+        group = key_hash % self.groups
+        start = HEADER_SIZE + group * self.group_size
+
+        with self.locks[group % len(self.locks)]:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.group_size, start)
+            try:
+                offset = self._find_slot(start, key_hash, now)
+                _, a, b, c = SLOT.unpack_from(self.map, offset)
+                if self.algorithm == 'token_bucket':
+                    decision, a, b, c = self._token_bucket(a, b, c, now)
+                else:
+                    decision, a, b, c = self._sliding_window(a, b, c, now)
+                SLOT.pack_into(self.map, offset, key_hash, a, b, c)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, self.group_size, start)
+
+        return decision
+
+    def _find_slot(self, start: int, key_hash: int, now: float) -> int:
+        """The key's slot in its group, else an empty or the stalest one (reset)"""
+        victim, victim_age = start, -1.0
+        for i in range(self.slots_per_group):
+            offset = start + i * SLOT.size
+            slot_hash, a, _, _ = SLOT.unpack_from(self.map, offset)
+            if slot_hash == key_hash:
+                return offset
+            age = math.inf if slot_hash == 0 else now - a
+            if age > victim_age:
+                victim, victim_age = offset, age
+
+        SLOT.pack_into(self.map, victim, 0, 0.0, 0.0, 0.0)
+        return victim
+
+    def _token_bucket(self, updated: float, tokens: float, _, now: float):
+        """a = last update, b = tokens left"""
+        if updated == 0.0:
+            tokens = float(self.limit)
+        else:
+            tokens = min(float(self.limit), tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+
+        decision = Decision(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=int(tokens),
+            reset=math.ceil(now + (self.limit - tokens) / self.rate),
+            retry_after=0.0 if allowed else (1.0 - tokens) / self.rate,
+        )
+        return decision, now, tokens, 0.0
+
+    def _sliding_window(self, window_start: float, current: float, previous: float, now: float):
+        """a = current window start, b = count in it, c = count in the previous one"""
+        start = now - now % self.window
+        if window_start != start:
+            previous = current if window_start == start - self.window else 0.0
+            current = 0.0
+
+        elapsed = (now - start) / self.window
+        estimate = previous * (1.0 - elapsed) + current
+        allowed = estimate + 1.0 <= self.limit
+        if allowed:
+            current += 1.0
+            estimate += 1.0
+
+        if allowed or previous == 0.0:
+            retry_after = 0.0 if allowed else start + self.window - now
+        else:
+            # When the previous window's weight has decayed enough for one more
+            retry_after = max(0.0, (estimate + 1.0 - self.limit) / previous * self.window)
+
+        decision = Decision(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=max(0, int(self.limit - estimate)),
+            reset=math.ceil(start + self.window),
+            retry_after=retry_after,
+        )
+        return decision, start, current, previous
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+def rate_limit(limiter: RateLimiter):
+    """Middleware: per-API-key limit, ahead of auth
+
+    Only a configured key gets its own bucket; anything else counts against
+    the client address, so guessing keys can't buy a fresh quota per guess.
+    """
+
+    def middleware(request: Request, next_handler) -> Response:
+        key = request.api_key
+        if key not in api_keys():
+            key = f"addr:{request.environ.get('REMOTE_ADDR', 'anonymous')}"
+        decision = limiter.hit(key)
+        if not decision.allowed:
+            raise ApiError(429, 'RATE_LIMIT_EXCEEDED',
+                           f"Rate limit exceeded. Try again in {math.ceil(decision.retry_after)} seconds",
+                           headers=decision.headers())
+
+        response = next_handler(request)
+        response.headers.update(decision.headers())
+        return response
+
+    return middleware
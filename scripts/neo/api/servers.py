@@ -0,0 +1,318 @@
+"""
+Neo VPS API - servers
+GET /api/v1/servers backed by DynamoDB Query on secondary indexes
+
+Each filter maps to a GSI on neo-instances (status-index, customer_id-index,
+region-index, all sorted by created_at), so filtered listings never scan
+the table; an unfiltered listing pages through a projected Scan. Pages
+are addressed with an opaque cursor wrapping LastEvaluatedKey, only the
+listed attributes are read (ProjectionExpression), and responses sit in a
+short-TTL cache that any write to /servers invalidates. The cache is per
+process; a write bumps a version file under CACHE_DIR, so every API worker
+drops its listings, not just the one that took the write.
+
+GET /api/v1/servers/{instance_id} is conditional: its ETag comes from the
+item's version attribute (bumped by every writer), read with a projected
+GetItem before the full item is fetched or rebuilt.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from neo import aws
+from neo.api.app import API_PREFIX, ApiError, Request, Response, success
+from neo.api.etags import conditional, make_etag
+from neo.config import CACHE_DIR, DEFAULT_REGION, INSTANCES_TABLE
+from neo.health_codec import decode as decode_health
+from neo.store import instances
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Query parameter -> (index name, key attribute); first match wins
+INDEXES = [
+    ('customer_id', 'customer_id-index', 'customer_id'),
+    ('status', 'status-index', 'status'),
+    ('region', 'region-index', 'aws_region'),
+]
+
+# Parameters that narrow an index query further
+FILTERS = {
+    'status': 'status',
+    'region': 'aws_region',
+    'environment': 'environment',
+    'customer_id': 'customer_id',
+}
+
+# Table attribute -> contract field
+LIST_FIELDS = {
+    'instance_id': 'instance_id',
+    'customer_id': 'customer_id',
+    'domain': 'customer_domain',
+    'environment': 'environment',
+    'public_ip': 'public_ip',
+    'private_ip': 'private_ip',
+    'status': 'instance_state',
+    'panel': 'control_panel',
+    'instance_type': 'instance_type',
+    'aws_region': 'aws_region',
+    'created_at': 'created_at',
+}
+
+
+class ResponseCache:
+    """Short-TTL cache of encoded list responses, dropped on any write
+
+    Entries are stamped with the identity of a version file that every
+    invalidate() replaces, so a write in one worker process empties the
+    caches of the others too.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024,
+                 version_file: str = os.path.join(CACHE_DIR, 'servers.version')):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_file = version_file
+        self.entries: Dict[Tuple, Tuple[float, tuple, Dict]] = {}
+        self.lock = threading.Lock()
+
+    def version(self) -> tuple:
+        # Every bump replaces the file, so the inode changes even within one mtime tick
+        try:
+            st = os.stat(self.version_file)
+        except FileNotFoundError:
+            return ()
+        return st.st_ino, st.st_mtime_ns
+
+    def get(self, key: Tuple, version: tuple) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl and entry[1] == version:
+                return entry[2]
+            self.entries.pop(key, None)
+            return None
+
+    def put(self, key: Tuple, data: Dict, version: tuple):
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[key] = (time.monotonic(), version, data)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+        os.makedirs(os.path.dirname(self.version_file), exist_ok=True)
+        tmp_file = f"{self.version_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(f"{time.time()}\n")
+        os.replace(tmp_file, self.version_file)
+
+
+cache = ResponseCache()
+
+
+def encode_cursor(index: str, last_key: Dict) -> str:
+    raw = json.dumps({'i': index, 'k': last_key}, default=_plain, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, index: str) -> Dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', 'Invalid cursor')
+    if data.get('i') != index:
+        raise ApiError(400, 'VALIDATION_ERROR', 'Cursor does not match the requested filters')
+    return data['k']
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(type(value))
+
+
+def plain(value):
+    """DynamoDB item values as JSON-ready types"""
+    if isinstance(value, Decimal):
+        return _plain(value)
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    if isinstance(value, (list, set)):
+        return [plain(v) for v in value]
+    return value
+
+
+def _limit(request: Request) -> int:
+    try:
+        limit = int(request.query.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(400, 'VALIDATION_ERROR', 'limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(400, 'VALIDATION_ERROR', f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def query_servers(filters: Dict[str, str], limit: int, cursor: Optional[str]) -> Dict:
+    """One page of servers, from the best matching index when filtered"""
+    index, key_attr, key_value = '', None, None
+    for param, name, attr in INDEXES:
+        if param in filters:
+            index, key_attr, key_value = name, attr, filters[param]
+            break
+
+    names = {f"#{attr}": attr for attr in LIST_FIELDS}
+    kwargs = {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+        'Limit': limit,
+    }
+    if index:
+        kwargs.update({
+            'IndexName': index,
+            'KeyConditionExpression': Key(key_attr).eq(key_value),
+            'ScanIndexForward': False,
+        })
+
+    condition = None
+    for name, value in filters.items():
+        attr = FILTERS[name]
+        if attr == key_attr:
+            continue
+        clause = Attr(attr).eq(value)
+        condition = clause if condition is None else condition & clause
+    if condition is not None:
+        kwargs['FilterExpression'] = condition
+
+    if cursor:
+        kwargs['ExclusiveStartKey'] = decode_cursor(cursor, index)
+
+    table = aws.resource('dynamodb').Table(INSTANCES_TABLE)
+    read = table.query if index else table.scan
+    items = []
+
+    # Filters can leave a page short; keep reading until it is full or exhausted
+    while True:
+        response = read(**kwargs)
+        items.extend(response['Items'])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or len(items) >= limit:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+        kwargs['Limit'] = limit - len(items)
+
+    servers = [{LIST_FIELDS[k]: plain(v) for k, v in item.items()} for item in items[:limit]]
+
+    return {
+        'servers': servers,
+        'count': len(servers),
+        'limit': limit,
+        'next_cursor': encode_cursor(index, last_key) if last_key else None,
+    }
+
+
+def list_servers(request: Request) -> Response:
+    """GET /servers?status=&customer_id=&region=&environment=&limit=&cursor="""
+    filters = {name: request.query[name] for name in FILTERS if request.query.get(name)}
+    # `state` is the contract's name for the status filter
+    if request.query.get('state') and 'status' not in filters:
+        filters['status'] = request.query['state']
+
+    limit = _limit(request)
+    cursor = request.query.get('cursor')
+    cache_key = (tuple(sorted(filters.items())), limit, cursor)
+
+    # Taken before the read, so a write during the query isn't cached over
+    version = cache.version()
+    data = cache.get(cache_key, version)
+    if data is None:
+        data = query_servers(filters, limit, cursor)
+        cache.put(cache_key, data, version)
+
+    return success(request, data)
+
+
+# Attributes that change whenever the item does, in order of preference
+VERSION_ATTRIBUTES = ('version', 'updated_at', 'last_health_check')
+
+
+def item_version(instance_id: str) -> str:
+    """Cheap version of a neo-instances item (projected GetItem)"""
+    table = aws.resource('dynamodb').Table(INSTANCES_TABLE)
+    names = {f"#{attr}": attr for attr in VERSION_ATTRIBUTES}
+    response = table.get_item(Key={'instance_id': instance_id},
+                              ProjectionExpression=', '.join(names), ExpressionAttributeNames=names)
+    if 'Item' not in response:
+        # A projection of missing attributes returns {}; tell that apart from no item
+        response = table.get_item(Key={'instance_id': instance_id}, ProjectionExpression='instance_id')
+        if 'Item' not in response:
+            raise ApiError(404, 'NOT_FOUND', f"Server with instance_id {instance_id} not found")
+        return ''
+    item = response['Item']
+    if not item:
+        return ''
+    return '|'.join(str(item.get(attr, '')) for attr in VERSION_ATTRIBUTES)
+
+
+def fetch_server(instance_id: str) -> Dict:
+    response = aws.resource('dynamodb').Table(INSTANCES_TABLE).get_item(Key={'instance_id': instance_id})
+    if 'Item' not in response:
+        raise ApiError(404, 'NOT_FOUND', f"Server with instance_id {instance_id} not found")
+    item = plain(response['Item'])
+    if 'health_status' in item:
+        # Stored compact (neo.health_codec); served readable
+        item['health_status'] = decode_health(item['health_status'])
+    return {LIST_FIELDS.get(k, k): v for k, v in item.items()}
+
+
+_locations: Dict[str, Tuple[str, str]] = {}
+
+
+def server_location(instance_id: str) -> Tuple[str, str]:
+    """(domain, aws_region) of an instance; neither changes, so they are memoised"""
+    location = _locations.get(instance_id)
+    if location is None:
+        item = instances.get(instance_id, ('domain', 'aws_region'))
+        if not item or 'domain' not in item:
+            raise ApiError(404, 'NOT_FOUND', f"Server with instance_id {instance_id} not found")
+        location = _locations[instance_id] = (item['domain'], item.get('aws_region') or DEFAULT_REGION)
+    return location
+
+
+def server_domain(instance_id: str) -> str:
+    return server_location(instance_id)[0]
+
+
+def get_server(request: Request) -> Response:
+    """GET /servers/{instance_id}"""
+    instance_id = request.params['instance_id']
+    version = item_version(instance_id)
+    if not version:
+        # Unversioned item: the body itself is the version
+        data = fetch_server(instance_id)
+        etag = make_etag('server', instance_id, json.dumps(data, sort_keys=True, default=str))
+        return conditional(request, etag, lambda: data)
+    return conditional(request, make_etag('server', instance_id, version), lambda: fetch_server(instance_id))
+
+
+def invalidate_on_write(request: Request, next_handler) -> Response:
+    """Middleware: any successful write under /servers drops cached listings"""
+    response = next_handler(request)
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and \
+            request.path.startswith(API_PREFIX + '/servers') and response.status < 400:
+        cache.invalidate()
+    return response
+
+
+def register(app):
+    app.route('GET', '/servers')(list_servers)
+    app.route('GET', '/servers/{instance_id}')(get_server)
+    app.use(invalidate_on_write)
@@ -0,0 +1,53 @@
+"""
+Neo VPS AWS client helpers
+Shared, thread-safe boto3 clients so modules reuse connection pools
+
+Each (service, region) gets one client with its own connection pool, sized
+by NEO_AWS_POOL_SIZE so region fan-out (neo.regions) and worker threads
+don't queue behind botocore's default of 10 connections.
+
+Importing this module installs the throttling governor (neo.throttle) on
+boto3's default session, so every client created afterwards is paced.
+"""
+
+import os
+import threading
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+
+from neo import throttle
+from neo.config import DEFAULT_REGION
+
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+_config = Config(max_pool_connections=int(os.environ.get('NEO_AWS_POOL_SIZE', 50)))
+
+throttle.install()
+
+
+def client(service: str, region: Optional[str] = None):
+    """Return a cached boto3 client for (service, region)"""
+    key = (service, region or DEFAULT_REGION)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = boto3.client(service, region_name=key[1], config=_config)
+        return _clients[key]
+
+
+def resource(service: str, region: Optional[str] = None):
+    """Return a cached boto3 resource for (service, region)"""
+    key = (service, region or DEFAULT_REGION)
+    with _lock:
+        if key not in _resources:
+            _resources[key] = boto3.resource(service, region_name=key[1], config=_config)
+        return _resources[key]
+
+
+def reset():
+    """Drop cached clients (e.g. between moto test cases)"""
+    with _lock:
+        _clients.clear()
+        _resources.clear()
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Backup Engine
+Crash-consistent multi-volume snapshots, fleet-wide windows, local index
+
+A backup is one CreateSnapshots call per instance, which snapshots every
+attached volume at the same point in time. Fleet windows start backups with
+bounded parallelism, and progress for every in-flight snapshot on the host
+is tracked by one batched describe_snapshots loop. Backups (including the
+DLM daily snapshots, imported by `sync`) are recorded in a local index at
+/var/neo/cache/backups/index.json, which the API lists from directly.
+
+Each backup records the region its instance runs in; tracking, sync and
+fleet discovery fan out over regions (neo.regions) in parallel.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from neo import aws
+from neo.config import CACHE_DIR, DEFAULT_REGION
+from neo.regions import REGIONS, fan_out, running_instances
+
+# Backup type -> Type tag (AutoBackup matches backups/auto-backup.sh)
+TYPE_TAGS = {'daily': 'AutoBackup', 'snapshot': 'ManualBackup'}
+DLM_TYPE_TAG = 'DailyBackup'
+
+# Snapshot IDs per describe_snapshots call
+DESCRIBE_BATCH = 500
+
+DEFAULT_ESTIMATE = 300
+
+# describe_snapshots is eventually consistent: a just-created snapshot can be
+# missing from it for a while, so it only counts as lost after this long
+NOT_FOUND_GRACE = 600
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _iso(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _paginate(client, operation: str, key: str, **kwargs) -> Iterator[Dict]:
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        yield from page[key]
+
+
+class BackupIndex:
+    """backup_id -> backup record, shared through one JSON file"""
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, 'backups', 'index.json')):
+        self.path = path
+        self.lock = threading.Lock()
+        self._cached: Optional[tuple] = None      # (file identity, data)
+
+    def _identity(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def load(self) -> Dict:
+        identity = self._identity()
+        if identity is None:
+            return {'backups': {}}
+        with self.lock:
+            if self._cached and self._cached[0] == identity:
+                return self._cached[1]
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'backups': {}}
+        with self.lock:
+            self._cached = (identity, data)
+        return data
+
+    @contextmanager
+    def update(self):
+        """Read-modify-write under a lock shared with other processes"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock, open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path) as f:
+                        data = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    data = {'backups': {}}
+                yield data
+                tmp_file = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_file, self.path)
+                self._cached = (self._identity(), data)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def list(self, instance_id: str, backup_type: str = 'all', limit: int = 10) -> List[Dict]:
+        backups = [b for b in self.load()['backups'].values()
+                   if b['instance_id'] == instance_id and backup_type in ('all', b['type'])]
+        backups.sort(key=lambda b: b['timestamp'], reverse=True)
+        return backups[:limit]
+
+    def get(self, backup_id: str) -> Optional[Dict]:
+        return self.load()['backups'].get(backup_id)
+
+
+class BackupEngine:
+    """Starts backups and tracks every pending snapshot in one loop"""
+
+    def __init__(self, index: Optional[BackupIndex] = None, region: Optional[str] = None,
+                 poll_interval: float = 15):
+        self.index = index or BackupIndex()
+        self.region = region
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    # ================================================================
+    # CREATE
+    # ================================================================
+
+    def _region(self, region: Optional[str] = None) -> str:
+        return region or self.region or DEFAULT_REGION
+
+    def start_backup(self, instance_id: str, domain: str, backup_type: str = 'snapshot',
+                     description: str = '', region: Optional[str] = None,
+                     retention_days: Optional[int] = None) -> Dict:
+        """Snapshot every volume of an instance at one point in time
+
+        retention_days is tagged as RetentionDays, which neo.retention keeps
+        daily snapshots for instead of its --daily default.
+        """
+        region = self._region(region)
+        if backup_type not in TYPE_TAGS:
+            raise ValueError(f"Unknown backup type '{backup_type}'")
+
+        backup_id = f"backup-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        tags = [
+            {'Key': 'Domain', 'Value': domain},
+            {'Key': 'InstanceId', 'Value': instance_id},
+            {'Key': 'Type', 'Value': TYPE_TAGS[backup_type]},
+            {'Key': 'BackupId', 'Value': backup_id},
+            {'Key': 'Date', 'Value': datetime.now(timezone.utc).strftime('%Y-%m-%d')},
+        ]
+        if retention_days:
+            tags.append({'Key': 'RetentionDays', 'Value': str(retention_days)})
+
+        response = aws.client('ec2', region).create_snapshots(
+            InstanceSpecification={'InstanceId': instance_id, 'ExcludeBootVolume': False},
+            Description=description or f"{backup_type} backup for {domain} - {backup_id}",
+            TagSpecifications=[{'ResourceType': 'snapshot', 'Tags': tags}],
+        )
+
+        snapshots = {
+            s['SnapshotId']: {'volume_id': s['VolumeId'], 'size_gb': s.get('VolumeSize', 0),
+                              'state': s.get('State', 'pending'), 'progress': s.get('Progress', '0%')}
+            for s in response['Snapshots']
+        }
+        record = {
+            'id': backup_id,
+            'instance_id': instance_id,
+            'domain': domain,
+            'region': region,
+            'type': backup_type,
+            'description': description,
+            'timestamp': _now(),
+            'status': 'in_progress',
+            'size_gb': sum(s['size_gb'] for s in snapshots.values()),
+            'volumes': sorted(s['volume_id'] for s in snapshots.values()),
+            'snapshots': snapshots,
+        }
+        with self.index.update() as data:
+            data['backups'][backup_id] = record
+
+        print(f"📸 {backup_id}: {len(snapshots)} volume(s) of {instance_id} ({domain})")
+        return record
+
+    def estimate_completion(self, instance_id: str) -> str:
+        """Average duration of this instance's completed backups, from the index"""
+        durations = [b['duration'] for b in self.index.list(instance_id, limit=20) if b.get('duration')]
+        seconds = sum(durations) / len(durations) if durations else DEFAULT_ESTIMATE
+        return _iso(datetime.now(timezone.utc) + timedelta(seconds=seconds))
+
+    # ================================================================
+    # TRACK
+    # ================================================================
+
+    def pending_snapshots(self) -> Dict[str, str]:
+        """snapshot_id -> backup_id for everything still in progress"""
+        pending = {}
+        for backup in self.index.load()['backups'].values():
+            if backup['status'] != 'in_progress':
+                continue
+            for snapshot_id, snapshot in backup['snapshots'].items():
+                if snapshot['state'] == 'pending':
+                    pending[snapshot_id] = backup['id']
+        return pending
+
+    def poll_once(self) -> int:
+        """Refresh every pending snapshot with batched describes; returns how many remain"""
+        pending = self.pending_snapshots()
+        if not pending:
+            return 0
+
+        backups = self.index.load()['backups']
+        by_region: Dict[str, List[str]] = {}
+        for snapshot_id, backup_id in pending.items():
+            by_region.setdefault(self._region(backups[backup_id].get('region')), []).append(snapshot_id)
+
+        sweep = fan_out(lambda region: self._describe(region, by_region[region]), by_region)
+        states: Dict[str, Dict] = {}
+        for region_states in sweep.results.values():
+            states.update(region_states)
+        for region, error in sweep.errors.items():
+            # Left pending; retried on the next poll
+            print(f"⚠️  Snapshot describe failed in {region}: {error}")
+            for snapshot_id in by_region[region]:
+                pending.pop(snapshot_id)
+
+        remaining = 0
+        now = time.time()
+        with self.index.update() as data:
+            for snapshot_id, backup_id in pending.items():
+                backup = data['backups'].get(backup_id)
+                if not backup:
+                    continue
+                entry = backup['snapshots'][snapshot_id]
+                snapshot = states.get(snapshot_id)
+                if snapshot is None:
+                    started = datetime.strptime(backup['timestamp'], '%Y-%m-%dT%H:%M:%SZ')
+                    if now - started.replace(tzinfo=timezone.utc).timestamp() > NOT_FOUND_GRACE:
+                        entry['state'] = 'error'
+                else:
+                    entry['state'] = snapshot['State']
+                    entry['progress'] = snapshot.get('Progress', entry['progress'])
+
+            for backup_id in set(pending.values()):
+                backup = data['backups'].get(backup_id)
+                if not backup:
+                    continue
+                snapshot_states = {s['state'] for s in backup['snapshots'].values()}
+                if 'error' in snapshot_states:
+                    backup['status'] = 'failed'
+                elif snapshot_states == {'completed'}:
+                    backup['status'] = 'completed'
+                    started = datetime.strptime(backup['timestamp'], '%Y-%m-%dT%H:%M:%SZ')
+                    backup['duration'] = int(now - started.replace(tzinfo=timezone.utc).timestamp())
+                else:
+                    remaining += sum(1 for s in backup['snapshots'].values() if s['state'] == 'pending')
+        return remaining
+
+    @staticmethod
+    def _describe(region: str, ids: List[str]) -> Dict[str, Dict]:
+        ec2 = aws.client('ec2', region)
+        states: Dict[str, Dict] = {}
+        for offset in range(0, len(ids), DESCRIBE_BATCH):
+            batch = ids[offset:offset + DESCRIBE_BATCH]
+            try:
+                snapshots = ec2.describe_snapshots(SnapshotIds=batch)['Snapshots']
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidSnapshot.NotFound':
+                    raise
+                # One vanished snapshot fails the batch; fall back to a filter, which skips it
+                snapshots = ec2.describe_snapshots(Filters=[{'Name': 'snapshot-id', 'Values': batch}])['Snapshots']
+            for snapshot in snapshots:
+                states[snapshot['SnapshotId']] = snapshot
+        return states
+
+    def start(self):
+        """Track in the background (used by the API)"""
+        if self.thread:
+            return
+        self.stop_event.clear()
+
+        def run():
+            while not self.stop_event.wait(self.poll_interval):
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    print(f"⚠️  Backup tracking failed: {e}")
+
+        self.thread = threading.Thread(target=run, name='backup-tracker', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def wait(self, backup_ids: List[str], timeout: float = 3600) -> Dict[str, str]:
+        """Poll until the given backups finish; returns their statuses"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.poll_once()
+            statuses = {b: (self.index.get(b) or {}).get('status', 'missing') for b in backup_ids}
+            if 'in_progress' not in statuses.values() or time.monotonic() > deadline:
+                return statuses
+            time.sleep(self.poll_interval)
+
+    # ================================================================
+    # FLEET WINDOW
+    # ================================================================
+
+    def run_window(self, targets: List[Dict], backup_type: str = 'daily', max_parallel: int = 10,
+                   sleep: Callable[[float], None] = time.sleep) -> Dict[str, str]:
+        """Back up many instances with at most `max_parallel` sets in flight"""
+        queue = list(targets)
+        in_flight: Dict[str, str] = {}       # backup_id -> instance_id
+        results: Dict[str, str] = {}
+
+        while queue or in_flight:
+            while queue and len(in_flight) < max_parallel:
+                target = queue.pop(0)
+                try:
+                    record = self.start_backup(target['instance_id'], target['domain'], backup_type,
+                                               region=target.get('aws_region'),
+                                               retention_days=target.get('retention_days'))
+                    in_flight[record['id']] = target['instance_id']
+                except ClientError as e:
+                    print(f"❌ {target['instance_id']}: {e}")
+                    results[target['instance_id']] = 'failed'
+
+            if not in_flight:
+                break
+            sleep(self.poll_interval)
+            self.poll_once()
+
+            for backup_id in list(in_flight):
+                status = (self.index.get(backup_id) or {}).get('status')
+                if status != 'in_progress':
+                    results[in_flight.pop(backup_id)] = status
+
+        return results
+
+    # ================================================================
+    # INDEX SYNC
+    # ================================================================
+
+    def sync(self) -> int:
+        """Import snapshots made outside the engine (DLM, auto-backup.sh) in a few paginated calls per region"""
+        sweep = fan_out(self._sync_region, [self.region] if self.region else REGIONS)
+        for region, error in sweep.errors.items():
+            print(f"⚠️  Backup sync failed in {region}: {error}")
+        groups: Dict[str, Dict] = {}
+        for region_groups in sweep.results.values():
+            groups.update(region_groups)
+
+        with self.index.update() as data:
+            backups = data['backups']
+            # Index entries whose snapshots are all gone (pruned) are dropped
+            for backup_id in [b for b, backup in backups.items()
+                              if backup['status'] != 'in_progress' and b not in groups and
+                              self._region(backup.get('region')) in sweep.results]:
+                del backups[backup_id]
+
+            for backup_id, group in groups.items():
+                states = {s['state'] for s in group['snapshots'].values()}
+                group['status'] = 'failed' if 'error' in states else \
+                    'completed' if states == {'completed'} else 'in_progress'
+                group['size_gb'] = sum(s['size_gb'] for s in group['snapshots'].values())
+                group['volumes'] = sorted(s['volume_id'] for s in group['snapshots'].values())
+                existing = backups.get(backup_id, {})
+                backups[backup_id] = {**existing, **group,
+                                      'description': existing.get('description') or group['description']}
+            data['synced_at'] = _now()
+
+        return len(groups)
+
+    def _sync_region(self, region: str) -> Dict[str, Dict]:
+        ec2 = aws.client('ec2', region)
+
+        attached: Dict[str, str] = {}
+        for volume in _paginate(ec2, 'describe_volumes', 'Volumes',
+                                Filters=[{'Name': 'attachment.status', 'Values': ['attached']}]):
+            for attachment in volume['Attachments']:
+                attached[volume['VolumeId']] = attachment['InstanceId']
+
+        groups: Dict[str, Dict] = {}
+        for snapshot in _paginate(ec2, 'describe_snapshots', 'Snapshots', OwnerIds=['self'],
+                                  Filters=[{'Name': 'tag-key', 'Values': ['Domain']}]):
+            tags = {t['Key']: t['Value'] for t in snapshot.get('Tags', [])}
+            instance_id = tags.get('InstanceId') or attached.get(snapshot['VolumeId'])
+            if not instance_id:
+                continue
+
+            backup_type = 'daily' if tags.get('SnapshotType') == DLM_TYPE_TAG or \
+                tags.get('Type') == TYPE_TAGS['daily'] else 'snapshot'
+            day = snapshot['StartTime'].strftime('%Y%m%d')
+            backup_id = tags.get('BackupId') or f"{backup_type}-{instance_id}-{day}"
+
+            group = groups.setdefault(backup_id, {
+                'id': backup_id,
+                'instance_id': instance_id,
+                'domain': tags['Domain'],
+                'region': region,
+                'type': backup_type,
+                'description': snapshot.get('Description', ''),
+                'timestamp': _iso(snapshot['StartTime']),
+                'snapshots': {},
+            })
+            group['snapshots'][snapshot['SnapshotId']] = {
+                'volume_id': snapshot['VolumeId'], 'size_gb': snapshot['VolumeSize'],
+                'state': snapshot['State'], 'progress': snapshot.get('Progress', ''),
+            }
+            group['timestamp'] = min(group['timestamp'], _iso(snapshot['StartTime']))
+        return groups
+
+
+def fleet_targets(region: Optional[str] = None) -> List[Dict]:
+    """Running customer instances with their Domain tag, from one region or all of REGIONS in parallel"""
+    sweep = fan_out(running_instances, [region] if region else REGIONS)
+    for failed, error in sweep.errors.items():
+        print(f"❌ Could not list instances in {failed}: {error}")
+    return sweep.merged()
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Neo VPS backup engine')
+    parser.add_argument('--region')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    backup = sub.add_parser('backup', help='Back up one instance')
+    backup.add_argument('instance_id')
+    backup.add_argument('domain')
+    backup.add_argument('--type', choices=sorted(TYPE_TAGS), default='snapshot')
+    backup.add_argument('--description', default='')
+    backup.add_argument('--retention-days', type=int, help='Tag the snapshots with RetentionDays')
+    backup.add_argument('--wait', action='store_true')
+
+    window = sub.add_parser('window', help='Back up every running customer instance')
+    window.add_argument('--type', choices=sorted(TYPE_TAGS), default='daily')
+    window.add_argument('--max-parallel', type=int, default=10)
+
+    listing = sub.add_parser('list', help='Backups of one instance, from the index')
+    listing.add_argument('instance_id')
+    listing.add_argument('--limit', type=int, default=10)
+
+    sub.add_parser('sync', help='Import snapshots into the index')
+    sub.add_parser('track', help='Refresh pending snapshots once')
+    args = parser.parse_args()
+
+    engine = BackupEngine(region=args.region)
+
+    if args.command == 'backup':
+        record = engine.start_backup(args.instance_id, args.domain, args.type, args.description,
+                                     retention_days=args.retention_days)
+        if args.wait:
+            status = engine.wait([record['id']])[record['id']]
+            print(f"{'✅' if status == 'completed' else '❌'} {record['id']}: {status}")
+            sys.exit(0 if status == 'completed' else 1)
+        print(record['id'])
+
+    elif args.command == 'window':
+        targets = fleet_targets(args.region)
+        print(f"🕒 Backup window: {len(targets)} instance(s), {args.max_parallel} at a time")
+        results = engine.run_window(targets, args.type, args.max_parallel)
+        failed = [i for i, status in results.items() if status != 'completed']
+        print(f"✅ {len(results) - len(failed)} completed, ❌ {len(failed)} failed")
+        sys.exit(1 if failed else 0)
+
+    elif args.command == 'list':
+        for b in engine.index.list(args.instance_id, limit=args.limit):
+            print(f"{b['id']}  {b['timestamp']}  {b['type']:<8} {b['status']:<11} {b['size_gb']} GB")
+
+    elif args.command == 'sync':
+        print(f"📦 Indexed {engine.sync()} backup(s)")
+
+    elif args.command == 'track':
+        print(f"⏳ {engine.poll_once()} snapshot(s) still pending")
+
+
+if __name__ == '__main__':
+    main()
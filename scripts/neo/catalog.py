@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Plan & Add-on Catalog
+Compiled, validated index over Plans/*.yaml and Marketplace/addons.yaml
+
+The YAML files are parsed and validated once into a Catalog with a plan x
+add-on compatibility matrix, a price table keyed by plan slug or add-on ID
+and a resource-limit table. The compiled index is pickled to
+/var/neo/cache/catalog.pickle and only rebuilt when a source file's mtime
+or size changes, so callers get dictionary lookups without YAML parsing.
+"""
+
+import argparse
+import glob
+import json
+import os
+import pickle
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from neo.config import CACHE_DIR, REPO_ROOT
+
+PLANS_GLOB = os.path.join(REPO_ROOT, 'Plans', '*.yaml')
+ADDONS_FILE = os.path.join(REPO_ROOT, 'Marketplace', 'addons.yaml')
+CACHE_FILE = os.path.join(CACHE_DIR, 'catalog.pickle')
+
+# Bump when the Catalog layout changes so old pickles are ignored
+FORMAT_VERSION = 1
+
+# -1 in Plans/*.yaml means unlimited
+UNLIMITED = -1
+
+
+class CatalogError(ValueError):
+    """A plan or add-on definition is invalid"""
+
+
+class Catalog:
+    """Compiled plan/add-on index"""
+
+    def __init__(self, plans: Dict[str, Dict], addons: Dict[str, Dict], warnings: List[str]):
+        self.plan_ids: Tuple[str, ...] = tuple(sorted(plans, key=lambda s: plans[s]['tier']))
+        self.addon_ids: Tuple[str, ...] = tuple(sorted(addons))
+        self.plan_index = {slug: i for i, slug in enumerate(self.plan_ids)}
+        self.addon_index = {addon_id: i for i, addon_id in enumerate(self.addon_ids)}
+        self.plans = plans
+        self.addons = addons
+        self.warnings = warnings
+
+        # Row per plan, one byte per add-on
+        width = len(self.addon_ids)
+        matrix = bytearray(len(self.plan_ids) * width)
+        for addon_id, addon in addons.items():
+            for slug in addon['compatible_plans']:
+                matrix[self.plan_index[slug] * width + self.addon_index[addon_id]] = 1
+        self.compat = bytes(matrix)
+
+        # Monthly and setup prices for plans and add-ons alike
+        self.prices: Dict[str, Tuple[float, float]] = {}
+        for slug, plan in plans.items():
+            self.prices[slug] = (float(plan['pricing']['monthly']), float(plan['pricing'].get('setup_fee', 0)))
+        for addon_id, addon in addons.items():
+            self.prices[addon_id] = (float(addon['price_monthly']), float(addon.get('price_setup', 0)))
+
+        self.limits: Dict[str, Dict[str, float]] = {slug: _limits(plan) for slug, plan in plans.items()}
+        self.instance_types = {slug: plan['compute']['instance_type'] for slug, plan in plans.items()}
+
+    def can_buy(self, plan: str, addon_id: str) -> bool:
+        """Whether `plan` may purchase `addon_id`"""
+        try:
+            row = self.plan_index[plan]
+            col = self.addon_index[addon_id]
+        except KeyError:
+            return False
+        return self.compat[row * len(self.addon_ids) + col] == 1
+
+    def compatible_addons(self, plan: str) -> List[str]:
+        return [addon_id for addon_id in self.addon_ids if self.can_buy(plan, addon_id)]
+
+    def price(self, item_id: str) -> float:
+        """Monthly price of a plan slug or add-on ID"""
+        return self.prices[item_id][0]
+
+    def setup_fee(self, item_id: str) -> float:
+        return self.prices[item_id][1]
+
+    def plan_for_instance_type(self, instance_type: str) -> Optional[str]:
+        for slug, plan_type in self.instance_types.items():
+            if plan_type == instance_type:
+                return slug
+        return None
+
+
+def _limits(plan: Dict) -> Dict[str, float]:
+    """Flat resource-limit row for one plan"""
+    storage = plan['storage']
+    row = {
+        'vcpu': plan['compute']['vcpu'],
+        'ram_gb': plan['compute']['ram_gb'],
+        'root_volume_gb': storage['root_volume']['size_gb'],
+        'data_volume_gb': storage['data_volume']['size_gb'],
+        'total_storage_gb': storage['total_gb'],
+        'max_storage_gb': storage['total_gb'] + (storage.get('max_expansion_gb', 0)
+                                                  if storage.get('expandable') else 0),
+        'bandwidth_monthly_tb': plan.get('networking', {}).get('bandwidth_monthly_tb', UNLIMITED),
+        'elastic_ips': plan.get('networking', {}).get('elastic_ips', 1),
+        'custom_alarms': plan.get('monitoring', {}).get('custom_alarms', UNLIMITED),
+    }
+    row.update(plan.get('limits', {}))
+    row.update(plan.get('app_limits', {}))
+    return row
+
+
+# ================================================================
+# PARSE & VALIDATE
+# ================================================================
+
+def _require(data: Dict, path: str, where: str):
+    node = data
+    for part in path.split('.'):
+        if not isinstance(node, dict) or part not in node:
+            raise CatalogError(f"{where}: missing '{path}'")
+        node = node[part]
+    return node
+
+
+def compile_catalog(plan_files: List[str], addons_file: str) -> Catalog:
+    """Parse and validate the YAML sources into a Catalog"""
+    plans: Dict[str, Dict] = {}
+    warnings: List[str] = []
+
+    for path in plan_files:
+        with open(path) as f:
+            plan = _require(yaml.safe_load(f), 'plan', path)
+        slug = _require(plan, 'slug', path)
+        for field in ('tier', 'pricing.monthly', 'compute.instance_type', 'compute.vcpu',
+                      'compute.ram_gb', 'storage.root_volume.size_gb', 'storage.data_volume.size_gb',
+                      'storage.total_gb'):
+            _require(plan, field, path)
+        if not isinstance(plan['pricing']['monthly'], (int, float)) or plan['pricing']['monthly'] < 0:
+            raise CatalogError(f"{path}: pricing.monthly must be a non-negative number")
+        if slug in plans:
+            raise CatalogError(f"{path}: duplicate plan slug '{slug}'")
+        plans[slug] = plan
+
+    with open(addons_file) as f:
+        categories = _require(yaml.safe_load(f), 'categories', addons_file)
+
+    addons: Dict[str, Dict] = {}
+    for category in categories:
+        for addon in category.get('items', []):
+            addon_id = _require(addon, 'id', addons_file)
+            where = f"{addons_file}: {addon_id}"
+            price = _require(addon, 'price_monthly', where)
+            if not isinstance(price, (int, float)) or price < 0:
+                raise CatalogError(f"{where}: price_monthly must be a non-negative number")
+            if addon_id in addons:
+                raise CatalogError(f"{where}: duplicate add-on id")
+            unknown = set(_require(addon, 'compatible_plans', where)) - set(plans)
+            if unknown:
+                raise CatalogError(f"{where}: unknown plans {sorted(unknown)}")
+            addons[addon_id] = dict(addon, category=category.get('slug'))
+
+    # Plans also list add-ons; the add-on side is authoritative, mismatches are reported
+    for slug, plan in plans.items():
+        listed = set(plan.get('marketplace_compatible', [])) - {'*'}
+        for addon_id in sorted(listed - set(addons)):
+            warnings.append(f"plan {slug}: marketplace_compatible lists unknown add-on '{addon_id}'")
+        for addon_id in sorted(listed & set(addons)):
+            if slug not in addons[addon_id]['compatible_plans']:
+                warnings.append(f"plan {slug}: lists '{addon_id}' but the add-on excludes it")
+
+    return Catalog(plans, addons, warnings)
+
+
+# ================================================================
+# CACHED LOADING
+# ================================================================
+
+_cached: Optional[Tuple[tuple, Catalog]] = None
+_lock = threading.Lock()
+
+
+def _signature(files: List[str]) -> tuple:
+    signature = [FORMAT_VERSION]
+    for path in files:
+        st = os.stat(path)
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def load_catalog(cache_file: str = CACHE_FILE) -> Catalog:
+    """The compiled catalog, rebuilt only when a source file changed"""
+    global _cached
+
+    plan_files = sorted(glob.glob(PLANS_GLOB))
+    signature = _signature(plan_files + [ADDONS_FILE])
+
+    with _lock:
+        if _cached and _cached[0] == signature:
+            return _cached[1]
+
+        try:
+            with open(cache_file, 'rb') as f:
+                stored_signature, catalog = pickle.load(f)
+            if stored_signature == signature:
+                _cached = (signature, catalog)
+                return catalog
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+
+        catalog = compile_catalog(plan_files, ADDONS_FILE)
+
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((signature, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            # A read-only cache dir only costs the compile on the next start
+            print(f"⚠️  Could not write catalog cache {cache_file}: {e}", file=sys.stderr)
+
+        _cached = (signature, catalog)
+        return catalog
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Validate and query the plan/add-on catalog')
+    parser.add_argument('--plan', help='Show limits and compatible add-ons for a plan')
+    parser.add_argument('--addon', help='With --plan: check a single add-on')
+    args = parser.parse_args()
+
+    try:
+        catalog = load_catalog()
+    except CatalogError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for warning in catalog.warnings:
+        print(f"⚠️  {warning}")
+
+    if args.plan and args.addon:
+        ok = catalog.can_buy(args.plan, args.addon)
+        print(f"{'✅' if ok else '❌'} {args.plan} + {args.addon}: "
+              f"{catalog.price(args.addon) if args.addon in catalog.prices else '-'} USD/mo")
+        sys.exit(0 if ok else 1)
+
+    if args.plan:
+        print(json.dumps({
+            'price': catalog.price(args.plan),
+            'limits': catalog.limits[args.plan],
+            'addons': catalog.compatible_addons(args.plan),
+        }, indent=2))
+        return
+
+    print(f"✅ {len(catalog.plan_ids)} plans, {len(catalog.addon_ids)} add-ons")
+
+
+if __name__ == '__main__':
+    main()
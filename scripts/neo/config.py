@@ -0,0 +1,25 @@
+"""
+Neo VPS shared configuration
+Paths and table names shared by the neo modules (overridable via environment)
+"""
+
+import os
+
+# Repository layout
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Runtime state (same directory track-state.sh writes to)
+STATE_DIR = os.environ.get('NEO_STATE_DIR', '/var/neo/states')
+CACHE_DIR = os.environ.get('NEO_CACHE_DIR', '/var/neo/cache')
+
+# Job socket of the resident daemon (neo.daemon)
+DAEMON_SOCKET = os.environ.get('NEO_DAEMON_SOCKET', '/var/neo/run/neod.sock')
+
+# DynamoDB tables
+INSTANCES_TABLE = os.environ.get('NEO_INSTANCES_TABLE', 'neo-instances')
+DNS_ZONES_TABLE = os.environ.get('NEO_DNS_ZONES_TABLE', 'neo-dns-zones')
+WARM_POOL_TABLE = os.environ.get('NEO_WARM_POOL_TABLE', 'neo-warm-pool')
+
+# Default AWS region
+DEFAULT_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
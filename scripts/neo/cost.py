@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Cost Engine
+Cost, price and margin for every customer in one pass
+
+One Cost Explorer query per month, grouped by the Customer tag and service,
+is cached under /var/neo/cache/cost/. Plans and add-ons per customer come
+from a paginated tag scan of every region and are priced from neo.catalog.
+Costs are laid out as per-category columns indexed by customer, and totals
+and margins are computed column-wise.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from neo import aws
+from neo.catalog import Catalog, load_catalog
+from neo.config import CACHE_DIR
+from neo.regions import REGIONS, fan_out
+
+# Cost Explorer SERVICE dimension -> summary category
+SERVICE_CATEGORIES = {
+    'Amazon Elastic Compute Cloud - Compute': 'ec2',
+    'EC2 - Other': 'ebs',
+    'Amazon Elastic Block Store': 'ebs',
+    'Amazon Relational Database Service': 'rds',
+    'AWS Data Transfer': 'data',
+}
+CATEGORIES = ('ec2', 'ebs', 'rds', 'data', 'other')
+
+# Figures Cost Explorer still marks Estimated (the open month, and a closed
+# one for some days after it ends) are re-queried after this; final ones
+# are cached for good
+OPEN_MONTH_TTL = 6 * 3600
+
+
+def month_range(month: str) -> Tuple[str, str]:
+    """'2026-02' -> ('2026-02-01', '2026-03-01')"""
+    year, mon = (int(part) for part in month.split('-'))
+    end = date(year + mon // 12, mon % 12 + 1, 1)
+    return f"{month}-01", end.isoformat()
+
+
+# ================================================================
+# COST EXPLORER
+# ================================================================
+
+def fetch_month_costs(month: str, use_cache: bool = True) -> Dict[str, Dict[str, float]]:
+    """customer -> category -> cost for one month (one grouped CE query)"""
+    cache_file = os.path.join(CACHE_DIR, 'cost', f"{month}.json")
+    start, end = month_range(month)
+    closed = end <= date.today().isoformat()
+
+    if use_cache and os.path.exists(cache_file):
+        age = time.time() - os.path.getmtime(cache_file)
+        with open(cache_file) as f:
+            cached = json.load(f)
+        # Files written before the flag are queried again once
+        if 'estimated' in cached and (not cached['estimated'] or age < OPEN_MONTH_TTL):
+            return cached['costs']
+
+    # Cost Explorer is served from us-east-1 only
+    ce = aws.client('ce', 'us-east-1')
+    costs: Dict[str, Dict[str, float]] = {}
+    estimated = not closed
+    kwargs = {
+        'TimePeriod': {'Start': start, 'End': end},
+        'Granularity': 'MONTHLY',
+        'Metrics': ['BlendedCost'],
+        'GroupBy': [
+            {'Type': 'TAG', 'Key': 'Customer'},
+            {'Type': 'DIMENSION', 'Key': 'SERVICE'},
+        ],
+    }
+
+    while True:
+        response = ce.get_cost_and_usage(**kwargs)
+        for period in response['ResultsByTime']:
+            estimated = estimated or period.get('Estimated', False)
+            for group in period['Groups']:
+                tag, service = group['Keys']
+                # Tag keys come back as "Customer$<value>"; empty means untagged
+                customer = tag.split('$', 1)[1] if '$' in tag else tag
+                if not customer:
+                    continue
+                category = SERVICE_CATEGORIES.get(service, 'other')
+                amount = float(group['Metrics']['BlendedCost']['Amount'])
+                bucket = costs.setdefault(customer, {})
+                bucket[category] = bucket.get(category, 0.0) + amount
+        if not response.get('NextPageToken'):
+            break
+        kwargs['NextPageToken'] = response['NextPageToken']
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump({'estimated': estimated, 'costs': costs}, f)
+
+    return costs
+
+
+# ================================================================
+# SUBSCRIPTIONS
+# ================================================================
+
+def region_subscriptions(region: str) -> Tuple[List[Dict[str, str]], List[Tuple[Dict[str, str], str]]]:
+    """Customer-tagged resources in one region: their tags, and (tags, instance type) per instance"""
+    resources = []
+    paginator = aws.client('resourcegroupstaggingapi', region).get_paginator('get_resources')
+    for page in paginator.paginate(TagFilters=[{'Key': 'Customer'}]):
+        for resource in page['ResourceTagMappingList']:
+            resources.append({t['Key']: t['Value'] for t in resource['Tags']})
+
+    instances = []
+    paginator = aws.client('ec2', region).get_paginator('describe_instances')
+    for page in paginator.paginate(Filters=[{'Name': 'tag-key', 'Values': ['Customer']}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+                instances.append((tags, instance['InstanceType']))
+    return resources, instances
+
+
+def fetch_subscriptions(catalog: Catalog, regions: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """customer -> {'plan': slug, 'addons': {...}} from a tag scan of every region"""
+    sweep = fan_out(region_subscriptions, regions or REGIONS)
+    for failed, error in sweep.errors.items():
+        print(f"❌ Could not scan {failed}: {error}", file=sys.stderr)
+
+    scanned = [sweep.results[region] for region in sorted(sweep.results)]
+    subscriptions: Dict[str, Dict] = {}
+    for resources, _ in scanned:
+        for tags in resources:
+            entry = subscriptions.setdefault(tags['Customer'], {'plan': None, 'addons': set()})
+            if 'Addon' in tags:
+                entry['addons'].add(tags['Addon'])
+            if tags.get('Plan') in catalog.plan_index:
+                entry['plan'] = tags['Plan']
+
+    # Instances carry no Plan tag yet; fall back to the plan's instance type
+    for _, instances in scanned:
+        for tags, instance_type in instances:
+            entry = subscriptions.setdefault(tags['Customer'], {'plan': None, 'addons': set()})
+            if not entry['plan']:
+                entry['plan'] = catalog.plan_for_instance_type(instance_type)
+
+    return subscriptions
+
+
+# ================================================================
+# MARGINS
+# ================================================================
+
+def compute_margins(costs: Dict[str, Dict[str, float]], subscriptions: Dict[str, Dict],
+                    catalog: Catalog) -> List[Dict]:
+    """Column-wise cost/price/margin for every customer"""
+    customers = sorted(set(costs) | set(subscriptions))
+    n = len(customers)
+
+    columns = {category: array('d', bytes(8 * n)) for category in CATEGORIES}
+    price = array('d', bytes(8 * n))
+
+    for i, customer in enumerate(customers):
+        for category, amount in costs.get(customer, {}).items():
+            columns[category][i] = amount
+
+        sub = subscriptions.get(customer, {})
+        items = [sub.get('plan'), *sub.get('addons', ())]
+        price[i] = sum(catalog.prices[item][0] for item in items if item in catalog.prices)
+
+    total = array('d', map(sum, zip(*(columns[c] for c in CATEGORIES)))) if n else array('d')
+    margin = array('d', (p - t for p, t in zip(price, total)))
+    margin_pct = [round(m / p * 100, 1) if p else None for m, p in zip(margin, price)]
+
+    rows = []
+    for i, customer in enumerate(customers):
+        sub = subscriptions.get(customer, {})
+        rows.append({
+            'customer': customer,
+            'plan': sub.get('plan'),
+            'addons': sorted(sub.get('addons', ())),
+            **{category: round(columns[category][i], 2) for category in CATEGORIES},
+            'total_cost': round(total[i], 2),
+            'price': round(price[i], 2),
+            'margin': round(margin[i], 2),
+            'margin_pct': margin_pct[i],
+        })
+    return rows
+
+
+def customer_margins(month: str, use_cache: bool = True) -> List[Dict]:
+    catalog = load_catalog()
+    return compute_margins(fetch_month_costs(month, use_cache), fetch_subscriptions(catalog), catalog)
+
+
+def print_summary(row: Dict):
+    print(f"Summary for {row['customer']} ({row['plan'] or 'unknown plan'}):")
+    print(f"EC2:      {row['ec2']:.2f}")
+    print(f"EBS:      {row['ebs']:.2f}")
+    print(f"RDS:      {row['rds']:.2f}")
+    print(f"Data:     {row['data']:.2f}")
+    print(f"Other:    {row['other']:.2f}")
+    print("───────────────────")
+    print(f"Total:    {row['total_cost']:.2f}")
+    print(f"Price:    {row['price']:.2f}")
+    margin_pct = f"{row['margin_pct']}%" if row['margin_pct'] is not None else 'no price'
+    print(f"Margin:   {row['margin']:.2f} ({margin_pct})")
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Per-customer cost and margin')
+    parser.add_argument('--month', default=date.today().strftime('%Y-%m'))
+    parser.add_argument('--customer', help='Only print this customer')
+    parser.add_argument('--json', action='store_true', help='Print all rows as JSON')
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    rows = customer_margins(args.month, use_cache=not args.no_cache)
+
+    if args.customer:
+        rows = [row for row in rows if row['customer'] == args.customer]
+        if not rows:
+            print(f"❌ No cost data for {args.customer} in {args.month}")
+            sys.exit(1)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print_summary(row)
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Daemon
+Resident process with warm AWS clients, serving jobs over a Unix socket
+
+Every dns-automation.py, check-server.py or create-dashboard.py run starts
+an interpreter, imports boto3, builds clients and opens fresh TLS
+connections, which often takes longer than the AWS calls themselves. The
+daemon loads those scripts once, keeps their clients, connection pools and
+the Route53 record cache warm, and runs jobs sent to its socket:
+
+  cd scripts && python3 -m neo.daemon serve &
+  python3 -m neo.daemon zone example.com 54.23.45.67 52.10.20.30 52.10.20.31
+  python3 -m neo.daemon health i-0123456789abcdef0      (or --all)
+  python3 -m neo.daemon dashboard example.com i-0123456789abcdef0 [aws_region]
+
+The client side imports nothing beyond the standard library. Each request
+is one JSON line ({"job", "args"}) answered by one JSON line with the
+result and the job's printed output. When no daemon is listening, the CLI
+runs the job in-process instead, so callers work either way.
+"""
+
+import argparse
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from neo.config import DAEMON_SOCKET
+
+MAX_REQUEST = 64 * 1024
+MAX_JOBS = 16
+CONNECT_TIMEOUT = 2.0
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+# ================================================================
+# JOBS
+# ================================================================
+
+def create_zone(domain: str, server_ip: str, ns1_ip: str, ns2_ip: Optional[str] = None) -> Dict:
+    """Hosted zone, records and neo-dns-zones entry (dns-automation.py without the propagation wait)"""
+    from neo.legacy import dns_automation
+
+    dns = dns_automation().DNSAutomation(domain, server_ip, ns1_ip, ns2_ip)
+    zone_id, nameservers = dns.create_hosted_zone()
+    change_id = dns.create_dns_records()
+    ns_results = dns.test_nameservers()
+    dns.save_to_dynamodb()
+    return {'ok': True, 'zone_id': zone_id, 'nameservers': nameservers, 'change_id': change_id,
+            'nameserver_tests': ns_results}
+
+
+def health_check(instance_id: Optional[str] = None, fleet: bool = False) -> Dict:
+    from neo.legacy import check_server
+
+    if fleet:
+        return {'ok': check_server().check_fleet()}
+    return {'ok': check_server().run_health_check(instance_id)}
+
+
+def create_dashboard(domain: str, instance_id: str, region: Optional[str] = None) -> Dict:
+    from neo.legacy import create_dashboard as dashboard_script
+
+    dashboard_script().create_customer_dashboard(domain, instance_id, region)
+    return {'ok': True, 'dashboard': f"neo-vps-{domain.replace('.', '-')}"}
+
+
+def ping() -> Dict:
+    return {'ok': True, 'pid': os.getpid()}
+
+
+JOBS: Dict[str, Callable[..., Dict]] = {
+    'zone': create_zone,
+    'health': health_check,
+    'dashboard': create_dashboard,
+    'ping': ping,
+}
+
+
+def run_job(job: str, args: Dict) -> Dict:
+    """Run one job, capturing what it prints; never raises"""
+    func = JOBS.get(job)
+    if func is None:
+        return {'ok': False, 'error': f"Unknown job: {job}", 'output': '', 'seconds': 0}
+
+    output = io.StringIO()
+    started = time.monotonic()
+    _output.capture(output)
+    try:
+        response = func(**args)
+    except SystemExit as e:
+        response = {'ok': e.code in (0, None), 'error': f"exit {e.code}"}
+    except Exception as e:
+        traceback.print_exc(file=output)
+        response = {'ok': False, 'error': str(e)}
+    finally:
+        _output.release()
+    response['output'] = output.getvalue()
+    response['seconds'] = round(time.monotonic() - started, 3)
+    return response
+
+
+class _JobOutput(io.TextIOBase):
+    """sys.stdout that sends each job thread's prints to that job's buffer
+
+    Threads a job starts itself (e.g. the per-region fan-out of a fleet
+    check) are not captured; their output goes to the daemon's log.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self, buffer: io.StringIO):
+        self.local.buffer = buffer
+
+    def release(self):
+        self.local.buffer = None
+
+    def write(self, text: str) -> int:
+        return (getattr(self.local, 'buffer', None) or self.stream).write(text)
+
+    def flush(self):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            self.stream.flush()
+
+
+_output = _JobOutput(sys.stdout)
+
+
+# ================================================================
+# SERVER
+# ================================================================
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST)
+        if not line:
+            # A liveness probe (see _listening) connects and hangs up
+            return
+        try:
+            request = json.loads(line)
+            job, args = request['job'], request.get('args') or {}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {'ok': False, 'error': f"Bad request: {e}", 'output': ''}
+        else:
+            with self.server.slots:
+                response = run_job(job, args)
+            self.server.served += 1
+            print(f"{'✅' if response['ok'] else '❌'} {job} {json.dumps(args)} ({response['seconds']}s)",
+                  file=sys.stderr)
+        try:
+            self.wfile.write(json.dumps(response, default=str).encode() + b'\n')
+        except BrokenPipeError:
+            print('⚠️  Client left before its result was sent', file=sys.stderr)
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str = DAEMON_SOCKET, max_jobs: int = MAX_JOBS):
+        self.slots = threading.BoundedSemaphore(max_jobs)
+        self.served = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            if _listening(path):
+                raise RuntimeError(f"A daemon is already listening on {path}")
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def warm_up():
+    """Load the scripts and open the connections jobs will use"""
+    from neo import aws
+    from neo.dns_cache import zone_cache
+    from neo.legacy import check_server, create_dashboard as dashboard_script, dns_automation
+    from neo.regions import account_id
+
+    for load in (dns_automation, check_server, dashboard_script):
+        load()
+    for service in ('route53', 'ec2', 'sns', 'cloudwatch'):
+        aws.client(service)
+    aws.resource('dynamodb')
+    # One real call, so the first job doesn't pay for the TLS handshake
+    account_id()
+    zone_cache.start()
+
+
+def serve(path: str = DAEMON_SOCKET, max_jobs: int = MAX_JOBS, warm: bool = True):
+    sys.stdout = _output
+    # Bind first, so a second daemon fails before warming up
+    server = Daemon(path, max_jobs)
+    if warm:
+        started = time.monotonic()
+        warm_up()
+        print(f"🔥 Warm in {time.monotonic() - started:.2f}s", file=sys.stderr)
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever(), so it can't run on this thread
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"🚀 Listening on {path} (pid {os.getpid()}, {max_jobs} concurrent jobs)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print(f"👋 Stopped after {server.served} job(s)", file=sys.stderr)
+
+
+# ================================================================
+# CLIENT
+# ================================================================
+
+def _listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+def call(job: str, args: Optional[Dict] = None, path: str = DAEMON_SOCKET) -> Dict:
+    """Send one job to the daemon and wait for its result"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError as e:
+            raise DaemonUnavailable(f"No daemon on {path}: {e}")
+        # Jobs take as long as they take
+        sock.settimeout(None)
+        sock.sendall(json.dumps({'job': job, 'args': args or {}}).encode() + b'\n')
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+        if not line:
+            raise DaemonUnavailable('Daemon closed the connection')
+        return json.loads(line)
+    finally:
+        sock.close()
+
+
+def submit(job: str, args: Dict, path: str = DAEMON_SOCKET, local: bool = True) -> Dict:
+    """call(), or the job in this process when no daemon is running (and local is allowed)"""
+    try:
+        return call(job, args, path)
+    except DaemonUnavailable as e:
+        if not local:
+            raise
+        print(f"⚠️  {e}; running {job} in-process", file=sys.stderr)
+    sys.stdout = _output
+    return run_job(job, args)
+
+
+def _job_args(args: argparse.Namespace) -> Dict:
+    if args.command == 'zone':
+        return {'domain': args.domain, 'server_ip': args.server_ip, 'ns1_ip': args.ns1_ip, 'ns2_ip': args.ns2_ip}
+    if args.command == 'health':
+        return {'fleet': True} if args.all else {'instance_id': args.instance_id}
+    if args.command == 'dashboard':
+        return {'domain': args.domain, 'instance_id': args.instance_id, 'region': args.region}
+    return {}
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Neo VPS daemon and its job client')
+    parser.add_argument('--socket', default=DAEMON_SOCKET)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    server = sub.add_parser('serve', help='Run the daemon in the foreground')
+    server.add_argument('--max-jobs', type=int, default=MAX_JOBS)
+    server.add_argument('--no-warm', action='store_true', help='Skip loading scripts and clients up front')
+
+    zone = sub.add_parser('zone', help='Create a customer DNS zone')
+    zone.add_argument('domain')
+    zone.add_argument('server_ip')
+    zone.add_argument('ns1_ip')
+    zone.add_argument('ns2_ip', nargs='?')
+
+    health = sub.add_parser('health', help='Health-check one instance, or the fleet with --all')
+    target = health.add_mutually_exclusive_group(required=True)
+    target.add_argument('instance_id', nargs='?')
+    target.add_argument('--all', action='store_true')
+
+    dashboard = sub.add_parser('dashboard', help='Create a customer CloudWatch dashboard')
+    dashboard.add_argument('domain')
+    dashboard.add_argument('instance_id')
+    dashboard.add_argument('region', nargs='?')
+
+    sub.add_parser('ping', help='Check that the daemon is up')
+
+    for job_parser in (zone, health, dashboard):
+        job_parser.add_argument('--no-local', action='store_true', help='Fail instead of running in-process')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            serve(args.socket, args.max_jobs, warm=not args.no_warm)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    try:
+        if args.command == 'ping':
+            response = call('ping', path=args.socket)
+        else:
+            response = submit(args.command, _job_args(args), args.socket, local=not args.no_local)
+    except DaemonUnavailable as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(2)
+
+    output = response.pop('output', '')
+    sys.__stdout__.write(output)
+    if not response['ok'] and response.get('error'):
+        print(f"❌ {response['error']}", file=sys.stderr)
+    print(json.dumps(response, default=str), file=sys.stderr)
+    sys.exit(0 if response['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
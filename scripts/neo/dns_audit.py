@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Neo VPS DNS Consistency Audit
+Route53 vs the custom Bind9 nameservers, for every zone, in parallel
+
+The zones are Route53's public hosted zones, joined by name with
+neo-dns-zones for their ns1/ns2 addresses; zones found on only one side,
+or whose zone_id differs between the two, are reported as mismatches.
+Route53 record sets come from neo.dns_cache, re-listed when the cached
+copy is older than its refresh interval (edits made outside neo would
+otherwise show up as drift) or always with --refresh. The same zones are
+pulled from each zone's ns1/ns2 by AXFR over TCP, many transfers at a
+time. Both sides are reduced to canonical RRsets (lower-case names
+without trailing dots, normalised rdata, sorted values) and hashed per
+RRset, so comparing a zone is a dict comparison and the report lists
+exactly which RRsets are missing, different, or differ only in TTL.
+
+SOA, DNSSEC records and Route53 alias records have no counterpart on the
+other side and are skipped; so is the apex NS set, which legitimately
+differs (awsdns vs ns1/ns2) unless --include-apex-ns is given. --port
+points every transfer at another port, e.g. a local Bind-compatible stub.
+"""
+
+import argparse
+import hashlib
+import ipaddress
+import json
+import random
+import re
+import socket
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from neo import aws
+from neo.config import DNS_ZONES_TABLE
+from neo.dns_cache import zone_cache
+from neo.store import dns_zones
+
+DNS_PORT = 53
+AXFR_TIMEOUT = 30.0
+MAX_WORKERS = 64
+
+# Record types compared; others (SOA, DNSSEC) differ by design
+SKIPPED_TYPES = {'SOA', 'RRSIG', 'NSEC', 'NSEC3', 'NSEC3PARAM', 'DNSKEY', 'DS', 'CDS', 'CDNSKEY', 'TSIG'}
+NAME_TYPES = {'NS', 'CNAME', 'PTR', 'DNAME'}
+
+TYPE_NAMES = {1: 'A', 2: 'NS', 5: 'CNAME', 6: 'SOA', 12: 'PTR', 15: 'MX', 16: 'TXT', 28: 'AAAA', 33: 'SRV',
+              39: 'DNAME', 43: 'DS', 46: 'RRSIG', 47: 'NSEC', 48: 'DNSKEY', 50: 'NSEC3', 51: 'NSEC3PARAM',
+              257: 'CAA'}
+QTYPE_AXFR = 252
+QCLASS_IN = 1
+
+RRsets = Dict[Tuple[str, str], Tuple[int, Tuple[str, ...]]]      # (name, type) -> (ttl, values)
+
+
+class TransferError(Exception):
+    pass
+
+
+# ================================================================
+# CANONICAL FORM
+# ================================================================
+
+def _name(name: str) -> str:
+    """Lower-case, no trailing dot, \\DDD escapes decoded"""
+    name = re.sub(r'\\(\d{3})', lambda m: chr(int(m.group(1), 8)), name)
+    return name.rstrip('.').lower()
+
+
+def _txt_strings(value: str) -> List[str]:
+    """Character-strings of a quoted TXT value ("a" "b"), unescaped"""
+    strings = []
+    for quoted in re.findall(r'"((?:[^"\\]|\\.)*)"', value) or [value]:
+        strings.append(re.sub(r'\\(\d{3}|.)', lambda m: chr(int(m.group(1), 8)) if m.group(1).isdigit()
+                              else m.group(1), quoted))
+    return strings
+
+
+def canonical_value(rtype: str, value: str) -> str:
+    if rtype == 'TXT':
+        return json.dumps(_txt_strings(value))
+    if rtype == 'AAAA':
+        return ipaddress.IPv6Address(value).compressed
+    if rtype in NAME_TYPES:
+        return _name(value)
+    if rtype in ('MX', 'SRV'):
+        *numbers, target = value.split()
+        return ' '.join(numbers + [_name(target)])
+    if rtype == 'CAA':
+        flags, tag, rest = value.split(None, 2)
+        return ' '.join((str(int(flags)), tag.lower(), rest.strip('"')))
+    return ' '.join(value.split()).lower()
+
+
+def rrset_hash(name: str, rtype: str, ttl: int, values: Tuple[str, ...]) -> str:
+    return hashlib.sha1(f"{name}|{rtype}|{ttl}|{chr(10).join(values)}".encode()).hexdigest()[:16]
+
+
+def _keep(zone: str, name: str, rtype: str, include_apex_ns: bool) -> bool:
+    if rtype in SKIPPED_TYPES:
+        return False
+    return include_apex_ns or not (rtype == 'NS' and name == zone)
+
+
+def route53_rrsets(zone: str, rrsets: List[Dict], include_apex_ns: bool = False) -> Tuple[RRsets, int]:
+    """Canonical RRsets from list_resource_record_sets output; also the alias count"""
+    result: RRsets = {}
+    aliases = 0
+    for rrset in rrsets:
+        name, rtype = _name(rrset['Name']), rrset['Type']
+        if 'AliasTarget' in rrset:
+            aliases += 1
+            continue
+        if not _keep(zone, name, rtype, include_apex_ns):
+            continue
+        values = tuple(sorted(canonical_value(rtype, r['Value']) for r in rrset.get('ResourceRecords', [])))
+        result[(name, rtype)] = (int(rrset.get('TTL', 0)), values)
+    return result, aliases
+
+
+# ================================================================
+# AXFR
+# ================================================================
+
+def _read_name(message: bytes, offset: int) -> Tuple[str, int]:
+    labels = []
+    end = None
+    for _ in range(128):
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            # Compression pointer
+            if end is None:
+                end = offset + 2
+            offset = (length & 0x3F) << 8 | message[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return '.'.join(labels).lower(), end if end is not None else offset
+        labels.append(message[offset:offset + length].decode('latin-1'))
+        offset += length
+    raise TransferError('Name compression loop')
+
+
+def _character_strings(rdata: bytes) -> List[str]:
+    strings, offset = [], 0
+    while offset < len(rdata):
+        length = rdata[offset]
+        strings.append(rdata[offset + 1:offset + 1 + length].decode('latin-1'))
+        offset += 1 + length
+    return strings
+
+
+def _rdata(message: bytes, offset: int, length: int, rtype: str) -> str:
+    """Canonical text of one record's rdata"""
+    rdata = message[offset:offset + length]
+    if rtype == 'A':
+        return socket.inet_ntoa(rdata)
+    if rtype == 'AAAA':
+        return ipaddress.IPv6Address(rdata).compressed
+    if rtype in NAME_TYPES:
+        return _read_name(message, offset)[0]
+    if rtype == 'MX':
+        return f"{struct.unpack('!H', rdata[:2])[0]} {_read_name(message, offset + 2)[0]}"
+    if rtype == 'SRV':
+        priority, weight, port = struct.unpack('!HHH', rdata[:6])
+        return f"{priority} {weight} {port} {_read_name(message, offset + 6)[0]}"
+    if rtype == 'TXT':
+        return json.dumps(_character_strings(rdata))
+    if rtype == 'CAA':
+        tag_length = rdata[1]
+        tag = rdata[2:2 + tag_length].decode('latin-1').lower()
+        return f"{rdata[0]} {tag} {rdata[2 + tag_length:].decode('latin-1')}"
+    if rtype == 'SOA':
+        return _read_name(message, offset)[0]
+    return f"\\# {length} {rdata.hex()}"
+
+
+def _query(zone: str) -> bytes:
+    qname = b''.join(bytes([len(label)]) + label.encode() for label in zone.split('.') if label) + b'\x00'
+    message = struct.pack('!HHHHHH', random.getrandbits(16), 0, 1, 0, 0, 0) + qname + \
+        struct.pack('!HH', QTYPE_AXFR, QCLASS_IN)
+    return struct.pack('!H', len(message)) + message
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise TransferError('Connection closed mid-transfer')
+        data += chunk
+    return data
+
+
+def axfr(zone: str, server: str, port: int = DNS_PORT, timeout: float = AXFR_TIMEOUT) -> List[Tuple[str, str, int, str]]:
+    """(name, type, ttl, canonical value) for every record of a zone transfer"""
+    records = []
+    soa_seen = 0
+    with socket.create_connection((server, port), timeout=timeout) as sock:
+        sock.sendall(_query(zone))
+        while soa_seen < 2:
+            message = _recv_exact(sock, struct.unpack('!H', _recv_exact(sock, 2))[0])
+            _, flags, qdcount, ancount, _, _ = struct.unpack('!HHHHHH', message[:12])
+            if flags & 0xF:
+                raise TransferError(f"Transfer refused (rcode {flags & 0xF})")
+            offset = 12
+            for _ in range(qdcount):
+                offset = _read_name(message, offset)[1] + 4
+            for _ in range(ancount):
+                name, offset = _read_name(message, offset)
+                type_code, _, ttl, length = struct.unpack('!HHIH', message[offset:offset + 10])
+                offset += 10
+                rtype = TYPE_NAMES.get(type_code, f"TYPE{type_code}")
+                if rtype == 'SOA':
+                    soa_seen += 1
+                records.append((name, rtype, ttl, _rdata(message, offset, length, rtype)))
+                offset += length
+            if not ancount:
+                raise TransferError('Empty transfer')
+    return records
+
+
+def nameserver_rrsets(zone: str, records: List[Tuple[str, str, int, str]], include_apex_ns: bool = False) -> RRsets:
+    grouped: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+    for name, rtype, ttl, value in records:
+        if not _keep(zone, name, rtype, include_apex_ns):
+            continue
+        entry = grouped.setdefault((name, rtype), (ttl, []))
+        if value not in entry[1]:
+            entry[1].append(value)
+    return {key: (ttl, tuple(sorted(values))) for key, (ttl, values) in grouped.items()}
+
+
+# ================================================================
+# AUDIT
+# ================================================================
+
+class Zone(NamedTuple):
+    domain: str
+    zone_id: str
+    nameservers: Tuple[str, ...]
+
+
+def compare(expected: RRsets, actual: RRsets) -> List[Dict]:
+    """Differences between Route53 (expected) and a nameserver (actual)"""
+    differences = []
+    for key in sorted(set(expected) | set(actual)):
+        name, rtype = key
+        if key not in actual:
+            differences.append({'name': name, 'type': rtype, 'issue': 'missing_on_nameserver',
+                                'route53': list(expected[key][1])})
+        elif key not in expected:
+            differences.append({'name': name, 'type': rtype, 'issue': 'missing_in_route53',
+                                'nameserver': list(actual[key][1])})
+        elif expected[key][1] != actual[key][1]:
+            differences.append({'name': name, 'type': rtype, 'issue': 'values_differ',
+                                'route53': list(expected[key][1]), 'nameserver': list(actual[key][1])})
+        elif expected[key][0] != actual[key][0]:
+            differences.append({'name': name, 'type': rtype, 'issue': 'ttl_differs',
+                                'route53': expected[key][0], 'nameserver': actual[key][0]})
+    return differences
+
+
+def zone_digest(rrsets: RRsets) -> str:
+    hashes = sorted(rrset_hash(name, rtype, ttl, values) for (name, rtype), (ttl, values) in rrsets.items())
+    return hashlib.sha1(''.join(hashes).encode()).hexdigest()[:16]
+
+
+def audit_zone(zone: Zone, port: int = DNS_PORT, include_apex_ns: bool = False, refresh: bool = False) -> Dict:
+    """Compare one zone's Route53 records against each of its nameservers"""
+    started = time.monotonic()
+    result = {'domain': zone.domain, 'zone_id': zone.zone_id, 'status': 'consistent', 'nameservers': {}}
+    try:
+        if refresh:
+            entry = zone_cache.refresh(zone.zone_id)
+        else:
+            entry = zone_cache.get(zone.zone_id, max_age=zone_cache.refresh_interval)
+    except Exception as e:
+        result.update(status='error', error=f"Route53: {e}")
+        return result
+    expected, aliases = route53_rrsets(zone.domain, entry['rrsets'], include_apex_ns)
+    result['route53_digest'] = zone_digest(expected)
+    result['aliases_skipped'] = aliases
+
+    for server in zone.nameservers:
+        try:
+            actual = nameserver_rrsets(zone.domain, axfr(zone.domain, server, port), include_apex_ns)
+        except (OSError, TransferError) as e:
+            result['nameservers'][server] = {'status': 'error', 'error': str(e)}
+            result['status'] = 'error'
+            continue
+        digest = zone_digest(actual)
+        if digest == result['route53_digest']:
+            result['nameservers'][server] = {'status': 'consistent', 'digest': digest}
+            continue
+        result['nameservers'][server] = {'status': 'drift', 'digest': digest,
+                                         'differences': compare(expected, actual)}
+        if result['status'] == 'consistent':
+            result['status'] = 'drift'
+
+    result['seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def hosted_zones() -> Dict[str, List[str]]:
+    """Public hosted zone name -> zone ids, listed from Route53"""
+    zones: Dict[str, List[str]] = {}
+    for page in aws.client('route53').get_paginator('list_hosted_zones').paginate():
+        for zone in page['HostedZones']:
+            if not zone.get('Config', {}).get('PrivateZone'):
+                zones.setdefault(_name(zone['Name']), []).append(zone['Id'].split('/')[-1])
+    return zones
+
+
+def table_zones(domains: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """domain -> neo-dns-zones row (zone_id, ns1_ip, ns2_ip)"""
+    if domains:
+        # Batched point reads rather than a scan of every zone
+        return dns_zones.get_many(domains, ('zone_id', 'ns1_ip', 'ns2_ip'))
+
+    rows = {}
+    table = aws.resource('dynamodb').Table(DNS_ZONES_TABLE)
+    kwargs = {'ProjectionExpression': '#domain, zone_id, ns1_ip, ns2_ip',
+              'ExpressionAttributeNames': {'#domain': 'domain'}}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response['Items']:
+            rows[item['domain']] = item
+        if 'LastEvaluatedKey' not in response:
+            return rows
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def load_zones(domains: Optional[List[str]] = None) -> Tuple[List[Zone], List[Dict]]:
+    """Route53 zones with their nameserver IPs from neo-dns-zones, and where the two disagree"""
+    domains = [_name(d) for d in domains] if domains else None
+    route53 = hosted_zones()
+    rows = table_zones(domains)
+
+    zones, mismatches = [], []
+    for domain in sorted(domains or set(route53) | set(rows)):
+        zone_ids, item = route53.get(domain, []), rows.get(domain)
+        if not zone_ids:
+            mismatches.append({'domain': domain, 'issue': 'missing_in_route53',
+                               'table_zone_id': item.get('zone_id') if item else None})
+            continue
+        if item is None:
+            mismatches.append({'domain': domain, 'issue': 'missing_in_table', 'route53_zone_ids': zone_ids})
+            continue
+
+        zone_id = item.get('zone_id')
+        if zone_id not in zone_ids:
+            mismatches.append({'domain': domain, 'issue': 'zone_id_differs', 'table_zone_id': zone_id,
+                               'route53_zone_ids': zone_ids})
+            if len(zone_ids) > 1:
+                # No telling which one the nameservers are meant to mirror
+                continue
+            zone_id = zone_ids[0]
+
+        servers = tuple(ip for ip in (item.get('ns1_ip'), item.get('ns2_ip')) if ip)
+        if not servers:
+            mismatches.append({'domain': domain, 'issue': 'no_nameservers', 'zone_id': zone_id})
+            continue
+        zones.append(Zone(domain, zone_id, servers))
+    return zones, mismatches
+
+
+def run_audit(zones: List[Zone], port: int = DNS_PORT, workers: int = MAX_WORKERS,
+              include_apex_ns: bool = False, refresh: bool = False, mismatches: Optional[List[Dict]] = None) -> Dict:
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dns-audit') as pool:
+        results = list(pool.map(lambda z: audit_zone(z, port, include_apex_ns, refresh), zones))
+
+    summary = {status: sum(1 for r in results if r['status'] == status)
+               for status in ('consistent', 'drift', 'error')}
+    return {
+        'zones': len(results),
+        **summary,
+        'mismatched': len(mismatches or []),
+        'seconds': round(time.monotonic() - started, 2),
+        'results': [r for r in results if r['status'] != 'consistent'],
+        'mismatches': mismatches or [],
+    }
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Audit Route53 against the custom nameservers')
+    parser.add_argument('domains', nargs='*',
+                        help='Only these domains (default: every zone in Route53 or neo-dns-zones)')
+    parser.add_argument('--port', type=int, default=DNS_PORT, help='Nameserver port (e.g. a local stub)')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--include-apex-ns', action='store_true')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-list Route53 even where the cached copy is recent')
+    args = parser.parse_args()
+
+    zones, mismatches = load_zones(args.domains)
+    print(f"🔍 Auditing {len(zones)} zone(s) with {args.workers} workers", file=sys.stderr)
+    report = run_audit(zones, args.port, args.workers, args.include_apex_ns, args.refresh, mismatches)
+    print(json.dumps(report, indent=2))
+    clean = not report['drift'] and not report['error'] and not report['mismatched']
+    print(f"{'✅' if clean else '⚠️ '} {report['consistent']} consistent, {report['drift']} drifted, "
+          f"{report['error']} failed, {report['mismatched']} table/Route53 mismatches in {report['seconds']}s",
+          file=sys.stderr)
+    sys.exit(0 if clean else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Route53 Record Cache
+Per-zone record sets kept locally so reads never hit Route53
+
+Each zone's ResourceRecordSets are stored as JSON under
+/var/neo/cache/dns/<zone_id>.json and shared by every process on the host
+(the API workers, DNSAutomation, the CLI). Writers that submit a change
+apply the same change to the cached copy (write-through), so the cache
+stays current without re-listing the zone; a background refresher re-lists
+recently used zones every few minutes to pick up edits made elsewhere.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from neo import aws
+from neo.config import CACHE_DIR
+
+
+def _rrset_key(rrset: Dict):
+    return rrset['Name'].rstrip('.').lower(), rrset['Type'], rrset.get('SetIdentifier')
+
+
+def _digest(rrsets: List[Dict]) -> str:
+    canonical = json.dumps(sorted(rrsets, key=lambda r: str(_rrset_key(r))), sort_keys=True, default=str)
+    return 'h:' + hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def list_rrsets(zone_id: str) -> List[Dict]:
+    """Every record set in a zone (paginated list_resource_record_sets)"""
+    route53 = aws.client('route53')
+    rrsets = []
+    kwargs = {'HostedZoneId': zone_id}
+
+    while True:
+        response = route53.list_resource_record_sets(**kwargs)
+        rrsets.extend(response['ResourceRecordSets'])
+        if not response.get('IsTruncated'):
+            return rrsets
+        kwargs['StartRecordName'] = response['NextRecordName']
+        kwargs['StartRecordType'] = response['NextRecordType']
+        if 'NextRecordIdentifier' in response:
+            kwargs['StartRecordIdentifier'] = response['NextRecordIdentifier']
+        else:
+            kwargs.pop('StartRecordIdentifier', None)
+
+
+def apply_to_rrsets(rrsets: List[Dict], changes: List[Dict]) -> List[Dict]:
+    """Route53 ChangeBatch semantics applied to a local copy"""
+    by_key = {_rrset_key(r): r for r in rrsets}
+    for change in changes:
+        rrset = change['ResourceRecordSet']
+        key = _rrset_key(rrset)
+        if change['Action'] == 'DELETE':
+            by_key.pop(key, None)
+        else:
+            by_key[key] = dict(rrset, Name=rrset['Name'].rstrip('.') + '.')
+    return list(by_key.values())
+
+
+class ZoneRecordCache:
+    """zone_id -> {'version', 'fetched_at', 'rrsets'}, shared through files"""
+
+    def __init__(self, cache_dir: str = os.path.join(CACHE_DIR, 'dns'), refresh_interval: float = 300,
+                 idle_after: float = 3600):
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.idle_after = idle_after
+        self.memory: Dict[str, tuple] = {}        # zone_id -> (file identity, entry)
+        self.last_used: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def _path(self, zone_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{zone_id}.json")
+
+    @contextmanager
+    def _zone_lock(self, zone_id: str):
+        """Serialise read-modify-write of one zone across processes"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._path(zone_id) + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _identity(path: str) -> tuple:
+        # Every write replaces the file, so the inode changes even within one mtime tick
+        st = os.stat(path)
+        return st.st_ino, st.st_mtime_ns
+
+    def _read(self, zone_id: str) -> Optional[Dict]:
+        path = self._path(zone_id)
+        try:
+            identity = self._identity(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.memory.pop(zone_id, None)
+            return None
+
+        with self.lock:
+            cached = self.memory.get(zone_id)
+        if cached and cached[0] == identity:
+            return cached[1]
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        with self.lock:
+            self.memory[zone_id] = (identity, entry)
+        return entry
+
+    def _write(self, zone_id: str, entry: Dict):
+        path = self._path(zone_id)
+        entry['updated_at'] = time.time()
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_file, path)
+        with self.lock:
+            self.memory[zone_id] = (self._identity(path), entry)
+
+    def get(self, zone_id: str, max_age: Optional[float] = None) -> Dict:
+        """Cached entry for a zone; Route53 is read on a miss, or when the copy was listed over max_age seconds ago"""
+        self.last_used[zone_id] = time.time()
+        entry = self._read(zone_id)
+        if entry is None or (max_age is not None and time.time() - entry['fetched_at'] > max_age):
+            entry = self.refresh(zone_id)
+        return entry
+
+    def rrsets(self, zone_id: str) -> List[Dict]:
+        return self.get(zone_id)['rrsets']
+
+    def refresh(self, zone_id: str) -> Dict:
+        """Re-list the zone; the version only moves if something changed"""
+        started = time.time()
+        rrsets = list_rrsets(zone_id)
+        digest = _digest(rrsets)
+        with self._zone_lock(zone_id):
+            previous = self._read(zone_id)
+            if previous and previous.get('updated_at', 0) > started:
+                # A write-through landed while we were listing; it is newer
+                return previous
+            version = previous['version'] if previous and previous.get('digest') == digest else digest
+            entry = {'zone_id': zone_id, 'version': version, 'digest': digest,
+                     'fetched_at': time.time(), 'rrsets': rrsets}
+            self._write(zone_id, entry)
+        return entry
+
+    def apply_changes(self, zone_id: str, changes: List[Dict], change_id: str):
+        """Write-through for a submitted ChangeBatch; the change ID becomes the version"""
+        with self._zone_lock(zone_id):
+            entry = self._read(zone_id)
+            if entry is None:
+                # Never read here; the first get() lists it
+                return
+            rrsets = apply_to_rrsets(entry['rrsets'], changes)
+            self._write(zone_id, dict(entry, rrsets=rrsets, version=change_id, digest=_digest(rrsets)))
+
+    def invalidate(self, zone_id: str):
+        with self._zone_lock(zone_id):
+            try:
+                os.remove(self._path(zone_id))
+            except FileNotFoundError:
+                pass
+            with self.lock:
+                self.memory.pop(zone_id, None)
+
+    # ================================================================
+    # BACKGROUND REFRESH
+    # ================================================================
+
+    def refresh_stale(self) -> int:
+        """Re-list recently used zones whose copy is older than the interval"""
+        now = time.time()
+        refreshed = 0
+        for zone_id, used in list(self.last_used.items()):
+            if now - used > self.idle_after:
+                del self.last_used[zone_id]
+                continue
+            entry = self._read(zone_id)
+            if entry and now - entry['fetched_at'] < self.refresh_interval:
+                continue
+            try:
+                self.refresh(zone_id)
+                refreshed += 1
+            except Exception as e:
+                print(f"⚠️  DNS cache refresh failed for {zone_id}: {e}")
+        return refreshed
+
+    def start(self, tick: float = 30):
+        if self.thread:
+            return
+        self.stop_event.clear()
+
+        def run():
+            while not self.stop_event.wait(tick):
+                self.refresh_stale()
+
+        self.thread = threading.Thread(target=run, name='dns-cache-refresh', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+
+zone_cache = ZoneRecordCache()
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Inspect or refresh the Route53 record cache')
+    parser.add_argument('zone_id')
+    parser.add_argument('--refresh', action='store_true', help='Re-list the zone from Route53')
+    parser.add_argument('--invalidate', action='store_true', help='Drop the cached copy')
+    args = parser.parse_args()
+
+    if args.invalidate:
+        zone_cache.invalidate(args.zone_id)
+        print(f"🗑️  Dropped cached records for {args.zone_id}")
+        return
+
+    entry = zone_cache.refresh(args.zone_id) if args.refresh else zone_cache.get(args.zone_id)
+    print(f"📦 {args.zone_id}: {len(entry['rrsets'])} record sets, version {entry['version']}")
+    for rrset in entry['rrsets']:
+        values = [r['Value'] for r in rrset.get('ResourceRecords', [])] or \
+                 [rrset.get('AliasTarget', {}).get('DNSName', '')]
+        print(f"  {rrset['Name']:<40} {rrset['Type']:<6} {', '.join(values)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Health Record Codec
+Compact health_status format for neo-instances, with decoder and migration
+
+check-server.py used to store every check's details on every run (for EC2,
+the repr of the whole describe_instance_status response) with ISO
+timestamps in nested maps, roughly 1 KB per instance per check. The compact
+record is a few dozen bytes:
+
+  {'v': 2, 'ts': 1760880000, 'ok': 0b111, 'ms': [85, 310, 12]}
+
+`ok` has one bit per check in CHECKS order, `ms` the latencies, and only a
+failing run adds `r` (reason codes, see REASONS) and `d` (detail text of
+the failed checks, truncated). decode() turns either format into the same
+readable dict, and `migrate` rewrites existing items in place.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional
+
+from neo import aws
+from neo.config import INSTANCES_TABLE
+
+FORMAT_VERSION = 2
+CHECKS = ('ec2_status', 'panel_http', 'dns_resolution')
+ALL_OK = (1 << len(CHECKS)) - 1
+MAX_DETAIL = 512
+
+# Reason codes; the index is what is stored
+REASONS = (
+    'ok',
+    'not_found',
+    'instance_impaired',
+    'system_impaired',
+    'timeout',
+    'connection_error',
+    'bad_status',
+    'no_answer',
+    'error',
+    'not_applicable',
+)
+OK, NOT_FOUND, INSTANCE_IMPAIRED, SYSTEM_IMPAIRED, TIMEOUT, CONNECTION_ERROR, BAD_STATUS, NO_ANSWER, \
+    ERROR, NOT_APPLICABLE = range(len(REASONS))
+
+
+class CheckResult(NamedTuple):
+    ok: bool
+    reason: int = OK
+    latency_ms: int = 0
+    details: str = ''
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _epoch(iso: str) -> int:
+    try:
+        return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def encode(results: Dict[str, CheckResult], timestamp: Optional[float] = None) -> Dict:
+    """Compact record for one health check run"""
+    mask = 0
+    for bit, name in enumerate(CHECKS):
+        if results[name].ok:
+            mask |= 1 << bit
+
+    record = {
+        'v': FORMAT_VERSION,
+        'ts': int(timestamp if timestamp is not None else time.time()),
+        'ok': mask,
+        'ms': [int(results[name].latency_ms) for name in CHECKS],
+    }
+    if mask != ALL_OK:
+        record['r'] = [results[name].reason for name in CHECKS]
+        record['d'] = {name: str(results[name].details)[:MAX_DETAIL]
+                       for name in CHECKS if not results[name].ok and results[name].details}
+    return record
+
+
+def is_compact(record: Optional[Dict]) -> bool:
+    return bool(record) and 'v' in record
+
+
+def is_healthy(record: Optional[Dict]) -> bool:
+    if not record:
+        return False
+    if is_compact(record):
+        return int(record['ok']) == ALL_OK
+    return record.get('overall') == 'healthy'
+
+
+def decode(record: Optional[Dict]) -> Optional[Dict]:
+    """Readable form of either format, as returned by the API"""
+    if not record:
+        return None
+
+    if not is_compact(record):
+        # Original format: {'timestamp', 'overall', 'checks': {name: {'ok', 'details'}}}
+        checks = {name: {'ok': bool(check.get('ok')), 'reason': 'ok' if check.get('ok') else 'error',
+                         'latency_ms': None, 'details': check.get('details')}
+                  for name, check in record.get('checks', {}).items()}
+        return {'timestamp': record.get('timestamp'), 'overall': record.get('overall'), 'checks': checks}
+
+    mask = int(record['ok'])
+    reasons = record.get('r') or [OK] * len(CHECKS)
+    latencies = record.get('ms') or [None] * len(CHECKS)
+    details = record.get('d', {})
+    checks = {}
+    for bit, name in enumerate(CHECKS):
+        ok = bool(mask >> bit & 1)
+        reason = int(reasons[bit])
+        checks[name] = {
+            'ok': ok,
+            'reason': REASONS[reason] if reason < len(REASONS) else str(reason),
+            'latency_ms': int(latencies[bit]) if latencies[bit] is not None else None,
+            'details': details.get(name),
+        }
+    return {
+        'timestamp': _iso(int(record['ts'])),
+        'overall': 'healthy' if mask == ALL_OK else 'unhealthy',
+        'checks': checks,
+    }
+
+
+def from_legacy(record: Dict) -> Dict:
+    """Compact record for an item written in the original format"""
+    checks = record.get('checks', {})
+    results = {}
+    for name in CHECKS:
+        check = checks.get(name, {})
+        ok = bool(check.get('ok'))
+        results[name] = CheckResult(ok, OK if ok else ERROR, 0, '' if ok else str(check.get('details', '')))
+    compact = encode(results, _epoch(record.get('timestamp', '')))
+    # Latencies were never recorded
+    del compact['ms']
+    return compact
+
+
+# ================================================================
+# MIGRATION
+# ================================================================
+
+def migrate(dry_run: bool = False, table_name: str = INSTANCES_TABLE) -> Dict[str, int]:
+    """Rewrite original-format health_status items; safe to re-run or interrupt"""
+    table = aws.resource('dynamodb').Table(table_name)
+    kwargs = {
+        'ProjectionExpression': 'instance_id, health_status',
+        'FilterExpression': 'attribute_exists(health_status.checks)',
+    }
+    counts = {'migrated': 0, 'skipped': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    while True:
+        response = table.scan(**kwargs)
+        for item in response['Items']:
+            old = item['health_status']
+            new = from_legacy(old)
+            counts['bytes_before'] += len(json.dumps(old, default=str))
+            counts['bytes_after'] += len(json.dumps(new))
+            if dry_run:
+                counts['migrated'] += 1
+                continue
+            try:
+                # A check that ran since the scan already wrote the compact form
+                table.update_item(
+                    Key={'instance_id': item['instance_id']},
+                    UpdateExpression='SET health_status = :health',
+                    ConditionExpression='attribute_exists(health_status.checks)',
+                    ExpressionAttributeValues={':health': new},
+                )
+                counts['migrated'] += 1
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                counts['skipped'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return counts
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Compact health_status records in neo-instances')
+    sub = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = sub.add_parser('migrate', help='Rewrite original-format records')
+    migrate_parser.add_argument('--dry-run', action='store_true')
+    show = sub.add_parser('show', help='Decode one instance\'s health record')
+    show.add_argument('instance_id')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        counts = migrate(args.dry_run)
+        verb = 'Would migrate' if args.dry_run else 'Migrated'
+        print(f"🗜️  {verb} {counts['migrated']} record(s), {counts['skipped']} already current; "
+              f"{counts['bytes_before']} -> {counts['bytes_after']} bytes")
+
+    elif args.command == 'show':
+        item = aws.resource('dynamodb').Table(INSTANCES_TABLE).get_item(
+            Key={'instance_id': args.instance_id}, ProjectionExpression='health_status').get('Item')
+        if not item:
+            print(f"❌ No health record for {args.instance_id}")
+            sys.exit(1)
+        print(json.dumps(decode(item['health_status']), indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Inventory Cache
+Compact, incrementally synced view of the neo-instances table
+
+The fleet is loaded once with a projected Scan, then kept current by reading
+the table's DynamoDB Stream from the last processed sequence number per
+shard. The view and the stream positions are persisted to
+/var/neo/cache/inventory.json, so each cron-driven monitor cycle only reads
+the changes since the previous one. Tables without a stream fall back to a
+full reload once `full_reload_interval` has passed.
+
+Each instance is an Instance record rather than an item dict: __slots__
+instead of a per-object dict, one shared copy of every panel, status,
+region and plan string, and the IPv4 address as an int. Records still
+answer item['domain'] and item.get('aws_region'), so they can be passed
+wherever an item dict was. `--benchmark N` compares the memory of both
+forms.
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from botocore.exceptions import ClientError
+
+from neo import aws
+from neo.config import CACHE_DIR, DEFAULT_REGION, INSTANCES_TABLE
+
+# Attributes kept per instance, in record (and snapshot row) order
+FIELDS = ('domain', 'public_ip', 'panel', 'status', 'aws_region', 'plan')
+
+PROJECTION = 'instance_id, #domain, public_ip, panel, #status, aws_region, #plan'
+PROJECTION_NAMES = {'#domain': 'domain', '#status': 'status', '#plan': 'plan'}
+
+# An open shard can return empty pages with records still behind them; this
+# many in a row end a shard's read, and the iterator reached is kept (shard
+# iterators expire after 15 minutes) so the next sync carries on from there
+EMPTY_PAGES_PER_SHARD = 5
+ITERATOR_TTL = 14 * 60
+
+
+def pack_ip(ip: Union[str, int]) -> Union[str, int]:
+    """IPv4 address as an int; anything else (blank, IPv6) is kept as given"""
+    if isinstance(ip, int):
+        return ip
+    try:
+        return int(ipaddress.IPv4Address(ip))
+    except ValueError:
+        return ip or ''
+
+
+def unpack_ip(ip: Union[str, int]) -> str:
+    return str(ipaddress.IPv4Address(ip)) if isinstance(ip, int) else ip
+
+
+class Instance:
+    """One inventory row; reads like the item dict it replaces"""
+
+    __slots__ = ('instance_id', 'domain', '_ip', 'panel', 'status', 'aws_region', 'plan')
+
+    def __init__(self, instance_id: str, domain: str = '', public_ip: Union[str, int] = '', panel: str = '',
+                 status: str = '', aws_region: str = '', plan: str = ''):
+        self.instance_id = instance_id
+        self.domain = domain
+        self._ip = pack_ip(public_ip)
+        self.panel = sys.intern(panel or '')
+        self.status = sys.intern(status or '')
+        self.aws_region = sys.intern(aws_region or '')
+        self.plan = sys.intern(plan or '')
+
+    @classmethod
+    def from_item(cls, item: Dict) -> 'Instance':
+        return cls(item['instance_id'], *(item.get(field, '') for field in FIELDS))
+
+    @property
+    def public_ip(self) -> str:
+        return unpack_ip(self._ip)
+
+    def __getitem__(self, key: str):
+        if key != 'instance_id' and key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key == 'instance_id' or key in FIELDS
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+    def row(self) -> List:
+        """Snapshot form: FIELDS order, IP still packed"""
+        return [self.domain, self._ip, self.panel, self.status, self.aws_region, self.plan]
+
+    def as_dict(self) -> Dict:
+        return dict(zip(FIELDS, (self.domain, self.public_ip, self.panel, self.status, self.aws_region,
+                                 self.plan)), instance_id=self.instance_id)
+
+    def __repr__(self):
+        return f"Instance({self.as_dict()!r})"
+
+
+def _from_stream_image(image: Dict) -> Dict:
+    """Flatten a stream NewImage (typed attribute values) to plain strings"""
+    return {name: next(iter(value.values())) for name, value in image.items()}
+
+
+class InventoryCache:
+    """instance_id -> Instance, persisted between runs"""
+
+    def __init__(self, path: Optional[str] = None, table_name: str = INSTANCES_TABLE,
+                 region: Optional[str] = None, full_reload_interval: float = 3600):
+        self.path = path or os.path.join(CACHE_DIR, 'inventory.json')
+        self.table_name = table_name
+        self.region = region
+        self.full_reload_interval = full_reload_interval
+        self.items: Dict[str, Instance] = {}
+        self.shards: Dict[str, str] = {}
+        self.iterators: Dict[str, list] = {}      # shard_id -> [iterator, obtained at]
+        self.stream_arn: Optional[str] = None
+        self.loaded_at = 0.0
+        self._load_snapshot()
+
+    # ================================================================
+    # SNAPSHOT
+    # ================================================================
+
+    def _load_snapshot(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        # A snapshot of another table, or written with other FIELDS, is reloaded
+        if data.get('table') != self.table_name or data.get('fields') != list(FIELDS):
+            return
+
+        self.items = {k: Instance(k, *row) for k, row in data['items'].items()}
+        self.shards = data.get('shards', {})
+        self.iterators = data.get('iterators', {})
+        self.stream_arn = data.get('stream_arn')
+        self.loaded_at = data.get('loaded_at', 0.0)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'table': self.table_name,
+                'fields': FIELDS,
+                'stream_arn': self.stream_arn,
+                'shards': self.shards,
+                'iterators': self.iterators,
+                'loaded_at': self.loaded_at,
+                'items': {k: instance.row() for k, instance in self.items.items()},
+            }, f, separators=(',', ':'))
+        os.replace(tmp_file, self.path)
+
+    # ================================================================
+    # SYNC
+    # ================================================================
+
+    def full_load(self):
+        """Projected Scan of the whole table; resets stream positions"""
+        table = aws.resource('dynamodb', self.region).Table(self.table_name)
+        self.stream_arn = table.latest_stream_arn
+        # Replaying the stream from its trim horizon after the scan is safe:
+        # records apply in order, so every key ends on its newest image
+        self.shards = {}
+        self.iterators = {}
+
+        items = {}
+        kwargs = {'ProjectionExpression': PROJECTION, 'ExpressionAttributeNames': PROJECTION_NAMES}
+        while True:
+            response = table.scan(**kwargs)
+            for item in response['Items']:
+                items[item['instance_id']] = Instance.from_item(item)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        self.items = items
+        self.loaded_at = time.time()
+        print(f"📦 Loaded {len(items)} instances from {self.table_name}", file=sys.stderr)
+
+    def _shard_ids(self) -> Iterator[str]:
+        streams = aws.client('dynamodbstreams', self.region)
+        kwargs = {'StreamArn': self.stream_arn}
+        while True:
+            description = streams.describe_stream(**kwargs)['StreamDescription']
+            for shard in description['Shards']:
+                yield shard['ShardId']
+            if 'LastEvaluatedShardId' not in description:
+                return
+            kwargs['ExclusiveStartShardId'] = description['LastEvaluatedShardId']
+
+    def _iterator(self, shard_id: str, sequence: str) -> str:
+        streams = aws.client('dynamodbstreams', self.region)
+        kwargs = {'StreamArn': self.stream_arn, 'ShardId': shard_id}
+        if sequence:
+            kwargs.update(ShardIteratorType='AFTER_SEQUENCE_NUMBER', SequenceNumber=sequence)
+        else:
+            kwargs['ShardIteratorType'] = 'TRIM_HORIZON'
+        return streams.get_shard_iterator(**kwargs)['ShardIterator']
+
+    def apply_changes(self) -> int:
+        """Apply stream records since the last sync; returns the change count"""
+        streams = aws.client('dynamodbstreams', self.region)
+        applied = 0
+        positions = {}
+        iterators = {}
+
+        for shard_id in self._shard_ids():
+            sequence = self.shards.get(shard_id, '')
+            saved = self.iterators.get(shard_id)
+            if saved and time.time() - saved[1] < ITERATOR_TTL:
+                iterator = saved[0]
+            else:
+                saved = None
+                iterator = self._iterator(shard_id, sequence)
+            empty = 0
+
+            while iterator:
+                try:
+                    response = streams.get_records(ShardIterator=iterator, Limit=1000)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ExpiredIteratorException' or not saved:
+                        raise
+                    saved = None
+                    iterator = self._iterator(shard_id, sequence)
+                    continue
+                for record in response['Records']:
+                    change = record['dynamodb']
+                    instance_id = change['Keys']['instance_id']['S']
+                    if record['eventName'] == 'REMOVE':
+                        self.items.pop(instance_id, None)
+                    elif 'NewImage' in change:
+                        self.items[instance_id] = Instance.from_item(_from_stream_image(change['NewImage']))
+                    sequence = change['SequenceNumber']
+                    applied += 1
+
+                iterator = response.get('NextShardIterator')
+                # An open shard returns an iterator even when caught up
+                empty = 0 if response['Records'] else empty + 1
+                if empty >= EMPTY_PAGES_PER_SHARD:
+                    if iterator:
+                        iterators[shard_id] = [iterator, time.time()]
+                    break
+
+            positions[shard_id] = sequence
+
+        # Shards past the 24h retention window drop out here
+        self.shards = positions
+        self.iterators = iterators
+        return applied
+
+    def sync(self) -> int:
+        """Bring the view up to date, loading in full only when required"""
+        stale = time.time() - self.loaded_at > self.full_reload_interval
+
+        if not self.items or (not self.stream_arn and stale):
+            self.full_load()
+            if not self.stream_arn:
+                self.save()
+                return len(self.items)
+
+        if not self.stream_arn:
+            return 0
+
+        try:
+            applied = self.apply_changes()
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('TrimmedDataAccessException', 'ResourceNotFoundException'):
+                raise
+            # Our position fell off the 24h stream window; start over
+            self.full_load()
+            applied = len(self.items)
+
+        self.save()
+        return applied
+
+    # ================================================================
+    # VIEW
+    # ================================================================
+
+    def get(self, instance_id: str) -> Optional[Instance]:
+        return self.items.get(instance_id)
+
+    def active(self) -> Iterator[Tuple[str, str, str, str]]:
+        """(instance_id, domain, ip, panel) for every active server"""
+        for instance_id, instance in self.items.items():
+            if instance.status == 'active':
+                yield instance_id, instance.domain, instance.public_ip, instance.panel
+
+    def by_region(self) -> Dict[str, List[Instance]]:
+        """Active servers grouped by aws_region (blank means the home region)"""
+        groups: Dict[str, List[Instance]] = {}
+        for instance in self.items.values():
+            if instance.status == 'active':
+                groups.setdefault(instance.aws_region or DEFAULT_REGION, []).append(instance)
+        return groups
+
+
+# ================================================================
+# MEMORY BENCHMARK
+# ================================================================
+
+def _sample_items(count: int) -> str:
+    """JSON for `count` neo-instances items as a monitor would hold them"""
+    rng = random.Random(count)
+    items = []
+    for n in range(count):
+        items.append({
+            'instance_id': f"i-{rng.getrandbits(68):017x}",
+            'domain': f"customer{n}.example.com",
+            'public_ip': str(ipaddress.IPv4Address(rng.getrandbits(32))),
+            'panel': rng.choice(('cyberpanel', 'cpanel', 'directadmin')),
+            'status': 'active',
+            'aws_region': rng.choice(('us-east-1', 'eu-west-1', 'ap-southeast-1')),
+            'plan': rng.choice(('starter', 'business', 'pro', 'enterprise')),
+            'health_status': {'timestamp': '2025-10-19T12:00:00', 'overall': 'healthy', 'checks': {
+                name: {'ok': True, 'details': 'ok'} for name in ('ec2_status', 'panel_http', 'dns_resolution')}},
+        })
+    return json.dumps(items)
+
+
+def _retained(build, text: str) -> int:
+    """Bytes still allocated by what build(json.loads(text)) returns"""
+    tracemalloc.start()
+    try:
+        items = json.loads(text)
+        result = build(items)
+        del items
+        return tracemalloc.get_traced_memory()[0] if result is not None else 0
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(count: int) -> Dict[str, int]:
+    """Bytes per instance for each way of holding the fleet"""
+    text = _sample_items(count)
+    forms = {
+        'item dicts': lambda items: {item['instance_id']: item for item in items},
+        'projected dicts': lambda items: {item['instance_id']: {k: item[k] for k in ('instance_id',) + FIELDS}
+                                          for item in items},
+        'Instance records': lambda items: {item['instance_id']: Instance.from_item(item) for item in items},
+    }
+    return {name: _retained(build, text) // count for name, build in forms.items()}
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Sync and query the Neo VPS inventory cache')
+    parser.add_argument('--active', action='store_true',
+                        help='Print "domain ip panel" for active servers (monitor.sh format)')
+    parser.add_argument('--full', action='store_true', help='Force a full reload')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Compare memory per instance for N synthetic instances, then exit')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        results = benchmark(args.benchmark)
+        baseline = results['item dicts']
+        for name, per_instance in results.items():
+            print(f"📦 {name:<18} {per_instance:>6} bytes/instance  "
+                  f"{per_instance * args.benchmark / 2 ** 20:>8.1f} MiB  ({per_instance / baseline:.0%})")
+        return
+
+    cache = InventoryCache()
+    if args.full:
+        cache.items = {}
+    changes = cache.sync()
+    print(f"🔄 Inventory synced ({changes} changes, {len(cache.items)} instances)", file=sys.stderr)
+
+    if args.active:
+        for _, domain, ip, panel in cache.active():
+            print(f"{domain} {ip} {panel}")
+
+
+if __name__ == '__main__':
+    main()
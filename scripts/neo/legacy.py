@@ -0,0 +1,56 @@
+"""
+Neo VPS legacy script loader
+Imports the standalone scripts whose file names are not valid module names
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+
+from neo.config import REPO_ROOT, SCRIPTS_DIR
+
+DNS_AUTOMATION_PATH = os.path.join(REPO_ROOT, 'files (1)', 'dns-automation.py')
+CHECK_SERVER_PATH = os.path.join(SCRIPTS_DIR, 'health-checks', 'check-server.py')
+CREATE_DASHBOARD_PATH = os.path.join(REPO_ROOT, 'modules', 'monitoring', 'create-dashboard.py')
+
+# Fully executed scripts only; sys.modules also holds one while it is still running
+_loaded = {}
+# Reentrant: a script may load another one while being imported
+_load_lock = threading.RLock()
+
+
+def load_script(path: str, name: str):
+    """Import a script by path, once per process"""
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+
+    with _load_lock:
+        if name in _loaded:
+            return _loaded[name]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            del sys.modules[name]
+            raise
+        _loaded[name] = module
+        return module
+
+
+def dns_automation():
+    """The dns-automation.py module (exposes DNSAutomation)"""
+    return load_script(DNS_AUTOMATION_PATH, 'neo_dns_automation')
+
+
+def check_server():
+    """The check-server.py module (exposes run_health_check)"""
+    return load_script(CHECK_SERVER_PATH, 'neo_check_server')
+
+
+def create_dashboard():
+    """The create-dashboard.py module (exposes create_customer_dashboard)"""
+    return load_script(CREATE_DASHBOARD_PATH, 'neo_create_dashboard')
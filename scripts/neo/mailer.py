@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Mailer
+Bulk "server ready" emails from one template and the inventory
+
+send-server-ready.sh ran `terraform output` twice per customer, rendered
+the template with sed into a shared /tmp/email.html (concurrent runs
+overwrote each other's) and started one `aws ses send-email` per message.
+Here the template is read once and stored in SES (or compiled once for
+SMTP). Server details come from the inventory in one sync, and messages
+go out in SendBulkTemplatedEmail batches of 50 on a few workers, or over
+one reused SMTP connection per worker (e.g. a local stand-in like
+MailHog):
+
+  python3 -m neo.mailer customer@example.com example.com
+  python3 -m neo.mailer --file ready.txt          (lines: "email domain")
+  python3 -m neo.mailer --smtp localhost:1025 --file ready.txt
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import smtplib
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from neo import aws
+from neo.config import REPO_ROOT
+from neo.inventory import InventoryCache
+from neo.panels import PANEL_PORTS
+
+TEMPLATE_NAME = 'neo-server-ready'
+TEMPLATE_PATH = os.path.join(REPO_ROOT, 'templates', 'emails', 'server-ready.html')
+SUBJECT = 'Your NEO VPS Server is Ready!'
+SENDER = os.environ.get('NEO_MAIL_FROM', 'noreply@nexus-dxb.com')
+
+BATCH_SIZE = 50         # SendBulkTemplatedEmail destinations per call
+MAX_WORKERS = 4
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+class Recipient(NamedTuple):
+    email: str
+    domain: str
+    data: Dict[str, str]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """What results are keyed by: one domain can have several recipients"""
+        return self.email, self.domain
+
+
+class Template:
+    """{{name}} template split once into literal text and field names"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = PLACEHOLDER.split(source)       # text, field, text, field, ...
+
+    @classmethod
+    def load(cls, path: str = TEMPLATE_PATH) -> 'Template':
+        with open(path) as f:
+            return cls(f.read())
+
+    def render(self, data: Dict[str, str]) -> str:
+        # Same escaping as SES's {{ }} substitution
+        return ''.join(part if i % 2 == 0 else html.escape(str(data.get(part, '')))
+                       for i, part in enumerate(self.parts))
+
+    def text(self, data: Dict[str, str]) -> str:
+        """Plain-text alternative: the rendered HTML without tags"""
+        body = re.sub(r'<(head|style)[^>]*>.*?</\1>', '', self.render(data), flags=re.S)
+        body = re.sub(r'<[^>]+>', '', re.sub(r'</t[dh]>', ' ', body))
+        lines = (line.strip() for line in html.unescape(body).splitlines())
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+# ================================================================
+# RECIPIENTS
+# ================================================================
+
+def panel_url(ip: str, panel: str) -> str:
+    """As the panel-server module's panel_url output"""
+    port = PANEL_PORTS.get(panel)
+    return f"https://{ip}:{port}" if port and ip else ''
+
+
+def resolve(pairs: List[Tuple[str, str]], inventory: Optional[InventoryCache] = None
+            ) -> Tuple[List[Recipient], List[str]]:
+    """(email, domain) pairs -> recipients with template data; domains without an active server are returned apart"""
+    if inventory is None:
+        inventory = InventoryCache()
+        inventory.sync()
+    # Terminated or suspended rows can share a domain with the live server
+    by_domain = {instance.domain: instance for instance in inventory.items.values() if instance.status == 'active'}
+
+    recipients, unknown = [], []
+    for email, domain in pairs:
+        instance = by_domain.get(domain)
+        if instance is None or not instance.public_ip:
+            unknown.append(domain)
+            continue
+        recipients.append(Recipient(email, domain, {
+            'domain': domain,
+            'server_ip': instance.public_ip,
+            'panel_url': panel_url(instance.public_ip, instance.panel),
+        }))
+    return recipients, unknown
+
+
+# ================================================================
+# SES
+# ================================================================
+
+def ensure_template(template: Template, name: str = TEMPLATE_NAME):
+    """Create or update the stored SES template when the file has changed"""
+    ses = aws.client('ses')
+    content = {'TemplateName': name, 'SubjectPart': SUBJECT, 'HtmlPart': template.source,
+               'TextPart': template.text({f: f"{{{{{f}}}}}" for f in template.parts[1::2]})}
+    try:
+        current = ses.get_template(TemplateName=name)['Template']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TemplateDoesNotExist':
+            raise
+        ses.create_template(Template=content)
+        print(f"📝 Stored SES template {name}")
+        return
+    if current.get('HtmlPart') != content['HtmlPart'] or current.get('SubjectPart') != SUBJECT:
+        ses.update_template(Template=content)
+        print(f"📝 Updated SES template {name}")
+
+
+def _send_ses_batch(batch: List[Recipient], name: str) -> Dict[Tuple[str, str], str]:
+    response = aws.client('ses').send_bulk_templated_email(
+        Source=SENDER,
+        Template=name,
+        DefaultTemplateData=json.dumps({'domain': '', 'server_ip': '', 'panel_url': ''}),
+        Destinations=[{'Destination': {'ToAddresses': [r.email]}, 'ReplacementTemplateData': json.dumps(r.data)}
+                      for r in batch],
+    )
+    # One status per destination, in order; only accepted messages get an ID
+    results = {}
+    for recipient, status in zip(batch, response['Status']):
+        if status.get('MessageId') and status.get('Status', 'Success') == 'Success':
+            results[recipient.key] = 'sent'
+        else:
+            results[recipient.key] = f"failed: {status.get('Status')} {status.get('Error', '')}".strip()
+    return results
+
+
+def send_ses(recipients: List[Recipient], template: Template, workers: int = MAX_WORKERS,
+             name: str = TEMPLATE_NAME) -> Dict[Tuple[str, str], str]:
+    ensure_template(template, name)
+    batches = [recipients[i:i + BATCH_SIZE] for i in range(0, len(recipients), BATCH_SIZE)]
+    results: Dict[Tuple[str, str], str] = {}
+
+    def send(batch: List[Recipient]):
+        try:
+            results.update(_send_ses_batch(batch, name))
+        except ClientError as e:
+            results.update({r.key: f"failed: {e.response['Error']['Code']}" for r in batch})
+        except BotoCoreError as e:
+            # Connection errors, timeouts: the batch's fate is unknown, report it per recipient
+            results.update({r.key: f"failed: {e}" for r in batch})
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mailer') as pool:
+        list(pool.map(send, batches))
+    return results
+
+
+# ================================================================
+# SMTP
+# ================================================================
+
+def send_smtp(recipients: List[Recipient], template: Template, host: str, port: int = 25,
+              workers: int = MAX_WORKERS) -> Dict[Tuple[str, str], str]:
+    """One SMTP connection per worker, reused for all of its messages"""
+    local = threading.local()
+    connections: List[smtplib.SMTP] = []
+    lock = threading.Lock()
+    results: Dict[Tuple[str, str], str] = {}
+
+    def connection() -> smtplib.SMTP:
+        if getattr(local, 'smtp', None) is None:
+            local.smtp = smtplib.SMTP(host, port, timeout=30)
+            with lock:
+                connections.append(local.smtp)
+        return local.smtp
+
+    def send(recipient: Recipient):
+        message = EmailMessage()
+        message['From'] = SENDER
+        message['To'] = recipient.email
+        message['Subject'] = SUBJECT
+        message.set_content(template.text(recipient.data))
+        message.add_alternative(template.render(recipient.data), subtype='html')
+        try:
+            connection().send_message(message)
+            results[recipient.key] = 'sent'
+        except (smtplib.SMTPException, OSError) as e:
+            # A broken connection is replaced on this worker's next message
+            local.smtp = None
+            results[recipient.key] = f"failed: {e}"
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mailer') as pool:
+            list(pool.map(send, recipients))
+    finally:
+        for smtp in connections:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return results
+
+
+def _read_pairs(path: str) -> List[Tuple[str, str]]:
+    pairs = []
+    with (sys.stdin if path == '-' else open(path)) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2 and not line.lstrip().startswith('#'):
+                pairs.append((fields[0], fields[1]))
+    return pairs
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Send "server ready" emails')
+    parser.add_argument('email', nargs='?')
+    parser.add_argument('domain', nargs='?')
+    parser.add_argument('--file', help='Lines of "email domain" ("-" for stdin)')
+    parser.add_argument('--smtp', metavar='HOST[:PORT]', help='Send through SMTP instead of SES')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--template', default=TEMPLATE_PATH)
+    args = parser.parse_args()
+
+    pairs = _read_pairs(args.file) if args.file else []
+    if args.email and args.domain:
+        pairs.append((args.email, args.domain))
+    if not pairs:
+        parser.error('give an email and a domain, or --file')
+    # The same address for the same domain gets one message
+    pairs = list(dict.fromkeys(pairs))
+
+    template = Template.load(args.template)
+    recipients, unknown = resolve(pairs)
+    for domain in unknown:
+        print(f"❌ {domain}: no active server in the inventory (or no public IP yet)")
+
+    if args.smtp:
+        host, _, port = args.smtp.partition(':')
+        results = send_smtp(recipients, template, host, int(port or 25), args.workers)
+    else:
+        results = send_ses(recipients, template, args.workers)
+
+    for (email, domain), status in sorted(results.items()):
+        print(f"{'✅' if status == 'sent' else '❌'} {email} ({domain}): {status}")
+    sent = sum(1 for status in results.values() if status == 'sent')
+    print(f"📧 {sent}/{len(pairs)} sent")
+    sys.exit(0 if sent == len(pairs) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Provisioning Orchestrator
+Runs customer provisioning as checkpointed steps that resume after a failure
+
+Each stage from track-state.sh is a step with an idempotency key. Completed
+steps are recorded in /var/neo/states/<domain>.checkpoint.json, so a retry
+continues from the last completed step instead of re-running the whole
+provision. Failures are classified and retried with a per-class backoff.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from neo.catalog import load_catalog
+from neo.config import REPO_ROOT, SCRIPTS_DIR, STATE_DIR
+
+# Every state transition is also appended here, numbered by `seq` (see neo.api.events)
+EVENTS_JOURNAL = 'events.log'
+# Past this size the journal moves to events.log.1 and a new one is started
+EVENTS_JOURNAL_MAX_BYTES = 16 * 1024 * 1024
+
+# Stages as tracked by scripts/provisioning/track-state.sh
+STAGES = [
+    ('payment_confirmed', 'Payment verified', 0),
+    ('terraform_init', 'Initializing...', 10),
+    ('vpc_creating', 'Creating network', 20),
+    ('ec2_launching', 'Launching server', 40),
+    ('panel_installing', 'Installing panel', 60),
+    ('dns_configuring', 'Configuring DNS', 85),
+    ('completed', 'Server ready!', 100),
+]
+
+
+class BackoffPolicy:
+    """Exponential backoff with jitter for one failure class"""
+
+    def __init__(self, base: float, cap: float, max_attempts: int):
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)"""
+        ceiling = min(self.cap, self.base * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+
+# Retry policy per failure class; None means the failure is not retried
+FAILURE_POLICIES: Dict[str, Optional[BackoffPolicy]] = {
+    'throttling': BackoffPolicy(base=2, cap=60, max_attempts=8),
+    'state_lock': BackoffPolicy(base=10, cap=120, max_attempts=6),
+    'dns': BackoffPolicy(base=5, cap=60, max_attempts=6),
+    'network': BackoffPolicy(base=3, cap=30, max_attempts=5),
+    'panel_pending': BackoffPolicy(base=30, cap=120, max_attempts=20),
+    'unknown': BackoffPolicy(base=15, cap=60, max_attempts=2),
+    'fatal': None,
+}
+
+# Checked in order; the first matching pattern decides the class
+FAILURE_PATTERNS = [
+    ('fatal', re.compile(
+        r'UnauthorizedOperation|AccessDenied|InvalidParameter|Invalid (domain|email|plan)|'
+        r'Unsupported argument|already exists',
+        re.I)),
+    ('throttling', re.compile(
+        r'Throttling|RequestLimitExceeded|Rate exceeded|TooManyRequests|SlowDown|'
+        r'PriorRequestNotComplete',
+        re.I)),
+    ('state_lock', re.compile(r'Error acquiring the state lock|ConditionalCheckFailed', re.I)),
+    ('dns', re.compile(r'NXDOMAIN|SERVFAIL|DNS (query|propagat)|HostedZone|nameserver', re.I)),
+    ('network', re.compile(
+        r'timed? ?out|Connection (reset|refused)|EndpointConnectionError|TLS handshake|'
+        r'no route to host',
+        re.I)),
+]
+
+
+class StepFailed(Exception):
+    """A provisioning step failed; carries its failure class"""
+
+    def __init__(self, step: str, failure_class: str, message: str):
+        super().__init__(f"{step} failed ({failure_class}): {message}")
+        self.step = step
+        self.failure_class = failure_class
+        self.message = message
+
+
+def classify_failure(output: str) -> str:
+    """Map error output to a failure class"""
+    for failure_class, pattern in FAILURE_PATTERNS:
+        if pattern.search(output or ''):
+            return failure_class
+    return 'unknown'
+
+
+def idempotency_key(domain: str, step: str, params: Dict) -> str:
+    """Stable key for a step run with the given parameters"""
+    payload = json.dumps([domain, step, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def write_state(domain: str, state: str, message: str, progress: int, state_dir: str = STATE_DIR):
+    """Write the same state file as track_state() in track-state.sh"""
+    os.makedirs(state_dir, exist_ok=True)
+    state_file = os.path.join(state_dir, f"{domain}.json")
+    tmp_file = f"{state_file}.tmp"
+    record = append_event({
+        'domain': domain,
+        'state': state,
+        'message': message,
+        'timestamp': datetime.now().astimezone().isoformat(timespec='seconds'),
+        'progress': progress,
+    }, state_dir)
+
+    with open(tmp_file, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+
+def journal_seq(path: str) -> int:
+    """Sequence number of the last event in the journal (or the rotated one), 0 if none"""
+    for candidate in (path, f"{path}.1"):
+        try:
+            with open(candidate, 'rb') as f:
+                f.seek(max(0, os.fstat(f.fileno()).st_size - 4096))
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            continue
+        for line in reversed(lines):
+            try:
+                return int(json.loads(line)['seq'])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return 0
+
+
+def append_event(record: Dict, state_dir: str = STATE_DIR) -> Dict:
+    """Append a transition to the shared event journal read by the API; returns it with its `seq`"""
+    path = os.path.join(state_dir, EVENTS_JOURNAL)
+    with open(f"{path}.lock", 'a') as lock:
+        # Numbering, appending and rotating are serialised across processes (track-state.sh too),
+        # so `seq` increases by one per event whichever file it lands in
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        record = dict(record, seq=journal_seq(path) + 1)
+        with open(path, 'ab') as f:
+            f.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+        if os.path.getsize(path) >= EVENTS_JOURNAL_MAX_BYTES:
+            # Past the cap: move it to <path>.1 (replacing the previous one); the next write starts a new file
+            os.replace(path, f"{path}.1")
+    return record
+
+
+class CheckpointStore:
+    """Completed-step checkpoints for one domain, stored as JSON"""
+
+    def __init__(self, domain: str, state_dir: str = STATE_DIR):
+        self.domain = domain
+        self.path = os.path.join(state_dir, f"{domain}.checkpoint.json")
+        self.data = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'domain': self.domain, 'steps': {}, 'failures': []}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def completed(self, step: str, key: str) -> Optional[Dict]:
+        """Return the recorded result if `step` already completed with `key`"""
+        entry = self.data['steps'].get(step)
+        if entry and entry['key'] == key:
+            return entry
+        return None
+
+    def mark_complete(self, step: str, key: str, result: Dict, attempts: int):
+        self.data['steps'][step] = {
+            'key': key,
+            'result': result,
+            'attempts': attempts,
+            'completed_at': datetime.utcnow().isoformat(),
+        }
+        self.save()
+
+    def invalidate_after(self, step_names: List[str]):
+        """Drop checkpoints of steps that depend on a re-run step"""
+        for name in step_names:
+            self.data['steps'].pop(name, None)
+        self.save()
+
+    def record_failure(self, step: str, failure_class: str, message: str, attempt: int):
+        self.data['failures'].append({
+            'step': step,
+            'class': failure_class,
+            'message': message[-2000:],
+            'attempt': attempt,
+            'timestamp': datetime.utcnow().isoformat(),
+        })
+        self.save()
+
+
+class Step:
+    """One checkpointed provisioning step"""
+
+    def __init__(self, name: str, message: str, progress: int,
+                 action: Callable[[Dict], Optional[Dict]], params: Optional[Dict] = None):
+        self.name = name
+        self.message = message
+        self.progress = progress
+        self.action = action
+        self.params = params or {}
+
+
+class ProvisioningOrchestrator:
+    """Run steps in order, skipping those already checkpointed"""
+
+    def __init__(self, domain: str, steps: List[Step], store: Optional[CheckpointStore] = None,
+                 state_dir: str = STATE_DIR, sleep: Callable[[float], None] = time.sleep,
+                 on_transition: Optional[Callable[[str, str, int], None]] = None):
+        self.domain = domain
+        self.steps = steps
+        self.state_dir = state_dir
+        self.store = store or CheckpointStore(domain, state_dir)
+        self.sleep = sleep
+        self.on_transition = on_transition
+
+    def _transition(self, state: str, message: str, progress: int):
+        write_state(self.domain, state, message, progress, self.state_dir)
+        if self.on_transition:
+            self.on_transition(state, message, progress)
+
+    def run(self) -> Dict[str, Dict]:
+        """Run all pending steps; returns results by step name"""
+        context = {'domain': self.domain, 'results': {}}
+
+        for index, step in enumerate(self.steps):
+            key = idempotency_key(self.domain, step.name, step.params)
+            done = self.store.completed(step.name, key)
+
+            if done:
+                print(f"⏭️  {step.name}: already completed ({key})")
+                context['results'][step.name] = done['result']
+                continue
+
+            # Anything after a re-run step has to run again
+            self.store.invalidate_after([s.name for s in self.steps[index + 1:]])
+
+            result = self._run_step(step, key, context)
+            context['results'][step.name] = result
+
+        return context['results']
+
+    def _run_step(self, step: Step, key: str, context: Dict) -> Dict:
+        attempts_by_class: Dict[str, int] = {}
+        attempt = 0
+
+        while True:
+            attempt += 1
+            self._transition(step.name, step.message, step.progress)
+            print(f"▶️  {step.name} (attempt {attempt})")
+
+            try:
+                result = step.action(context) or {}
+                self.store.mark_complete(step.name, key, result, attempt)
+                print(f"✅ {step.name} completed")
+                return result
+
+            except StepFailed as e:
+                failure_class, message = e.failure_class, e.message
+            except Exception as e:
+                failure_class, message = classify_failure(str(e)), str(e)
+
+            self.store.record_failure(step.name, failure_class, message, attempt)
+            policy = FAILURE_POLICIES.get(failure_class)
+            attempts_by_class[failure_class] = attempts_by_class.get(failure_class, 0) + 1
+            class_attempt = attempts_by_class[failure_class]
+
+            if policy is None or class_attempt >= policy.max_attempts:
+                self._transition('failed', f"{step.name}: {failure_class}", step.progress)
+                print(f"❌ {step.name} failed ({failure_class}), giving up")
+                raise StepFailed(step.name, failure_class, message)
+
+            delay = policy.delay(class_attempt)
+            print(f"⚠️  {step.name} failed ({failure_class}), retrying in {delay:.1f}s")
+            self.sleep(delay)
+
+
+# ================================================================
+# DEFAULT STEPS
+# ================================================================
+
+def run_command(step: str, command: List[str], cwd: Optional[str] = None,
+                failure_class: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> str:
+    """Run a command, raising StepFailed with a classified failure"""
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True, env=env)
+    output = (result.stdout or '') + (result.stderr or '')
+
+    if result.returncode != 0:
+        raise StepFailed(step, failure_class or classify_failure(output), output.strip()[-2000:])
+
+    return result.stdout
+
+
+def customer_path(domain: str) -> str:
+    return os.path.join(REPO_ROOT, 'environments', 'customers', domain.replace('.', '-'))
+
+
+def build_default_steps(domain: str, email: str, panel: str = 'cyberpanel', os_type: str = 'almalinux-8',
+                        plan: str = 'core', region: str = 'us-east-1',
+                        ns1_ip: Optional[str] = None, ns2_ip: Optional[str] = None,
+                        waiter=None) -> List[Step]:
+    """Steps mapping the track-state.sh stages onto the existing tooling
+
+    plan is a catalog slug (Plans/*.yaml); it sets the instance type.
+    When a shared neo.waiter.ReadinessWaiter is given, panel_installing waits
+    on it instead of running its own check-provisioning.sh polling loop.
+    """
+    catalog = load_catalog()
+    if plan not in catalog.instance_types:
+        raise ValueError(f"Unknown plan '{plan}' (one of: {', '.join(catalog.plan_ids)})")
+    instance_type = catalog.instance_types[plan]
+
+    tf_dir = customer_path(domain)
+    terraform = ['terraform', '-chdir=' + tf_dir]
+    apply = terraform + ['apply', '-auto-approve', '-input=false']
+    params = {'email': email, 'panel': panel, 'os': os_type, 'plan': plan, 'instance_type': instance_type,
+              'region': region}
+
+    def payment_confirmed(context):
+        # Payment is verified by the API before a job is queued
+        return {'confirmed_at': datetime.utcnow().isoformat()}
+
+    def terraform_init(context):
+        run_command('terraform_init', [
+            os.path.join(REPO_ROOT, 'automation', 'provision-customer.sh'),
+            '--domain', domain, '--email', email, '--plan', plan, '--instance-type', instance_type,
+            '--panel', panel, '--os', os_type, '--region', region, '--generate-only',
+        ], cwd=REPO_ROOT)
+        run_command('terraform_init', terraform + ['init', '-input=false'])
+        return {'path': tf_dir}
+
+    def vpc_creating(context):
+        run_command('vpc_creating', apply + ['-target=module.network', '-target=module.security'])
+        return {}
+
+    def ec2_launching(context):
+        run_command('ec2_launching', apply)
+        outputs = json.loads(run_command('ec2_launching', terraform + ['output', '-json']))
+        return {
+            'server_ip': outputs.get('server_public_ip', {}).get('value'),
+            'instance_id': outputs.get('instance_id', {}).get('value'),
+        }
+
+    def panel_installing(context):
+        launched = context['results']['ec2_launching']
+        if waiter and launched.get('instance_id'):
+            try:
+                waiter.wait(launched['instance_id'], panel, region)
+            except Exception as e:
+                raise StepFailed('panel_installing', 'panel_pending', str(e))
+            return {}
+
+        server_ip = launched['server_ip']
+        run_command('panel_installing', [
+            os.path.join(SCRIPTS_DIR, 'health-checks', 'check-provisioning.sh'),
+            domain, panel, server_ip,
+        ], failure_class='panel_pending')
+        return {}
+
+    def dns_configuring(context):
+        if not ns1_ip:
+            return {'skipped': 'no custom nameservers'}
+
+        server_ip = context['results']['ec2_launching']['server_ip']
+        command = [sys.executable, os.path.join(REPO_ROOT, 'files (1)', 'dns-automation.py'),
+                   domain, server_ip, ns1_ip]
+        if ns2_ip:
+            command.append(ns2_ip)
+        # scripts/ on the path lets dns-automation.py keep the shared DNS cache current
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get('PYTHONPATH')])))
+        run_command('dns_configuring', command, env=env)
+        return {'ns1_ip': ns1_ip, 'ns2_ip': ns2_ip}
+
+    def completed(context):
+        return {'completed_at': datetime.utcnow().isoformat()}
+
+    actions = {
+        'payment_confirmed': (payment_confirmed, {}),
+        'terraform_init': (terraform_init, params),
+        'vpc_creating': (vpc_creating, params),
+        'ec2_launching': (ec2_launching, params),
+        'panel_installing': (panel_installing, {'panel': panel}),
+        'dns_configuring': (dns_configuring, {'ns1_ip': ns1_ip, 'ns2_ip': ns2_ip}),
+        'completed': (completed, {}),
+    }
+
+    return [Step(name, message, progress, actions[name][0], actions[name][1])
+            for name, message, progress in STAGES]
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Resumable Neo VPS provisioning')
+    parser.add_argument('--domain', required=True)
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--panel', default='cyberpanel')
+    parser.add_argument('--os', dest='os_type', default='almalinux-8')
+    parser.add_argument('--plan', default='core', help='Catalog plan slug (Plans/*.yaml)')
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--ns1-ip')
+    parser.add_argument('--ns2-ip')
+    parser.add_argument('--restart', action='store_true', help='Ignore existing checkpoints')
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.domain)
+    if args.restart:
+        store.invalidate_after([name for name, _, _ in STAGES])
+
+    try:
+        steps = build_default_steps(args.domain, args.email, args.panel, args.os_type,
+                                    args.plan, args.region, args.ns1_ip, args.ns2_ip)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        ProvisioningOrchestrator(args.domain, steps, store=store).run()
+    except StepFailed as e:
+        print(f"\n❌ Provisioning stopped at {e.step}: {e.failure_class}")
+        print(f"   Re-run the same command to resume from {e.step}")
+        sys.exit(1)
+
+    print(f"\n🎉 Provisioning complete for {args.domain}")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
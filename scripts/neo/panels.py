@@ -0,0 +1,29 @@
+"""
+Neo VPS control panel helpers
+Admin ports and readiness probe shared by the health checks and waiters
+"""
+
+import requests
+import urllib3
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+PANEL_PORTS = {
+    'cpanel': 2087,
+    'cyberpanel': 8090,
+    'directadmin': 2222,
+}
+
+# Status codes that mean the panel is up (login page, redirect or auth prompt)
+READY_CODES = (200, 302, 401)
+
+
+def panel_ready(ip: str, panel: str, timeout: float = 5) -> bool:
+    """True once the panel answers on its admin port"""
+    if panel not in PANEL_PORTS:
+        return True
+    try:
+        response = requests.get(f'https://{ip}:{PANEL_PORTS[panel]}', timeout=timeout, verify=False)
+        return response.status_code in READY_CODES
+    except Exception:
+        return False
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Profiling
+--profile / --profile-stacks for the CLI entry points
+
+Wrapping a script's entry point in `profiling(sys.argv)` strips the
+profiling flags from argv and, only when one was given, measures the run:
+
+  --profile[=PREFIX]        cProfile dump (PREFIX.pstats) of the main thread
+  --profile-stacks[=PREFIX] sampled stacks of every thread, written as
+                            collapsed stacks (PREFIX.collapsed) for
+                            flamegraph.pl or speedscope
+
+Either flag also prints a wall-clock breakdown into CPU, AWS API wait,
+subprocess wait and sleep, and writes it to PREFIX.json. The waits are
+measured at botocore's Endpoint._send, subprocess.run/Popen and time.sleep,
+which also covers clients created before profiling started. Without a flag
+nothing is patched or started.
+
+Scripts outside scripts/ (dns-automation.py, create-zone.py,
+create-dashboard.py) don't depend on this package; run them through it
+instead, with the flags in front:
+
+  cd scripts && python3 -m neo.profiling --profile-stacks ../modules/dns-server/user-data/create-zone.py \
+      example.com 54.23.45.67 52.10.20.30 52.10.20.31
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import runpy
+import subprocess
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SAMPLE_INTERVAL = 0.005
+MAX_DEPTH = 128
+CATEGORIES = ('aws', 'subprocess', 'sleep')
+
+
+class WaitTimer:
+    """Time spent inside patched blocking calls, per category"""
+
+    def __init__(self):
+        self.seconds = {c: 0.0 for c in CATEGORIES}
+        self.calls = {c: 0 for c in CATEGORIES}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.patches: List[tuple] = []
+
+    def wrap(self, category: str, func):
+        timer = self
+
+        def timed(*args, **kwargs):
+            # Nested calls (run -> communicate -> wait) count once
+            if getattr(timer.local, 'depth', 0):
+                return func(*args, **kwargs)
+            timer.local.depth = 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                timer.local.depth = 0
+                with timer.lock:
+                    timer.seconds[category] += elapsed
+                    timer.calls[category] += 1
+
+        timed.__wrapped__ = func
+        return timed
+
+    def patch(self, owner, name: str, category: str):
+        original = getattr(owner, name)
+        self.patches.append((owner, name, original))
+        setattr(owner, name, self.wrap(category, original))
+
+    def install(self):
+        self.patch(time, 'sleep', 'sleep')
+        self.patch(subprocess, 'run', 'subprocess')
+        self.patch(subprocess.Popen, 'communicate', 'subprocess')
+        self.patch(subprocess.Popen, 'wait', 'subprocess')
+        try:
+            from botocore.endpoint import Endpoint
+            # One call per HTTP attempt, on every client however it was created
+            self.patch(Endpoint, '_send', 'aws')
+        except ImportError:
+            pass
+
+    def uninstall(self):
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches.clear()
+
+
+class StackSampler:
+    """Samples every thread's stack; counts become a collapsed-stack file"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(';', ':').replace(' ', '_')
+
+    def sample(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)).replace(';', ':').replace(' ', '_'))
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def start(self):
+        def run():
+            while not self.stop_event.wait(self.interval):
+                self.sample()
+
+        self.thread = threading.Thread(target=run, name='neo-profile-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Context manager for one profiled run"""
+
+    def __init__(self, prefix: str, cprofile: bool = True, stacks: bool = False):
+        self.prefix = prefix
+        self.profile = cProfile.Profile() if cprofile else None
+        self.sampler = StackSampler() if stacks else None
+        self.timer = WaitTimer()
+
+    def __enter__(self):
+        self.timer.install()
+        if self.sampler:
+            self.sampler.start()
+        self.wall_started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        if self.profile:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile:
+            self.profile.disable()
+        wall = time.perf_counter() - self.wall_started
+        cpu = time.process_time() - self.cpu_started
+        if self.sampler:
+            self.sampler.stop()
+        self.timer.uninstall()
+        try:
+            self.report(wall, cpu)
+        except OSError as e:
+            print(f"⚠️  Could not write profile: {e}", file=sys.stderr)
+        return False
+
+    def breakdown(self, wall: float, cpu: float) -> Dict:
+        waits = self.timer.seconds
+        return {
+            'wall': round(wall, 4),
+            'cpu': round(cpu, 4),
+            'aws_wait': round(waits['aws'], 4),
+            'subprocess_wait': round(waits['subprocess'], 4),
+            'sleep': round(waits['sleep'], 4),
+            # Waits of concurrent threads overlap, so this can go negative
+            'unaccounted': round(wall - cpu - sum(waits.values()), 4),
+            'calls': dict(self.timer.calls),
+        }
+
+    def report(self, wall: float, cpu: float):
+        result = self.breakdown(wall, cpu)
+        os.makedirs(os.path.dirname(self.prefix) or '.', exist_ok=True)
+        with open(f"{self.prefix}.json", 'w') as f:
+            json.dump(result, f, indent=2)
+
+        out = sys.stderr
+        print(f"\n⏱️  Profile: {wall:.3f}s wall", file=out)
+        for label, key, calls in (('cpu', 'cpu', None), ('aws api wait', 'aws_wait', 'aws'),
+                                  ('subprocess wait', 'subprocess_wait', 'subprocess'),
+                                  ('sleep', 'sleep', 'sleep'), ('unaccounted', 'unaccounted', None)):
+            share = 100 * result[key] / wall if wall else 0
+            count = f"  ({result['calls'][calls]} calls)" if calls else ''
+            print(f"  {label:<16} {result[key]:>9.3f}s {share:>6.1f}%{count}", file=out)
+
+        if self.profile:
+            self.profile.dump_stats(f"{self.prefix}.pstats")
+            pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(15)
+            print(f"📄 {self.prefix}.pstats (python3 -m pstats {self.prefix}.pstats)", file=out)
+        if self.sampler:
+            self.sampler.write(f"{self.prefix}.collapsed")
+            print(f"🔥 {self.prefix}.collapsed ({self.sampler.samples} samples; flamegraph.pl or speedscope)",
+                  file=out)
+
+
+def _default_prefix(argv: List[str]) -> str:
+    script = os.path.splitext(os.path.basename(argv[0] if argv else 'neo'))[0] or 'neo'
+    return f"/tmp/neo-profile-{script}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+def profiling(argv: List[str]):
+    """Strip --profile/--profile-stacks from argv (in place); a Profiler if either was given"""
+    cprofile = stacks = False
+    prefix = None
+    remaining = []
+    for arg in argv:
+        flag, _, value = arg.partition('=')
+        if flag == '--profile':
+            cprofile = True
+        elif flag == '--profile-stacks':
+            stacks = True
+        else:
+            remaining.append(arg)
+            continue
+        prefix = value or prefix
+    argv[:] = remaining
+
+    if not (cprofile or stacks):
+        return nullcontext()
+    return Profiler(prefix or _default_prefix(argv), cprofile=cprofile, stacks=stacks)
+
+
+def run_script(argv: List[str]):
+    """Run argv[0] as __main__ with argv[1:] as its arguments, under profiling()"""
+    session = profiling(argv)
+    path = argv[0]
+    sys.argv = list(argv)
+    # As `python3 script.py` would, so the script's own imports resolve
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    with session:
+        runpy.run_path(path, run_name='__main__')
+
+
+def main():
+    """Main execution"""
+
+    argv = sys.argv[1:]
+    if not [a for a in argv if not a.startswith('--profile')]:
+        print("Usage: python3 -m neo.profiling [--profile[=PREFIX]] [--profile-stacks[=PREFIX]] <script.py> [args]",
+              file=sys.stderr)
+        sys.exit(2)
+    run_script(argv)
+
+
+if __name__ == '__main__':
+    main()
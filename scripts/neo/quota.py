@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Plan Quota Auditor
+Finds running servers that drifted past their plan limits
+
+Usage is gathered per region with paginated bulk calls (instances, volumes,
+add-on tags, and month-to-date NetworkOut through batched GetMetricData),
+laid out as columns indexed by instance, and compared against the limit
+table from neo.catalog in one pass. Every region in NEO_REGIONS is audited
+in parallel unless --region picks one. Run it from cron, or with --interval
+to keep auditing on a schedule.
+"""
+
+import argparse
+import json
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from neo import aws
+from neo.catalog import Catalog, UNLIMITED, load_catalog
+from neo.config import INSTANCES_TABLE
+from neo.regions import REGIONS, fan_out
+
+# GetMetricData accepts up to 500 queries per request
+METRIC_BATCH = 500
+
+TB = 1024 ** 4
+
+
+class FleetUsage:
+    """Per-instance usage columns; row i describes instance_ids[i]"""
+
+    def __init__(self, region: Optional[str] = None):
+        self.region = region
+        self.instance_ids: List[str] = []
+        self.customers: List[str] = []
+        self.plans: List[str] = []
+        self.instance_types: List[str] = []
+        self.storage_gb = array('d')
+        self.network_out_tb = array('d')
+        self.addons: List[frozenset] = []
+        self.row: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.instance_ids)
+
+
+def _paginate(client, operation: str, key: str, **kwargs) -> Iterator[Dict]:
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        yield from page[key]
+
+
+def load_table_plans() -> Dict[str, str]:
+    """instance_id -> plan from neo-instances (kept in the home region), for instances without a Plan tag"""
+    table = aws.resource('dynamodb').Table(INSTANCES_TABLE)
+    table_plans = {}
+    kwargs = {'ProjectionExpression': 'instance_id, #plan', 'ExpressionAttributeNames': {'#plan': 'plan'}}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response['Items']:
+            if 'plan' in item:
+                table_plans[item['instance_id']] = item['plan']
+        if 'LastEvaluatedKey' not in response:
+            return table_plans
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def load_usage(catalog: Catalog, region: Optional[str] = None, with_metrics: bool = True,
+               table_plans: Optional[Dict[str, str]] = None) -> FleetUsage:
+    """Collect usage for every customer instance in a region"""
+    ec2 = aws.client('ec2', region)
+    usage = FleetUsage(region)
+    if table_plans is None:
+        table_plans = load_table_plans()
+
+    filters = [
+        {'Name': 'tag-key', 'Values': ['Customer']},
+        {'Name': 'instance-state-name', 'Values': ['running', 'stopped']},
+    ]
+    for reservation in _paginate(ec2, 'describe_instances', 'Reservations', Filters=filters):
+        for instance in reservation['Instances']:
+            tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+            instance_id = instance['InstanceId']
+            usage.row[instance_id] = len(usage)
+            usage.instance_ids.append(instance_id)
+            usage.customers.append(tags['Customer'])
+            usage.plans.append(tags.get('Plan') or table_plans.get(instance_id, ''))
+            usage.instance_types.append(instance['InstanceType'])
+            usage.storage_gb.append(0.0)
+            usage.network_out_tb.append(0.0)
+
+    # Attached EBS, summed per instance
+    for volume in _paginate(ec2, 'describe_volumes', 'Volumes',
+                            Filters=[{'Name': 'attachment.status', 'Values': ['attached']}]):
+        for attachment in volume['Attachments']:
+            row = usage.row.get(attachment['InstanceId'])
+            if row is not None:
+                usage.storage_gb[row] += volume['Size']
+
+    # Add-ons are tagged Customer + Addon on the resources they create
+    by_customer: Dict[str, set] = {}
+    tagging = aws.client('resourcegroupstaggingapi', region)
+    for resource in _paginate(tagging, 'get_resources', 'ResourceTagMappingList',
+                              TagFilters=[{'Key': 'Addon'}, {'Key': 'Customer'}]):
+        tags = {t['Key']: t['Value'] for t in resource['Tags']}
+        by_customer.setdefault(tags['Customer'], set()).add(tags['Addon'])
+    usage.addons = [frozenset(by_customer.get(c, ())) for c in usage.customers]
+
+    if with_metrics and len(usage):
+        _load_network_out(usage, region)
+
+    return usage
+
+
+def _load_network_out(usage: FleetUsage, region: Optional[str] = None):
+    """Month-to-date NetworkOut per instance via batched GetMetricData"""
+    cloudwatch = aws.client('cloudwatch', region)
+    now = datetime.now(timezone.utc)
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    # One datapoint for the month so far; data older than 15 days only comes in
+    # multiples of 300s (older than 63 days, 3600s), so round up to whole hours
+    period = max(3600, -(-int((now - start).total_seconds()) // 3600) * 3600)
+
+    for offset in range(0, len(usage), METRIC_BATCH):
+        ids = usage.instance_ids[offset:offset + METRIC_BATCH]
+        queries = [{
+            'Id': f"n{offset + i}",
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': 'AWS/EC2',
+                    'MetricName': 'NetworkOut',
+                    'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+                },
+                'Period': period,
+                'Stat': 'Sum',
+            },
+        } for i, instance_id in enumerate(ids)]
+
+        kwargs = {'MetricDataQueries': queries, 'StartTime': start, 'EndTime': now}
+        while True:
+            response = cloudwatch.get_metric_data(**kwargs)
+            for result in response['MetricDataResults']:
+                row = int(result['Id'][1:])
+                usage.network_out_tb[row] += sum(result['Values']) / TB
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+
+
+def audit(usage: FleetUsage, catalog: Catalog) -> List[Dict]:
+    """Compare usage columns against plan limits; returns violations"""
+    n = len(usage)
+
+    # Limit columns aligned with the usage rows
+    storage_limit = array('d', bytes(8 * n))
+    bandwidth_limit = array('d', bytes(8 * n))
+    expected_type: List[str] = [''] * n
+    upgraded = bytearray(n)
+
+    for i in range(n):
+        plan = usage.plans[i]
+        limits = catalog.limits.get(plan)
+        if not limits:
+            continue
+        extra_gb = 0
+        for addon_id in usage.addons[i]:
+            addon = catalog.addons.get(addon_id, {})
+            # EBS expansions raise the storage ceiling; S3 storage does not count
+            if addon_id.startswith('storage-ebs'):
+                extra_gb += addon.get('config', {}).get('size_gb', 0)
+            if 'instance-upgrade' in addon.get('terraform_module', ''):
+                upgraded[i] = 1
+        storage_limit[i] = limits['max_storage_gb'] + extra_gb
+        bandwidth_limit[i] = limits['bandwidth_monthly_tb']
+        expected_type[i] = catalog.instance_types[plan]
+
+    violations = []
+
+    def report(i: int, kind: str, actual, limit):
+        violations.append({
+            'instance_id': usage.instance_ids[i],
+            'region': usage.region,
+            'customer': usage.customers[i],
+            'plan': usage.plans[i] or None,
+            'violation': kind,
+            'actual': actual,
+            'limit': limit,
+        })
+
+    for i in range(n):
+        if not expected_type[i]:
+            report(i, 'unknown_plan', usage.plans[i] or None, list(catalog.plan_ids))
+            continue
+        if not upgraded[i] and usage.instance_types[i] != expected_type[i]:
+            report(i, 'instance_type', usage.instance_types[i], expected_type[i])
+        if usage.storage_gb[i] > storage_limit[i]:
+            report(i, 'storage_gb', usage.storage_gb[i], storage_limit[i])
+        if bandwidth_limit[i] != UNLIMITED and usage.network_out_tb[i] > bandwidth_limit[i]:
+            report(i, 'bandwidth_tb', round(usage.network_out_tb[i], 3), bandwidth_limit[i])
+        for addon_id in sorted(usage.addons[i]):
+            if not catalog.can_buy(usage.plans[i], addon_id):
+                report(i, 'addon_incompatible', addon_id, catalog.compatible_addons(usage.plans[i]))
+
+    return violations
+
+
+def run_audit(region: Optional[str] = None, with_metrics: bool = True) -> List[Dict]:
+    """Violations in one region, or in every region of REGIONS in parallel"""
+    catalog = load_catalog()
+    started = time.monotonic()
+    table_plans = load_table_plans()
+
+    def audit_region(name: str) -> Tuple[int, List[Dict]]:
+        usage = load_usage(catalog, name, with_metrics, table_plans)
+        return len(usage), audit(usage, catalog)
+
+    sweep = fan_out(audit_region, [region] if region else REGIONS)
+    for failed, error in sweep.errors.items():
+        print(f"❌ Could not audit {failed}: {error}", file=sys.stderr)
+
+    audited = sum(count for count, _ in sweep.results.values())
+    violations = [v for name in sorted(sweep.results) for v in sweep.results[name][1]]
+    print(f"🔎 Audited {audited} instances in {len(sweep.results)} region(s) in "
+          f"{time.monotonic() - started:.1f}s, {len(violations)} violation(s)", file=sys.stderr)
+    return violations
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Audit running servers against plan limits')
+    parser.add_argument('--region', help='Audit one region (default: every region in NEO_REGIONS)')
+    parser.add_argument('--no-metrics', action='store_true', help='Skip the bandwidth check')
+    parser.add_argument('--interval', type=float, help='Re-run every N seconds')
+    args = parser.parse_args()
+
+    while True:
+        violations = run_audit(args.region, with_metrics=not args.no_metrics)
+        for violation in violations:
+            print(json.dumps(violation, default=str))
+        sys.stdout.flush()
+
+        if not args.interval:
+            sys.exit(1 if violations else 0)
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
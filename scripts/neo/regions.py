@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Regions
+Region list, parallel per-region fan-out and region-aware ARNs
+
+Customers pick `aws_region` at provisioning time, so the fleet spans
+regions while the neo-* tables and the alerts topic stay in the home region
+(DEFAULT_REGION). Per-region work (describes, snapshots, metrics) goes
+through neo.aws clients, which are pooled per (service, region), and
+fan_out() runs one worker per region so a sweep takes as long as the
+slowest region rather than the sum of all of them.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from neo import aws
+from neo.config import DEFAULT_REGION
+
+# Regions swept when the caller doesn't know which ones hold instances
+REGIONS = [r.strip() for r in os.environ.get('NEO_REGIONS', DEFAULT_REGION).split(',') if r.strip()]
+
+ALERT_TOPIC = 'neo-alerts'
+
+_account_id: Optional[str] = None
+_account_lock = threading.Lock()
+
+
+class FanOut(NamedTuple):
+    results: Dict[str, Any]           # region -> return value
+    errors: Dict[str, Exception]      # region -> what it raised
+    timings: Dict[str, float]         # region -> seconds
+
+    def merged(self) -> List:
+        """Concatenate list results in region order"""
+        merged = []
+        for region in sorted(self.results):
+            merged.extend(self.results[region] or [])
+        return merged
+
+
+def fan_out(func: Callable[[str], Any], regions: Optional[Iterable[str]] = None,
+            max_workers: Optional[int] = None) -> FanOut:
+    """func(region) for every region in parallel; one failing region doesn't stop the rest"""
+    regions = list(dict.fromkeys(regions or REGIONS))
+    results: Dict[str, Any] = {}
+    errors: Dict[str, Exception] = {}
+    timings: Dict[str, float] = {}
+
+    def run(region: str):
+        started = time.monotonic()
+        try:
+            results[region] = func(region)
+        except Exception as e:
+            errors[region] = e
+        timings[region] = round(time.monotonic() - started, 3)
+
+    if len(regions) == 1:
+        run(regions[0])
+    elif regions:
+        with ThreadPoolExecutor(max_workers=max_workers or len(regions), thread_name_prefix='region') as pool:
+            list(pool.map(run, regions))
+    return FanOut(results, errors, timings)
+
+
+def group_by_region(items: Iterable[Dict], key: str = 'aws_region') -> Dict[str, List[Dict]]:
+    """Items keyed by their region attribute (missing means the home region)"""
+    groups: Dict[str, List[Dict]] = {}
+    for item in items:
+        groups.setdefault(item.get(key) or DEFAULT_REGION, []).append(item)
+    return groups
+
+
+def account_id() -> str:
+    global _account_id
+    with _account_lock:
+        if _account_id is None:
+            _account_id = aws.client('sts').get_caller_identity()['Account']
+        return _account_id
+
+
+def alert_topic_arn(region: Optional[str] = None) -> str:
+    """SNS alerts topic; NEO_ALERT_TOPIC_ARN overrides the home-region default"""
+    arn = os.environ.get('NEO_ALERT_TOPIC_ARN')
+    if arn:
+        return arn
+    return f"arn:aws:sns:{region or DEFAULT_REGION}:{account_id()}:{ALERT_TOPIC}"
+
+
+def arn_region(arn: str) -> Optional[str]:
+    parts = arn.split(':')
+    return parts[3] if len(parts) > 3 and parts[3] else None
+
+
+def running_instances(region: str) -> List[Dict]:
+    """Running customer instances (Domain-tagged) in one region
+
+    retention_days comes from the instance's RetentionDays tag (the
+    panel-server module's snapshot_retention_days), when it has one.
+    """
+    instances = []
+    paginator = aws.client('ec2', region).get_paginator('describe_instances')
+    filters = [{'Name': 'tag-key', 'Values': ['Domain']},
+               {'Name': 'instance-state-name', 'Values': ['running']}]
+    for page in paginator.paginate(Filters=filters):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {t['Key']: t['Value'] for t in instance.get('Tags', [])}
+                retention = tags.get('RetentionDays', '')
+                instances.append({'instance_id': instance['InstanceId'], 'domain': tags['Domain'],
+                                  'aws_region': region,
+                                  'retention_days': int(retention) if retention.isdigit() else None})
+    return instances
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Sweep running Neo VPS instances across regions')
+    parser.add_argument('regions', nargs='*', help=f"Regions to sweep (default: {', '.join(REGIONS)})")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    sweep = fan_out(running_instances, args.regions or None)
+    for region in sorted(sweep.timings):
+        if region in sweep.errors:
+            print(f"❌ {region:<16} {sweep.errors[region]}")
+        else:
+            print(f"✅ {region:<16} {len(sweep.results[region]):>5} running  {sweep.timings[region]:.2f}s")
+    print(f"🌍 {len(sweep.merged())} instance(s) in {time.monotonic() - started:.2f}s", file=sys.stderr)
+    sys.exit(1 if sweep.errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Snapshot Retention
+Day/week/month retention for every Neo snapshot in one pass
+
+All Domain-tagged snapshots are listed with a few paginated
+describe_snapshots calls, grouped by volume, and the keep set is computed
+in memory: the newest snapshot of each of the last N days, N weeks and N
+months. Manual (API or CLI) backups are the customer's and are never
+pruned. Everything else is deleted by a small worker pool; throttling is
+paced by the process-wide governor (neo.throttle) and retried by botocore.
+Use --dry-run for the report only.
+
+Reclaimed GB is the provisioned size of the deleted snapshots; snapshot
+storage is incremental, so the billed saving is at most that.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from botocore.exceptions import ClientError
+
+from neo import aws
+from neo.backups import TYPE_TAGS, BackupIndex
+
+# DLM expires its own snapshots; Retain=true pins one by hand
+DLM_TAG = 'aws:dlm:lifecycle-policy-id'
+PIN_TAG = 'Retain'
+# Manual backups are kept until the customer deletes them
+MANUAL_TYPE = TYPE_TAGS['snapshot']
+# The customer's snapshot_retention_days, when tagged, overrides --daily
+RETENTION_TAG = 'RetentionDays'
+
+
+class Policy(NamedTuple):
+    daily: int = 7
+    weekly: int = 4
+    monthly: int = 6
+
+
+class Snapshot(NamedTuple):
+    snapshot_id: str
+    volume_id: str
+    domain: str
+    started: datetime
+    size_gb: int
+    retention_days: Optional[int] = None
+
+
+def list_snapshots(region: Optional[str] = None) -> List[Snapshot]:
+    """Completed, unpinned, automatic Neo snapshots (paginated, 1000 per call)"""
+    ec2 = aws.client('ec2', region)
+    snapshots = []
+    pages = ec2.get_paginator('describe_snapshots').paginate(
+        OwnerIds=['self'], Filters=[{'Name': 'tag-key', 'Values': ['Domain']},
+                                    {'Name': 'status', 'Values': ['completed']}],
+        PaginationConfig={'PageSize': 1000})
+
+    for page in pages:
+        for s in page['Snapshots']:
+            tags = {t['Key']: t['Value'] for t in s.get('Tags', [])}
+            if DLM_TAG in tags or tags.get(PIN_TAG, '').lower() == 'true' or tags.get('Type') == MANUAL_TYPE:
+                continue
+            retention = tags.get(RETENTION_TAG, '')
+            snapshots.append(Snapshot(s['SnapshotId'], s['VolumeId'], tags['Domain'], s['StartTime'],
+                                      s.get('VolumeSize', 0), int(retention) if retention.isdigit() else None))
+    return snapshots
+
+
+def keep_set(snapshots: List[Snapshot], policy: Policy) -> Set[str]:
+    """Newest snapshot per day/ISO week/month, for the most recent N of each"""
+    ordered = sorted(snapshots, key=lambda s: s.started, reverse=True)
+    keep: Set[str] = set()
+    tiers = (
+        (policy.daily, lambda t: t.date()),
+        (policy.weekly, lambda t: t.isocalendar()[:2]),
+        (policy.monthly, lambda t: (t.year, t.month)),
+    )
+    for count, bucket in tiers:
+        seen = set()
+        for snapshot in ordered:
+            if len(seen) >= count:
+                break
+            key = bucket(snapshot.started.astimezone(timezone.utc))
+            if key not in seen:
+                seen.add(key)
+                keep.add(snapshot.snapshot_id)
+    return keep
+
+
+def plan(snapshots: Iterable[Snapshot], policy: Policy) -> List[Snapshot]:
+    """Snapshots to delete, computed per volume"""
+    by_volume: Dict[str, List[Snapshot]] = {}
+    for snapshot in snapshots:
+        by_volume.setdefault(snapshot.volume_id, []).append(snapshot)
+
+    expired = []
+    for volume_snapshots in by_volume.values():
+        days = [s.retention_days for s in volume_snapshots if s.retention_days is not None]
+        keep = keep_set(volume_snapshots, policy._replace(daily=max(days)) if days else policy)
+        expired.extend(s for s in volume_snapshots if s.snapshot_id not in keep)
+    return expired
+
+
+class DeletionPool:
+    """Workers deleting snapshots; throttling is left to the governor and botocore's retries"""
+
+    def __init__(self, workers: int = 8, region: Optional[str] = None):
+        self.workers = workers
+        self.region = region
+
+    def _delete(self, snapshot: Snapshot) -> Optional[str]:
+        try:
+            aws.client('ec2', self.region).delete_snapshot(SnapshotId=snapshot.snapshot_id)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == 'InvalidSnapshot.NotFound':
+                return None
+            # InvalidSnapshot.InUse (still backing an AMI), or throttled past botocore's retries
+            return code
+        return None
+
+    def run(self, snapshots: List[Snapshot]) -> Dict[str, str]:
+        """Delete all; returns snapshot_id -> error code for the failures"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(self._delete, snapshots)
+            return {s.snapshot_id: error for s, error in zip(snapshots, results) if error}
+
+
+def report(expired: List[Snapshot], failures: Dict[str, str], total: int, dry_run: bool) -> Dict:
+    deleted = [s for s in expired if s.snapshot_id not in failures]
+    by_domain: Dict[str, Dict] = {}
+    for s in deleted:
+        row = by_domain.setdefault(s.domain, {'snapshots': 0, 'gb': 0})
+        row['snapshots'] += 1
+        row['gb'] += s.size_gb
+    return {
+        'dry_run': dry_run,
+        'scanned': total,
+        'deleted': len(deleted),
+        'failed': len(failures),
+        'reclaimed_gb': sum(s.size_gb for s in deleted),
+        'by_domain': by_domain,
+        'failures': failures,
+    }
+
+
+def prune_index(snapshot_ids: Set[str], index: Optional[BackupIndex] = None):
+    """Drop deleted snapshots (and emptied backups) from the backup index"""
+    index = index or BackupIndex()
+    with index.update() as data:
+        for backup_id in list(data['backups']):
+            backup = data['backups'][backup_id]
+            backup['snapshots'] = {k: v for k, v in backup['snapshots'].items() if k not in snapshot_ids}
+            if not backup['snapshots']:
+                del data['backups'][backup_id]
+            else:
+                backup['volumes'] = sorted({s['volume_id'] for s in backup['snapshots'].values()})
+                backup['size_gb'] = sum(s['size_gb'] for s in backup['snapshots'].values())
+
+
+def run_retention(policy: Policy, dry_run: bool = True, workers: int = 8,
+                  region: Optional[str] = None) -> Dict:
+    started = time.monotonic()
+    snapshots = list_snapshots(region)
+    expired = plan(snapshots, policy)
+    failures: Dict[str, str] = {}
+
+    if not dry_run and expired:
+        failures = DeletionPool(workers=workers, region=region).run(expired)
+        prune_index({s.snapshot_id for s in expired} - set(failures))
+
+    result = report(expired, failures, len(snapshots), dry_run)
+    print(f"🧹 {'Would delete' if dry_run else 'Deleted'} {result['deleted']} of {len(snapshots)} snapshots, "
+          f"{result['reclaimed_gb']} GB, in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Prune Neo snapshots by day/week/month retention')
+    defaults = Policy()
+    parser.add_argument('--daily', type=int, default=defaults.daily, help='Days to keep one snapshot for')
+    parser.add_argument('--weekly', type=int, default=defaults.weekly, help='Weeks to keep one snapshot for')
+    parser.add_argument('--monthly', type=int, default=defaults.monthly, help='Months to keep one snapshot for')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--region')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    policy = Policy(args.daily, args.weekly, args.monthly)
+    result = run_retention(policy, dry_run=args.dry_run, workers=args.workers, region=args.region)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Table Access
+Projected, batched reads of neo-instances and neo-dns-zones
+
+Scripts used to build a Table handle per call and read whole items with
+one GetItem per key, although most callers need two or three attributes.
+A Store reads only the attributes asked for (read capacity is charged on
+the bytes returned), groups point reads into BatchGetItem calls of up to
+100 keys, and retries UnprocessedKeys with jittered backoff until every
+key is answered. An optional read-through cache (cache_ttl) serves
+repeated reads within a run without touching the table.
+
+  python3 -m neo.store instances i-0abc i-0def --attributes domain public_ip
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from neo import aws
+from neo.config import DNS_ZONES_TABLE, INSTANCES_TABLE
+
+BATCH_SIZE = 100        # BatchGetItem key limit
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 0.05
+BACKOFF_CAP = 5.0
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class IncompleteRead(Exception):
+    pass
+
+
+def table(name: str, region: Optional[str] = None):
+    """Table handle, built once per (table, region)"""
+    key = (name, region)
+    with _tables_lock:
+        if key not in _tables:
+            _tables[key] = aws.resource('dynamodb', region).Table(name)
+        return _tables[key]
+
+
+def projection(attributes: Iterable[str]) -> Tuple[str, Dict[str, str]]:
+    """ProjectionExpression with every name aliased (domain, status, ... are reserved words)"""
+    names = {f"#p{i}": attr for i, attr in enumerate(dict.fromkeys(attributes))}
+    return ', '.join(names), names
+
+
+def batch_get(table_name: str, key_name: str, keys: Iterable[str], attributes: Optional[Sequence[str]] = None,
+              region: Optional[str] = None, consistent: bool = False) -> Dict[str, Dict]:
+    """key -> item for every key that exists, in BatchGetItem calls of 100"""
+    keys = list(dict.fromkeys(keys))
+    request: Dict = {'ConsistentRead': consistent}
+    if attributes:
+        # The key is needed to match items back to the keys asked for
+        expression, names = projection([key_name, *attributes])
+        request.update(ProjectionExpression=expression, ExpressionAttributeNames=names)
+
+    dynamodb = aws.resource('dynamodb', region)
+    items: Dict[str, Dict] = {}
+    for offset in range(0, len(keys), BATCH_SIZE):
+        pending = {table_name: dict(request, Keys=[{key_name: k} for k in keys[offset:offset + BATCH_SIZE]])}
+        for attempt in range(MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            for item in response['Responses'].get(table_name, []):
+                items[item[key_name]] = item
+            pending = response.get('UnprocessedKeys') or {}
+            if not pending:
+                break
+            if attempt < MAX_ATTEMPTS - 1:
+                # Partly served (throttled or over the 16 MB response limit); back off and ask again
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+        else:
+            missing = len(pending[table_name]['Keys'])
+            raise IncompleteRead(f"{missing} key(s) of {table_name} unprocessed after {MAX_ATTEMPTS} attempts")
+    return items
+
+
+class Store:
+    """Reads of one table by its hash key, projected to `attributes` by default"""
+
+    def __init__(self, table_name: str, key_name: str, attributes: Optional[Sequence[str]] = None,
+                 cache_ttl: float = 0.0, region: Optional[str] = None):
+        self.table_name = table_name
+        self.key_name = key_name
+        self.attributes = tuple(attributes or ())
+        self.cache_ttl = cache_ttl
+        self.region = region
+        self.cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, Dict]] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def table(self):
+        return table(self.table_name, self.region)
+
+    def _cached(self, key: str, attributes: Tuple[str, ...]) -> Optional[Dict]:
+        if not self.cache_ttl:
+            return None
+        with self.lock:
+            entry = self.cache.get((key, attributes))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _remember(self, items: Dict[str, Dict], attributes: Tuple[str, ...]):
+        if not self.cache_ttl:
+            return
+        expires = time.monotonic() + self.cache_ttl
+        with self.lock:
+            for key, item in items.items():
+                self.cache[(key, attributes)] = (expires, item)
+
+    def get(self, key: str, attributes: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """One item (projected), or None"""
+        attributes = tuple(attributes) if attributes is not None else self.attributes
+        item = self._cached(key, attributes)
+        if item is not None:
+            return item
+
+        kwargs = {'Key': {self.key_name: key}}
+        if attributes:
+            kwargs['ProjectionExpression'], kwargs['ExpressionAttributeNames'] = projection(
+                [self.key_name, *attributes])
+        item = self.table.get_item(**kwargs).get('Item')
+        if item:
+            self._remember({key: item}, attributes)
+        return item
+
+    def get_many(self, keys: Iterable[str], attributes: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """key -> item for the keys that exist, cached ones without a read"""
+        attributes = tuple(attributes) if attributes is not None else self.attributes
+        items: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for key in dict.fromkeys(keys):
+            item = self._cached(key, attributes)
+            if item is None:
+                missing.append(key)
+            else:
+                items[key] = item
+        if missing:
+            fetched = batch_get(self.table_name, self.key_name, missing, attributes, self.region)
+            self._remember(fetched, attributes)
+            items.update(fetched)
+        return items
+
+    def put(self, item: Dict):
+        self.table.put_item(Item=item)
+        self.invalidate(item[self.key_name])
+
+    def invalidate(self, key: Optional[str] = None):
+        with self.lock:
+            if key is None:
+                self.cache.clear()
+            else:
+                for cached in [k for k in self.cache if k[0] == key]:
+                    del self.cache[cached]
+
+
+# What health checks and provisioning read; callers can ask for more per call
+instances = Store(INSTANCES_TABLE, 'instance_id', ('domain', 'public_ip', 'panel', 'status', 'aws_region'))
+dns_zones = Store(DNS_ZONES_TABLE, 'domain', ('zone_id', 'server_ip', 'ns1_ip', 'ns2_ip', 'status'))
+
+STORES = {'instances': instances, 'dns-zones': dns_zones}
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Batched, projected reads of the neo tables')
+    parser.add_argument('store', choices=sorted(STORES))
+    parser.add_argument('keys', nargs='+')
+    parser.add_argument('--attributes', nargs='*', help='Attributes to read (default: the store\'s projection)')
+    args = parser.parse_args()
+
+    store = STORES[args.store]
+    items = store.get_many(args.keys, args.attributes)
+    for key in args.keys:
+        if key in items:
+            print(json.dumps(items[key], default=str))
+        else:
+            print(f"❌ {key}: not found", file=sys.stderr)
+    sys.exit(0 if len(items) == len(set(args.keys)) else 1)
+
+
+if __name__ == '__main__':
+    main()
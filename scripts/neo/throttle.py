@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Neo VPS AWS Throttling Governor
+One process-wide view of AWS API throttling, installed through botocore events
+
+Every client created after install() (neo.aws clients and the plain
+boto3.client() calls in the scripts alike) sends each attempt through a
+token budget for its service/operation. A throttled response halves that
+budget and holds it for a jittered backoff, so every thread calling the
+same API slows down together instead of retrying into each other; each
+success grows it back a little (AIMD). botocore still decides whether to
+retry; the governor only decides when the next attempt may go out.
+
+Route53 limits are per account rather than per API, so it has a single
+budget shared by all of its operations.
+"""
+
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import boto3
+
+ENABLED = os.environ.get('NEO_AWS_GOVERNOR', '1') != '0'
+
+# Starting (and maximum) requests per second by botocore service ID
+# (hyphenated, as in event names); AIMD works below this
+SERVICE_RATES = {
+    'route-53': 5.0,
+    'ec2': 100.0,
+    'dynamodb': 1000.0,
+    'sns': 30.0,
+    'cloudwatch': 50.0,
+}
+DEFAULT_RATE = 50.0
+MIN_RATE = 0.5
+SHARED_SERVICES = ('route-53',)
+
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 20.0
+DECREASE_COOLDOWN = 1.0
+
+THROTTLE_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'RequestThrottled', 'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException',
+    'LimitExceededException', 'BandwidthLimitExceeded', 'TransactionInProgressException',
+}
+
+
+class Budget:
+    """Token bucket whose rate is adjusted additively up, multiplicatively down"""
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.streak = 0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must wait for it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+
+    def throttled(self):
+        with self.lock:
+            now = time.monotonic()
+            # One burst of throttles from in-flight calls counts as one signal
+            if now - self.last_decrease < DECREASE_COOLDOWN:
+                return
+            self.last_decrease = now
+            self.streak += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            # Full jitter, so waiting threads don't all come back at once
+            backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** self.streak))
+            self.blocked_until = max(self.blocked_until, now + backoff)
+
+    def succeeded(self):
+        with self.lock:
+            self.streak = 0
+            if self.rate < self.max_rate:
+                # About +1 req/s per second's worth of successful calls
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+
+
+class Governor:
+    """Budgets and counters for every service/operation this process calls"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.rates = dict(SERVICE_RATES, **(rates or {}))
+        self.budgets: Dict[Tuple[str, str], Budget] = {}
+        self.counters = {'calls': 0, 'paced': 0, 'wait_seconds': 0.0, 'throttled': 0, 'retries': 0}
+        self.by_key: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def _key(self, event_name: str) -> Tuple[str, str]:
+        # e.g. before-send.route-53.ChangeResourceRecordSets
+        parts = event_name.split('.')
+        service = parts[1] if len(parts) > 1 else '*'
+        operation = parts[2] if len(parts) > 2 and service not in SHARED_SERVICES else '*'
+        return service, operation
+
+    def budget(self, key: Tuple[str, str]) -> Budget:
+        budget = self.budgets.get(key)
+        if budget is None:
+            with self.lock:
+                budget = self.budgets.setdefault(key, Budget(self.rates.get(key[0], DEFAULT_RATE)))
+        return budget
+
+    def _count(self, key: Tuple[str, str], name: str, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+            row = self.by_key.setdefault(key, {'calls': 0, 'paced': 0, 'throttled': 0, 'retries': 0})
+            if name in row:
+                row[name] += amount
+
+    # ================================================================
+    # BOTOCORE HOOKS
+    # ================================================================
+
+    def before_send(self, event_name: str = '', **kwargs):
+        """Every attempt, retries included, waits for a token"""
+        key = self._key(event_name)
+        wait = self.budget(key).reserve()
+        self._count(key, 'calls')
+        if wait > 0:
+            self._count(key, 'paced')
+            self._count(key, 'wait_seconds', wait)
+            time.sleep(wait)
+        # None: carry on with the real HTTP request
+
+    def needs_retry(self, event_name: str = '', response=None, **kwargs):
+        """Feed each attempt's outcome into its budget; the retry decision stays with botocore"""
+        if response is None:
+            # Connection error, not a throttle
+            return None
+        http_response, parsed = response
+        code = parsed.get('Error', {}).get('Code', '') if isinstance(parsed, dict) else ''
+        key = self._key(event_name)
+        if code in THROTTLE_CODES or http_response.status_code == 429:
+            self._count(key, 'throttled')
+            self.budget(key).throttled()
+        elif http_response.status_code < 500:
+            self.budget(key).succeeded()
+        return None
+
+    def after_call(self, event_name: str = '', parsed=None, **kwargs):
+        retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        if retries:
+            self._count(self._key(event_name), 'retries', retries)
+
+    def register(self, events):
+        events.register_first('before-send', self.before_send, unique_id='neo-governor-send')
+        events.register_first('needs-retry', self.needs_retry, unique_id='neo-governor-retry')
+        events.register('after-call', self.after_call, unique_id='neo-governor-after')
+
+    # ================================================================
+    # REPORTING
+    # ================================================================
+
+    def stats(self) -> Dict:
+        """Counters plus the current rate of every budget in use"""
+        with self.lock:
+            counters = dict(self.counters)
+            by_key = {f"{s}.{o}": dict(row) for (s, o), row in self.by_key.items()}
+        for name, row in by_key.items():
+            budget = self.budgets.get(tuple(name.split('.', 1)))
+            if budget:
+                row['rate'] = round(budget.rate, 2)
+        counters['wait_seconds'] = round(counters['wait_seconds'], 3)
+        counters['budgets'] = by_key
+        return counters
+
+    def report(self):
+        stats = self.stats()
+        if not stats['throttled'] and not stats['paced']:
+            return
+        print(f"🚦 AWS governor: {stats['calls']} attempts, {stats['paced']} paced "
+              f"({stats['wait_seconds']}s), {stats['throttled']} throttled, {stats['retries']} retries",
+              file=sys.stderr)
+        for name, row in sorted(stats['budgets'].items()):
+            if row['throttled'] or row['paced']:
+                print(f"  {name:<45} {row['rate']:>8}/s  paced {row['paced']}  throttled {row['throttled']}",
+                      file=sys.stderr)
+
+
+governor = Governor()
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install(session: Optional[boto3.Session] = None):
+    """Hook the governor into a session (default: boto3's default session)
+
+    Clients copy the session's hooks when they are created, so this has to
+    run before the clients it should cover; neo.aws does it on import.
+    """
+    global _installed
+    if not ENABLED:
+        return
+    with _install_lock:
+        if session is None:
+            if _installed:
+                return
+            if boto3.DEFAULT_SESSION is None:
+                boto3.setup_default_session()
+            session = boto3.DEFAULT_SESSION
+            _installed = True
+            atexit.register(governor.report)
+        governor.register(session.events)
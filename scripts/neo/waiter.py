@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Readiness Waiter
+One service that waits for every in-flight instance to become ready
+
+Instead of one polling loop per new server, each tick resolves EC2 state for
+all tracked instances with bulk describe calls (grouped by region) and probes
+panels with bounded concurrency. Callers get a Future that resolves as soon
+as their instance is running and its panel answers.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from neo import aws
+from neo.panels import panel_ready
+
+# describe_instances accepts up to 1000 IDs, keep requests comfortably small
+DESCRIBE_BATCH = 200
+
+FAILED_STATES = ('shutting-down', 'terminated', 'stopping', 'stopped')
+
+
+class InstanceNotReady(Exception):
+    """The instance failed or timed out before becoming ready"""
+
+
+class _Tracked:
+    def __init__(self, instance_id: str, panel: str, region: Optional[str], deadline: float):
+        self.instance_id = instance_id
+        self.panel = panel
+        self.region = region
+        self.deadline = deadline
+        self.future: Future = Future()
+        self.ip: Optional[str] = None
+        self.probing = False
+
+
+class ReadinessWaiter:
+    """Tracks in-flight instances and resolves a Future per instance"""
+
+    def __init__(self, tick: float = 15, probe_concurrency: int = 16, timeout: float = 900,
+                 probe: Callable[[str, str], bool] = panel_ready):
+        self.tick = tick
+        self.timeout = timeout
+        self.probe = probe
+        self.tracked: Dict[str, _Tracked] = {}
+        self.lock = threading.Lock()
+        self.probes = ThreadPoolExecutor(max_workers=probe_concurrency, thread_name_prefix='neo-probe')
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def watch(self, instance_id: str, panel: str = 'none', region: Optional[str] = None,
+              timeout: Optional[float] = None) -> Future:
+        """Start tracking an instance; returns a Future resolving to its public IP"""
+        with self.lock:
+            if instance_id in self.tracked:
+                return self.tracked[instance_id].future
+            entry = _Tracked(instance_id, panel, region, time.monotonic() + (timeout or self.timeout))
+            self.tracked[instance_id] = entry
+
+        self.start()
+        return entry.future
+
+    def wait(self, instance_id: str, panel: str = 'none', region: Optional[str] = None,
+             timeout: Optional[float] = None) -> str:
+        """Block until the instance is ready; returns its public IP"""
+        return self.watch(instance_id, panel, region, timeout).result()
+
+    def pending(self) -> int:
+        with self.lock:
+            return len(self.tracked)
+
+    # ================================================================
+    # POLLING LOOP
+    # ================================================================
+
+    def _finish(self, entry: _Tracked, ip: Optional[str] = None, error: Optional[str] = None):
+        with self.lock:
+            if self.tracked.pop(entry.instance_id, None) is None:
+                return
+        if error:
+            entry.future.set_exception(InstanceNotReady(f"{entry.instance_id}: {error}"))
+        else:
+            entry.future.set_result(ip)
+
+    def _describe(self, region: Optional[str], instance_ids: List[str]) -> Dict[str, Dict]:
+        """EC2 state for many instances in as few calls as possible"""
+        ec2 = aws.client('ec2', region)
+        found = {}
+
+        for i in range(0, len(instance_ids), DESCRIBE_BATCH):
+            paginator = ec2.get_paginator('describe_instances')
+            pages = paginator.paginate(Filters=[{
+                'Name': 'instance-id',
+                'Values': instance_ids[i:i + DESCRIBE_BATCH],
+            }])
+            for page in pages:
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        found[instance['InstanceId']] = instance
+        return found
+
+    def _probe(self, entry: _Tracked):
+        try:
+            ready = self.probe(entry.ip, entry.panel)
+        except Exception:
+            ready = False
+
+        if ready:
+            self._finish(entry, ip=entry.ip)
+        else:
+            entry.probing = False
+
+    def poll_once(self):
+        """One tick: bulk describe, then schedule panel probes"""
+        now = time.monotonic()
+
+        with self.lock:
+            entries = list(self.tracked.values())
+
+        by_region: Dict[Optional[str], List[_Tracked]] = {}
+        for entry in entries:
+            if now > entry.deadline:
+                self._finish(entry, error='timed out waiting for readiness')
+                continue
+            by_region.setdefault(entry.region, []).append(entry)
+
+        for region, group in by_region.items():
+            try:
+                states = self._describe(region, [e.instance_id for e in group])
+            except Exception as e:
+                print(f"⚠️  describe_instances failed for {region or 'default region'}: {e}")
+                continue
+
+            for entry in group:
+                instance = states.get(entry.instance_id)
+                if not instance:
+                    # Not visible yet (eventual consistency right after launch)
+                    continue
+
+                state = instance['State']['Name']
+                if state in FAILED_STATES:
+                    self._finish(entry, error=f"instance is {state}")
+                    continue
+                if state != 'running' or entry.probing:
+                    continue
+
+                entry.ip = instance.get('PublicIpAddress') or instance.get('PrivateIpAddress')
+                entry.probing = True
+                self.probes.submit(self._probe, entry)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if self.pending():
+                self.poll_once()
+            self.stop_event.wait(self.tick)
+
+    def start(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='neo-waiter', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.probes.shutdown(wait=False)
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Wait for instances to become ready')
+    parser.add_argument('instances', nargs='+', help='instance_id[:panel] entries')
+    parser.add_argument('--region')
+    parser.add_argument('--timeout', type=float, default=900)
+    parser.add_argument('--tick', type=float, default=15)
+    args = parser.parse_args()
+
+    waiter = ReadinessWaiter(tick=args.tick, timeout=args.timeout)
+    futures = {}
+    for spec in args.instances:
+        instance_id, _, panel = spec.partition(':')
+        futures[instance_id] = waiter.watch(instance_id, panel or 'none', args.region)
+
+    failed = 0
+    for instance_id, future in futures.items():
+        try:
+            print(f"✅ {instance_id} ready ({future.result()})")
+        except InstanceNotReady as e:
+            print(f"❌ {e}")
+            failed += 1
+
+    waiter.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
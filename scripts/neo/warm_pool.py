@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Warm Pool
+Keeps pre-booted Golden AMI instances per (plan, region, panel) ready to hand out
+
+Warm instances are launched with the panel user-data and only become `ready`
+once the panel install has finished, so an order skips the 15-90 minute
+install. Claims go through a conditional DynamoDB update, so two orders can
+never receive the same instance. The pool table (neo-warm-pool) uses
+pool_key as partition key and instance_id as sort key.
+"""
+
+import argparse
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from neo import aws
+from neo.catalog import load_catalog
+from neo.config import REPO_ROOT, WARM_POOL_TABLE
+from neo.dns_cache import zone_cache
+from neo.panels import panel_ready
+
+USER_DATA_DIR = os.path.join(REPO_ROOT, 'modules', 'panel-server', 'user-data')
+
+POOL_TAG = 'neo:warm-pool'
+STATE_TAG = 'neo:pool-state'
+
+
+def pool_key(plan: str, region: str, panel: str) -> str:
+    return f"{plan}|{region}|{panel}"
+
+
+def render_user_data(panel: str, hostname: str) -> str:
+    """Render a panel user-data template the way templatefile() would"""
+    with open(os.path.join(USER_DATA_DIR, f"{panel}.sh.tpl")) as f:
+        template = f.read()
+    return template.replace('${domain}', hostname).replace('$${', '${')
+
+
+class WarmPool:
+    """Warm pool manager for one Golden AMI"""
+
+    def __init__(self, ami_id: str, sizes: Dict[tuple, int], subnet_ids: Optional[Dict[str, str]] = None,
+                 security_group_ids: Optional[Dict[str, List[str]]] = None, table_name: str = WARM_POOL_TABLE,
+                 probe: Callable[[str, str], bool] = panel_ready):
+        """sizes maps (plan, region, panel) to the number of instances to keep ready"""
+        self.ami_id = ami_id
+        self.sizes = sizes
+        self.subnet_ids = subnet_ids or {}
+        self.security_group_ids = security_group_ids or {}
+        self.table_name = table_name
+        self.probe = probe
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+    def _table(self, region: str):
+        return aws.resource('dynamodb', region).Table(self.table_name)
+
+    def members(self, plan: str, region: str, panel: str, state: Optional[str] = None) -> List[Dict]:
+        """Pool members for one key, optionally filtered by state"""
+        kwargs = {'KeyConditionExpression': Key('pool_key').eq(pool_key(plan, region, panel))}
+        if state:
+            kwargs['FilterExpression'] = Attr('state').eq(state)
+
+        items = []
+        table = self._table(region)
+        while True:
+            response = table.query(**kwargs)
+            items.extend(response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    # ================================================================
+    # LAUNCH & PROMOTE
+    # ================================================================
+
+    def launch(self, plan: str, region: str, panel: str, count: int) -> List[str]:
+        """Launch `count` warm instances for one pool key"""
+        if count <= 0:
+            return []
+
+        key = pool_key(plan, region, panel)
+        ec2 = aws.client('ec2', region)
+        hostname = f"warm-{plan}-{panel}.neo.internal"
+
+        params = {
+            'ImageId': self.ami_id,
+            'InstanceType': load_catalog().instance_types[plan],
+            'MinCount': count,
+            'MaxCount': count,
+            'UserData': render_user_data(panel, hostname),
+            'TagSpecifications': [{
+                'ResourceType': 'instance',
+                'Tags': [
+                    {'Key': 'Name', 'Value': f"neo-warm-{plan}-{panel}"},
+                    {'Key': POOL_TAG, 'Value': key},
+                    {'Key': STATE_TAG, 'Value': 'warming'},
+                    {'Key': 'Plan', 'Value': plan},
+                    {'Key': 'Panel', 'Value': panel},
+                ],
+            }],
+        }
+        if region in self.subnet_ids:
+            params['SubnetId'] = self.subnet_ids[region]
+        if region in self.security_group_ids:
+            params['SecurityGroupIds'] = self.security_group_ids[region]
+
+        response = ec2.run_instances(**params)
+        instance_ids = [i['InstanceId'] for i in response['Instances']]
+
+        table = self._table(region)
+        with table.batch_writer() as batch:
+            for instance_id in instance_ids:
+                batch.put_item(Item={
+                    'pool_key': key,
+                    'instance_id': instance_id,
+                    'state': 'warming',
+                    'launched_at': datetime.utcnow().isoformat(),
+                })
+
+        print(f"🔥 Launched {len(instance_ids)} warm instance(s) for {key}")
+        return instance_ids
+
+    def _set_state(self, region: str, key: str, instance_id: str, expected: str, state: str,
+                   remove: str = '') -> bool:
+        """Conditional state change; False when another worker got there first"""
+        try:
+            self._table(region).update_item(
+                Key={'pool_key': key, 'instance_id': instance_id},
+                UpdateExpression=f"SET #s = :state, {state}_at = :now" + (f" REMOVE {remove}" if remove else ''),
+                ConditionExpression='#s = :expected',
+                ExpressionAttributeNames={'#s': 'state'},
+                ExpressionAttributeValues={
+                    ':state': state,
+                    ':expected': expected,
+                    ':now': datetime.utcnow().isoformat(),
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+
+    def promote(self, plan: str, region: str, panel: str) -> List[str]:
+        """Move warming instances whose panel install finished to ready
+
+        Warming instances that stopped, were terminated or no longer exist
+        are marked failed (and terminated), so refill replaces them.
+        """
+        warming = self.members(plan, region, panel, state='warming')
+        if not warming:
+            return []
+
+        ec2 = aws.client('ec2', region)
+        key = pool_key(plan, region, panel)
+        ids = [item['instance_id'] for item in warming]
+
+        # A filter (unlike InstanceIds=) doesn't fail the whole call when one ID is gone
+        found = {}
+        for page in ec2.get_paginator('describe_instances').paginate(
+                Filters=[{'Name': 'instance-id', 'Values': ids}]):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    found[instance['InstanceId']] = instance
+
+        promoted, failed = [], []
+        for instance_id in ids:
+            instance = found.get(instance_id)
+            state = instance['State']['Name'] if instance else 'missing'
+            if state == 'pending':
+                continue
+            if state != 'running':
+                if self._set_state(region, key, instance_id, 'warming', 'failed'):
+                    failed.append(instance_id)
+                continue
+
+            ip = instance.get('PublicIpAddress') or instance.get('PrivateIpAddress')
+            if not self.probe(ip, panel):
+                continue
+            if not self._set_state(region, key, instance_id, 'warming', 'ready'):
+                continue
+            ec2.create_tags(Resources=[instance_id], Tags=[{'Key': STATE_TAG, 'Value': 'ready'}])
+            promoted.append(instance_id)
+
+        if failed:
+            # Stopped ones would otherwise sit there costing EBS; gone ones are dropped by EC2 anyway
+            present = [i for i in failed if i in found]
+            if present:
+                ec2.terminate_instances(InstanceIds=present)
+            print(f"❌ {len(failed)} warm instance(s) failed in {key}: {', '.join(failed)}")
+        if promoted:
+            print(f"✅ {len(promoted)} instance(s) ready in {key}")
+        return promoted
+
+    def refill(self, plan: str, region: str, panel: str) -> List[str]:
+        """Top the pool up to its target size (warming + ready)"""
+        target = self.sizes.get((plan, region, panel), 0)
+        live = [m for m in self.members(plan, region, panel) if m['state'] in ('warming', 'ready')]
+        return self.launch(plan, region, panel, target - len(live))
+
+    def refill_async(self, plan: str, region: str, panel: str) -> Optional[threading.Thread]:
+        """Refill in a background thread; at most one refill per key at a time"""
+        key = pool_key(plan, region, panel)
+        with self._lock:
+            if key in self._refilling:
+                return None
+            self._refilling.add(key)
+
+        def run():
+            try:
+                self.refill(plan, region, panel)
+            except Exception as e:
+                print(f"⚠️  Warm pool refill failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+        thread = threading.Thread(target=run, name=f"warm-refill-{key}", daemon=True)
+        thread.start()
+        return thread
+
+    def reconcile(self):
+        """Promote finished installs and refill every configured pool"""
+        for plan, region, panel in self.sizes:
+            self.promote(plan, region, panel)
+            self.refill(plan, region, panel)
+
+    # ================================================================
+    # CLAIM
+    # ================================================================
+
+    def _try_claim(self, plan: str, region: str, panel: str, domain: str) -> Optional[str]:
+        table = self._table(region)
+        key = pool_key(plan, region, panel)
+
+        for item in self.members(plan, region, panel, state='ready'):
+            try:
+                table.update_item(
+                    Key={'pool_key': key, 'instance_id': item['instance_id']},
+                    UpdateExpression='SET #s = :claimed, claimed_by = :domain, claimed_at = :now',
+                    ConditionExpression='#s = :ready',
+                    ExpressionAttributeNames={'#s': 'state'},
+                    ExpressionAttributeValues={
+                        ':claimed': 'claimed',
+                        ':ready': 'ready',
+                        ':domain': domain,
+                        ':now': datetime.utcnow().isoformat(),
+                    },
+                )
+                return item['instance_id']
+            except ClientError as e:
+                # Another order won this instance; try the next one
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        return None
+
+    def _delete_zone(self, zone_id: str, domain: str):
+        """Remove a hosted zone a failed claim created, records first (Route53 refuses non-empty zones)"""
+        route53 = aws.client('route53')
+        apex = f"{domain.rstrip('.')}."
+        try:
+            changes = []
+            for page in route53.get_paginator('list_resource_record_sets').paginate(HostedZoneId=zone_id):
+                for rrset in page['ResourceRecordSets']:
+                    # The apex SOA and NS go with the zone itself
+                    if rrset['Name'] == apex and rrset['Type'] in ('SOA', 'NS'):
+                        continue
+                    changes.append({'Action': 'DELETE', 'ResourceRecordSet': rrset})
+            if changes:
+                route53.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch={'Changes': changes})
+            route53.delete_hosted_zone(Id=zone_id)
+            zone_cache.invalidate(zone_id)
+        except ClientError as e:
+            print(f"⚠️  Could not delete hosted zone {zone_id} of {domain}: {e}")
+
+    def _release(self, plan: str, region: str, panel: str, instance_id: str, allocation: Optional[Dict],
+                 association: Optional[str]):
+        """Undo a failed claim: drop the Elastic IP, restore the warm tags and put the row back to ready"""
+        ec2 = aws.client('ec2', region)
+        if allocation:
+            try:
+                if association:
+                    ec2.disassociate_address(AssociationId=association)
+                ec2.release_address(AllocationId=allocation['AllocationId'])
+            except ClientError as e:
+                print(f"⚠️  Could not release {allocation['PublicIp']}: {e}")
+        try:
+            ec2.delete_tags(Resources=[instance_id], Tags=[{'Key': 'Customer'}, {'Key': 'Domain'}])
+            ec2.create_tags(Resources=[instance_id], Tags=[
+                {'Key': 'Name', 'Value': f"neo-warm-{plan}-{panel}"},
+                {'Key': STATE_TAG, 'Value': 'ready'},
+            ])
+        except ClientError as e:
+            print(f"⚠️  Could not restore the tags of {instance_id}: {e}")
+        self._set_state(region, pool_key(plan, region, panel), instance_id, 'claimed', 'ready',
+                        remove='claimed_by, claimed_at')
+        print(f"↩️  Returned {instance_id} to {pool_key(plan, region, panel)}")
+
+    def claim(self, plan: str, region: str, panel: str, domain: str, customer_id: str,
+              ns1_ip: Optional[str] = None, ns2_ip: Optional[str] = None,
+              refill: bool = True) -> Optional[Dict]:
+        """Hand a ready instance to an order; None when the pool is empty"""
+        instance_id = self._try_claim(plan, region, panel, domain)
+
+        if refill:
+            self.refill_async(plan, region, panel)
+
+        if not instance_id:
+            print(f"⚠️  Warm pool empty for {pool_key(plan, region, panel)}")
+            return None
+
+        ec2 = aws.client('ec2', region)
+        allocation = association = zone_id = None
+        try:
+            # Retag for the customer
+            ec2.create_tags(Resources=[instance_id], Tags=[
+                {'Key': 'Name', 'Value': f"neo-{domain}"},
+                {'Key': 'Customer', 'Value': customer_id},
+                {'Key': 'Domain', 'Value': domain},
+                {'Key': STATE_TAG, 'Value': 'claimed'},
+            ])
+
+            # Re-IP: a fresh Elastic IP so the customer never inherits a warm address
+            allocation = ec2.allocate_address(Domain='vpc')
+            association = ec2.associate_address(InstanceId=instance_id,
+                                                AllocationId=allocation['AllocationId'])['AssociationId']
+            ec2.create_tags(Resources=[allocation['AllocationId']], Tags=[
+                {'Key': 'Customer', 'Value': customer_id},
+                {'Key': 'Domain', 'Value': domain},
+            ])
+            server_ip = allocation['PublicIp']
+
+            if ns1_ip:
+                from neo.legacy import dns_automation
+
+                dns = dns_automation().DNSAutomation(domain, server_ip, ns1_ip, ns2_ip)
+                created_id, nameservers = dns.create_hosted_zone()
+                # No nameservers back means the zone already existed; that one is left alone
+                zone_id = created_id if nameservers else None
+                dns.create_dns_records()
+                dns.save_to_dynamodb()
+        except Exception:
+            if zone_id:
+                # Otherwise a retry creates a second zone for the domain
+                self._delete_zone(zone_id, domain)
+            self._release(plan, region, panel, instance_id, allocation, association)
+            raise
+
+        print(f"🎯 Claimed {instance_id} for {domain} ({server_ip})")
+
+        return {
+            'instance_id': instance_id,
+            'elastic_ip': server_ip,
+            'allocation_id': allocation['AllocationId'],
+            'plan': plan,
+            'region': region,
+            'panel': panel,
+        }
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Maintain the Neo VPS warm pool')
+    parser.add_argument('--ami', required=True, help='Golden AMI ID')
+    parser.add_argument('--pool', action='append', required=True,
+                        help='plan:region:panel=size, e.g. core:us-east-1:cyberpanel=3')
+    args = parser.parse_args()
+
+    sizes = {}
+    for spec in args.pool:
+        key, size = spec.split('=')
+        plan, region, panel = key.split(':')
+        sizes[(plan, region, panel)] = int(size)
+
+    WarmPool(args.ami, sizes).reconcile()
+
+
+if __name__ == '__main__':
+    main()
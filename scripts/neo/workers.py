@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Neo VPS Provisioning Worker Pool
+Runs many provisions in parallel under per-region, per-plan and per-API caps
+
+Jobs are queued per customer and dispatched round-robin, so one large order
+cannot starve everyone else. A job only starts when its region and plan have
+a free slot; the API-family caps (EC2 RunInstances, Route53 changes) are held
+only around the steps that call those APIs.
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from neo.orchestrator import ProvisioningOrchestrator, Step, build_default_steps
+from neo.waiter import ReadinessWaiter
+
+DEFAULT_CAPS = {
+    'region': {'default': 4},
+    'plan': {'default': 4},
+    'api': {
+        'ec2:RunInstances': 5,
+        'ec2:CreateVpc': 3,
+        'route53:ChangeResourceRecordSets': 3,
+    },
+}
+
+# API families each orchestrator step calls
+STEP_API_FAMILIES = {
+    'vpc_creating': ['ec2:CreateVpc'],
+    'ec2_launching': ['ec2:RunInstances'],
+    'dns_configuring': ['route53:ChangeResourceRecordSets'],
+}
+
+
+class Job:
+    """One queued provisioning request"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, domain: str, email: str, customer_id: Optional[str] = None,
+                 panel: str = 'cyberpanel', os_type: str = 'almalinux-8', plan: str = 'core',
+                 region: str = 'us-east-1', ns1_ip: Optional[str] = None, ns2_ip: Optional[str] = None):
+        self.job_id = f"job-{next(self._ids)}"
+        self.domain = domain
+        self.email = email
+        self.customer_id = customer_id or email
+        self.panel = panel
+        self.os_type = os_type
+        self.plan = plan
+        self.region = region
+        self.ns1_ip = ns1_ip
+        self.ns2_ip = ns2_ip
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def steps(self, waiter=None) -> List[Step]:
+        return build_default_steps(self.domain, self.email, self.panel, self.os_type,
+                                   self.plan, self.region, self.ns1_ip, self.ns2_ip, waiter=waiter)
+
+
+class CapacityLimiter:
+    """Named concurrency slots, e.g. ('region', 'us-east-1') -> 4"""
+
+    def __init__(self, caps: Dict[str, Dict[str, int]]):
+        self.caps = caps
+        self.in_use: Dict[tuple, int] = {}
+        self.cond = threading.Condition()
+
+    def limit(self, kind: str, name: str) -> Optional[int]:
+        table = self.caps.get(kind, {})
+        return table.get(name, table.get('default'))
+
+    def has_room(self, slots: List[tuple]) -> bool:
+        """Caller must hold self.cond"""
+        for kind, name in slots:
+            limit = self.limit(kind, name)
+            if limit is not None and self.in_use.get((kind, name), 0) >= limit:
+                return False
+        return True
+
+    def take(self, slots: List[tuple]):
+        """Caller must hold self.cond and have checked has_room()"""
+        for slot in slots:
+            self.in_use[slot] = self.in_use.get(slot, 0) + 1
+
+    def release(self, slots: List[tuple]):
+        with self.cond:
+            for slot in slots:
+                self.in_use[slot] -= 1
+            self.cond.notify_all()
+
+    @contextmanager
+    def hold(self, slots: List[tuple]):
+        """Block until all slots are free, then hold them"""
+        with self.cond:
+            while not self.has_room(slots):
+                self.cond.wait()
+            self.take(slots)
+        try:
+            yield
+        finally:
+            self.release(slots)
+
+
+class PoolStats:
+    """Queue depth, wait time and throughput counters"""
+
+    def __init__(self, window: float = 600):
+        self.window = window
+        self.waits = deque(maxlen=1000)
+        self.finished = deque()
+        self.completed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def record_start(self, job: Job):
+        with self.lock:
+            self.waits.append(job.started_at - job.enqueued_at)
+
+    def record_finish(self, job: Job):
+        with self.lock:
+            if job.status == 'completed':
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.finished.append(job.finished_at)
+
+    def snapshot(self, queue_depth: int, running: int) -> Dict:
+        with self.lock:
+            now = time.monotonic()
+            while self.finished and now - self.finished[0] > self.window:
+                self.finished.popleft()
+            waits = sorted(self.waits)
+
+            return {
+                'queue_depth': queue_depth,
+                'running': running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'wait_avg_sec': round(sum(waits) / len(waits), 2) if waits else 0.0,
+                'wait_p95_sec': round(waits[int(len(waits) * 0.95)], 2) if waits else 0.0,
+                'throughput_per_min': round(len(self.finished) * 60 / self.window, 2),
+            }
+
+
+class ProvisioningPool:
+    """Fair, capped worker pool for provisioning jobs"""
+
+    def __init__(self, workers: int = 8, caps: Optional[Dict] = None,
+                 runner: Optional[Callable[[Job, CapacityLimiter], None]] = None, waiter=None):
+        self.workers = workers
+        self.limiter = CapacityLimiter(caps or DEFAULT_CAPS)
+        self.runner = runner or functools.partial(run_job, waiter=waiter)
+        self.queues: 'OrderedDict[str, deque]' = OrderedDict()
+        self.jobs: Dict[str, Job] = {}
+        self.running = 0
+        self.stats = PoolStats()
+        self.closed = False
+        self.threads: List[threading.Thread] = []
+
+    def submit(self, job: Job) -> Job:
+        job.enqueued_at = time.monotonic()
+        with self.limiter.cond:
+            self.queues.setdefault(job.customer_id, deque()).append(job)
+            self.jobs[job.job_id] = job
+            self.limiter.cond.notify_all()
+        return job
+
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def metrics(self) -> Dict:
+        with self.limiter.cond:
+            depth, running = self.queue_depth(), self.running
+        return self.stats.snapshot(depth, running)
+
+    def _next_job(self) -> Optional[Job]:
+        """Round-robin over customers; skip jobs whose caps are full. Caller holds the lock"""
+        for customer_id in list(self.queues):
+            queue = self.queues[customer_id]
+            for job in queue:
+                slots = [('region', job.region), ('plan', job.plan)]
+                if self.limiter.has_room(slots):
+                    queue.remove(job)
+                    # Move this customer to the back of the rotation
+                    self.queues.move_to_end(customer_id)
+                    if not queue:
+                        del self.queues[customer_id]
+                    self.limiter.take(slots)
+                    return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self.limiter.cond:
+                job = self._next_job()
+                while job is None:
+                    if self.closed and not self.queues:
+                        return
+                    self.limiter.cond.wait()
+                    job = self._next_job()
+                self.running += 1
+
+            job.status = 'running'
+            job.started_at = time.monotonic()
+            self.stats.record_start(job)
+
+            try:
+                self.runner(job, self.limiter)
+                job.status = 'completed'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished_at = time.monotonic()
+                self.stats.record_finish(job)
+                with self.limiter.cond:
+                    self.running -= 1
+                self.limiter.release([('region', job.region), ('plan', job.plan)])
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"neo-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def close(self, wait: bool = True):
+        """Stop accepting work once the queue drains"""
+        with self.limiter.cond:
+            self.closed = True
+            self.limiter.cond.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+def run_job(job: Job, limiter: CapacityLimiter, waiter=None):
+    """Run one job through the orchestrator, holding API caps per step"""
+    steps = job.steps(waiter)
+
+    for step in steps:
+        families = STEP_API_FAMILIES.get(step.name)
+        if families:
+            step.action = _with_slots(step.action, limiter, [('api', f) for f in families])
+
+    ProvisioningOrchestrator(job.domain, steps).run()
+
+
+def _with_slots(action, limiter: CapacityLimiter, slots: List[tuple]):
+    def wrapped(context):
+        with limiter.hold(slots):
+            return action(context)
+    return wrapped
+
+
+def main():
+    """Main execution"""
+
+    parser = argparse.ArgumentParser(description='Run queued provisioning jobs in parallel')
+    parser.add_argument('jobs', help='JSON lines file with one job per line (- for stdin)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--caps', help='JSON file overriding DEFAULT_CAPS')
+    parser.add_argument('--stats-interval', type=float, default=30)
+    args = parser.parse_args()
+
+    caps = DEFAULT_CAPS
+    if args.caps:
+        with open(args.caps) as f:
+            caps = json.load(f)
+
+    # One shared waiter replaces a polling loop per in-flight server
+    pool = ProvisioningPool(workers=args.workers, caps=caps, waiter=ReadinessWaiter())
+
+    source = sys.stdin if args.jobs == '-' else open(args.jobs)
+    with source:
+        for line in source:
+            if line.strip():
+                pool.submit(Job(**json.loads(line)))
+
+    pool.start()
+    pool.close(wait=False)
+
+    for thread in pool.threads:
+        while thread.is_alive():
+            thread.join(args.stats_interval)
+            print(f"📊 {json.dumps(pool.metrics())}")
+
+    failed = [job for job in pool.jobs.values() if job.status == 'failed']
+    for job in failed:
+        print(f"❌ {job.domain}: {job.error}")
+
+    print(f"📊 {json.dumps(pool.metrics())}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,31 @@
 #!/bin/bash
+# Resumable provisioning: each retry continues from the last completed
+# stage (see scripts/neo/orchestrator.py). Failure classes carry their
+# own backoff inside the orchestrator, so this loop only restarts it
+# after it gave up on a step.
 DOMAIN="$1"
+EMAIL="${2:-$EMAIL}"
+PANEL="${3:-${PANEL:-cyberpanel}}"
+OS="${4:-${OS:-almalinux-8}}"
 MAX_RETRIES=3
 RETRY_COUNT=0
 
+SCRIPTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
 while [ $RETRY_COUNT -lt $MAX_RETRIES ]; do
   echo "Attempt $((RETRY_COUNT + 1))/$MAX_RETRIES"
-  
-  if ./automation/provision-customer.sh \
+
+  if (cd "$SCRIPTS_DIR" && python3 -m neo.orchestrator \
       --domain "$DOMAIN" \
       --email "$EMAIL" \
       --panel "$PANEL" \
-      --os "$OS"; then
+      --os "$OS"); then
     echo "✅ Success!"
     exit 0
   else
-    echo "❌ Failed, retrying..."
+    echo "❌ Failed, resuming..."
     RETRY_COUNT=$((RETRY_COUNT + 1))
-    sleep 60
+    sleep 5
   fi
 done
 
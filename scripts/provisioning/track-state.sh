@@ -1,23 +1,56 @@
 #!/bin/bash
 STATE_DIR="/var/neo/states"
+# Same cap as EVENTS_JOURNAL_MAX_BYTES in neo/orchestrator.py
+EVENTS_JOURNAL_MAX_BYTES=$((16 * 1024 * 1024))
 mkdir -p "$STATE_DIR"
 
+journal_seq() {
+  # Last event number in the journal, or in the rotated one; 0 if there is none
+  local file seq
+  for file in "$1" "$1.1"; do
+    seq=$(tail -n 50 "$file" 2>/dev/null | grep -o '"seq":[0-9]*' | tail -n 1 | cut -d: -f2)
+    if [ -n "$seq" ]; then
+      echo "$seq"
+      return
+    fi
+  done
+  echo 0
+}
+
 track_state() {
   local domain="$1"
   local state="$2"
   local message="$3"
-  
+  local progress="$4"
+
   local state_file="$STATE_DIR/${domain}.json"
-  
-  cat > "$state_file" << EOF
+  local journal="$STATE_DIR/events.log"
+
+  # Numbered, appended and rotated under the same lock as neo.orchestrator.append_event,
+  # so the API's event ids keep increasing across writers and rotations
+  (
+    flock 9
+    local seq timestamp
+    seq=$(( $(journal_seq "$journal") + 1 ))
+    timestamp=$(date -Iseconds)
+
+    printf '{"domain":"%s","state":"%s","message":"%s","timestamp":"%s","progress":%s,"seq":%s}\n' \
+      "$domain" "$state" "$message" "$timestamp" "$progress" "$seq" >> "$journal"
+    if [ "$(stat -c %s "$journal")" -ge "$EVENTS_JOURNAL_MAX_BYTES" ]; then
+      mv -f "$journal" "$journal.1"
+    fi
+
+    cat > "$state_file" << EOF
 {
   "domain": "$domain",
   "state": "$state",
   "message": "$message",
-  "timestamp": "$(date -Iseconds)",
-  "progress": $4
+  "timestamp": "$timestamp",
+  "progress": $progress,
+  "seq": $seq
 }
 EOF
+  ) 9>"$journal.lock"
 }
 
 # Usage in provision-customer.sh:
@@ -29,6 +62,7 @@ track_state "$DOMAIN" "panel_installing" "Installing panel" 60
 track_state "$DOMAIN" "dns_configuring" "Configuring DNS" 85
 track_state "$DOMAIN" "completed" "Server ready!" 100
 
-# API endpoint (simple):
-# scripts/api/get-status.sh
+# API endpoint:
+#   GET /api/v1/provisioning/${DOMAIN}          current state
+#   GET /api/v1/provisioning/${DOMAIN}/events   live transitions (SSE)
 cat "/var/neo/states/${DOMAIN}.json"
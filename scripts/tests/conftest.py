@@ -0,0 +1,59 @@
+"""
+Shared fixtures for the neo module tests
+
+Run from scripts/:  python3 -m pytest -q tests
+AWS is mocked with moto; state and cache files go to a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Before anything imports neo.config, which reads these once
+_scratch = tempfile.mkdtemp(prefix='neo-tests-')
+os.environ.update({
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_SECURITY_TOKEN': 'testing',
+    'AWS_SESSION_TOKEN': 'testing',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'NEO_CACHE_DIR': os.path.join(_scratch, 'cache'),
+    'NEO_STATE_DIR': os.path.join(_scratch, 'states'),
+    'NEO_DAEMON_SOCKET': os.path.join(_scratch, 'neod.sock'),
+    'NEO_AWS_GOVERNOR': '0',
+})
+os.environ.pop('AWS_REGION', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moto import mock_aws  # noqa: E402
+
+
+@pytest.fixture
+def aws():
+    """moto for the test, with neo's cached clients and table handles dropped"""
+    from neo import aws as neo_aws
+    from neo import store
+
+    with mock_aws():
+        neo_aws.reset()
+        store._tables.clear()
+        yield
+        neo_aws.reset()
+        store._tables.clear()
+
+
+@pytest.fixture
+def create_table(aws):
+    """create_table(name, key[, region]) -> a PAY_PER_REQUEST table keyed on one string attribute"""
+    import boto3
+
+    def create(name: str, key: str, region: str = 'us-east-1'):
+        return boto3.resource('dynamodb', region_name=region).create_table(
+            TableName=name,
+            KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+    return create
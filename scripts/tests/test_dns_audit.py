@@ -0,0 +1,156 @@
+import socket
+import socketserver
+import struct
+import threading
+
+import boto3
+import pytest
+
+from neo import dns_audit
+from neo.config import DNS_ZONES_TABLE
+
+ZONE = 'example.com'
+
+
+def _name(name: str) -> bytes:
+    return b''.join(bytes([len(label)]) + label.encode() for label in name.rstrip('.').split('.')) + b'\x00'
+
+
+def _rr(owner: str, type_code: int, ttl: int, rdata: bytes) -> bytes:
+    # The zone apex is written as a pointer to the question name
+    owner = b'\xc0\x0c' if owner == ZONE else _name(owner)
+    return owner + struct.pack('!HHIH', type_code, 1, ttl, len(rdata)) + rdata
+
+
+SOA = _rr(ZONE, 6, 300, _name('ns1.example.com') + _name('admin.example.com') + struct.pack('!IIIII', 1, 2, 3, 4, 5))
+
+# Two messages, SOA first and last, as Bind sends a transfer
+TRANSFER = [
+    [SOA,
+     _rr(ZONE, 1, 300, socket.inet_aton('192.0.2.10')),
+     _rr('www.example.com', 5, 300, _name('Example.COM.')),
+     _rr(ZONE, 15, 300, struct.pack('!H', 10) + _name('mail.example.com'))],
+    [_rr(ZONE, 16, 300, b'\x0bv=spf1 -all'),
+     _rr('*.example.com', 1, 300, socket.inet_aton('192.0.2.11')),
+     _rr('v6.example.com', 28, 60, socket.inet_pton(socket.AF_INET6, '2001:db8::1')),
+     _rr(ZONE, 2, 300, _name('ns1.example.com')),
+     _rr('stale.example.com', 1, 300, socket.inet_aton('192.0.2.99')),
+     SOA],
+]
+
+ROUTE53 = [
+    ('example.com.', 'A', 300, ['192.0.2.10']),
+    ('www.example.com.', 'CNAME', 300, ['example.com']),
+    ('example.com.', 'MX', 300, ['10 mail.example.com.']),
+    ('example.com.', 'TXT', 300, ['"v=spf1 -all"']),
+    ('\\052.example.com.', 'A', 300, ['192.0.2.11']),
+    ('v6.example.com.', 'AAAA', 60, ['2001:db8:0::1']),
+    ('api.example.com.', 'A', 300, ['192.0.2.20']),
+]
+
+
+class TransferHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        length = struct.unpack('!H', self.request.recv(2))[0]
+        query = self.request.recv(length)
+        for records in TRANSFER:
+            message = query[:2] + struct.pack('!HHHHH', 0x8400, 1, len(records), 0, 0) + query[12:] + \
+                b''.join(records)
+            self.request.sendall(struct.pack('!H', len(message)) + message)
+
+
+@pytest.fixture
+def nameserver():
+    """A Bind stand-in on 127.0.0.1 that answers every AXFR with TRANSFER; yields its port"""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), TransferHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def zones(create_table):
+    create_table(DNS_ZONES_TABLE, 'domain')
+    return boto3.resource('dynamodb').Table(DNS_ZONES_TABLE)
+
+
+def _hosted_zone(name: str, records=()) -> str:
+    route53 = boto3.client('route53')
+    zone_id = route53.create_hosted_zone(Name=name, CallerReference=name)['HostedZone']['Id'].split('/')[-1]
+    if records:
+        route53.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch={'Changes': [
+            {'Action': 'UPSERT', 'ResourceRecordSet': {'Name': n, 'Type': t, 'TTL': ttl,
+                                                       'ResourceRecords': [{'Value': v} for v in values]}}
+            for n, t, ttl, values in records]})
+    return zone_id
+
+
+def test_audit_reports_only_real_drift(zones, nameserver):
+    zone_id = _hosted_zone(ZONE, ROUTE53)
+    zones.put_item(Item={'domain': ZONE, 'zone_id': zone_id, 'ns1_ip': '127.0.0.1'})
+
+    found, mismatches = dns_audit.load_zones()
+    assert found == [dns_audit.Zone(ZONE, zone_id, ('127.0.0.1',))] and mismatches == []
+
+    report = dns_audit.run_audit(found, port=nameserver, workers=2)
+    assert (report['zones'], report['drift'], report['error']) == (1, 1, 0)
+    [result] = report['results']
+    differences = result['nameservers']['127.0.0.1']['differences']
+    # TXT quoting, the \052 wildcard, AAAA zero runs and name case all compare equal
+    assert [(d['name'], d['issue']) for d in differences] == [
+        ('api.example.com', 'missing_on_nameserver'),
+        ('stale.example.com', 'missing_in_route53'),
+    ]
+
+
+def test_load_zones_reports_table_route53_mismatches(zones):
+    ok = _hosted_zone('ok.com')
+    only_route53 = _hosted_zone('route53-only.com')
+    moved = _hosted_zone('moved.com')
+    no_servers = _hosted_zone('no-servers.com')
+    for item in [{'domain': 'ok.com', 'zone_id': ok, 'ns1_ip': '192.0.2.1', 'ns2_ip': '192.0.2.2'},
+                 {'domain': 'table-only.com', 'zone_id': 'Z0000000000000', 'ns1_ip': '192.0.2.1'},
+                 {'domain': 'moved.com', 'zone_id': 'Z1111111111111', 'ns1_ip': '192.0.2.1'},
+                 {'domain': 'no-servers.com', 'zone_id': no_servers}]:
+        zones.put_item(Item=item)
+
+    found, mismatches = dns_audit.load_zones()
+    # A stale zone_id with a single Route53 zone of that name is still audited, against Route53's
+    assert found == [dns_audit.Zone('moved.com', moved, ('192.0.2.1',)),
+                     dns_audit.Zone('ok.com', ok, ('192.0.2.1', '192.0.2.2'))]
+    assert {m['domain']: m['issue'] for m in mismatches} == {
+        'moved.com': 'zone_id_differs',
+        'no-servers.com': 'no_nameservers',
+        'route53-only.com': 'missing_in_table',
+        'table-only.com': 'missing_in_route53',
+    }
+    assert [m['route53_zone_ids'] for m in mismatches if m['domain'] == 'route53-only.com'] == [[only_route53]]
+
+    # Named domains are looked up on both sides, missing ones included
+    found, mismatches = dns_audit.load_zones(['OK.com.', 'absent.com'])
+    assert [z.domain for z in found] == ['ok.com']
+    assert mismatches == [{'domain': 'absent.com', 'issue': 'missing_in_route53', 'table_zone_id': None}]
+
+
+def test_stale_route53_copy_is_relisted(zones, nameserver):
+    zone_id = _hosted_zone(ZONE, ROUTE53)
+    zones.put_item(Item={'domain': ZONE, 'zone_id': zone_id, 'ns1_ip': '127.0.0.1'})
+    [zone], _ = dns_audit.load_zones()
+
+    def drifted():
+        [result] = dns_audit.run_audit([zone], port=nameserver, workers=1)['results']
+        return {d['name'] for d in result['nameservers']['127.0.0.1']['differences']}
+
+    assert drifted() == {'api.example.com', 'stale.example.com'}
+
+    # Fixed in the console, behind neo's back: the recent cached copy still has the old records
+    boto3.client('route53').change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch={'Changes': [
+        {'Action': 'UPSERT', 'ResourceRecordSet': {'Name': 'stale.example.com.', 'Type': 'A', 'TTL': 300,
+                                                   'ResourceRecords': [{'Value': '192.0.2.99'}]}}]})
+    assert drifted() == {'api.example.com', 'stale.example.com'}
+
+    # Once the copy is older than the refresh interval the audit lists the zone again
+    entry = dns_audit.zone_cache.get(zone_id)
+    dns_audit.zone_cache._write(zone_id, dict(entry, fetched_at=entry['fetched_at'] - 3600))
+    assert drifted() == {'api.example.com'}
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from neo import orchestrator
+from neo.api.events import EventHub
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    # A handful of lines per journal file, so rotation is routine
+    monkeypatch.setattr(orchestrator, 'EVENTS_JOURNAL_MAX_BYTES', 400)
+    return str(tmp_path)
+
+
+def _hub(state_dir: str) -> EventHub:
+    """A hub as a freshly started API process has it, without its polling thread"""
+    hub = EventHub(os.path.join(state_dir, orchestrator.EVENTS_JOURNAL))
+    hub.seek_end()
+    return hub
+
+
+def _write(state_dir: str, *states: str):
+    for state in states:
+        orchestrator.write_state('example.com', state, state, 0, state_dir)
+
+
+def _events(chunks) -> list:
+    """(id, state) of the SSE events among stream chunks"""
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(b'id: '):
+            head, _, data = chunk.partition(b'data: ')
+            events.append((int(head.split()[1]), json.loads(data)['state']))
+    return events
+
+
+def test_resume_across_rotation_and_restart(state_dir):
+    hub = _hub(state_dir)
+    _write(state_dir, 'payment_confirmed', 'terraform_init')
+    hub.poll_once()
+    stream = hub.stream('example.com')
+    assert _events([next(stream), next(stream)]) == [(2, 'terraform_init')]
+
+    _write(state_dir, 'vpc_creating')
+    hub.poll_once()
+    assert _events([next(stream)]) == [(3, 'vpc_creating')]
+    stream.close()
+
+    # The client is away while the journal rotates and the API restarts
+    _write(state_dir, 'ec2_launching', 'panel_installing', 'dns_configuring')
+    assert os.path.exists(os.path.join(state_dir, 'events.log.1'))
+    restarted = _hub(state_dir)
+    assert restarted.position == 6
+
+    resumed = restarted.stream('example.com', last_event_id=3)
+    chunks = [next(resumed) for _ in range(4)]
+    assert _events(chunks) == [(4, 'ec2_launching'), (5, 'panel_installing'), (6, 'dns_configuring')]
+
+    _write(state_dir, 'completed')
+    restarted.poll_once()
+    assert _events(list(resumed)) == [(7, 'completed')]
+
+
+def test_events_keep_their_ids_across_processes(state_dir):
+    first, second = _hub(state_dir), _hub(state_dir)
+    # One hub polls as it goes, the other only after several rotations
+    for n in range(8):
+        _write(state_dir, f"step{n}")
+        first.poll_once()
+    second.poll_once()
+    assert [e.id for e in first.history] == list(range(1, 9))
+    # The second only finds the last two files' worth, under the same ids
+    assert [(e.id, e.state) for e in second.history] == [(e.id, e.state) for e in first.history][4:]
+    assert orchestrator.journal_seq(first.journal) == 8
+
+
+def test_unknown_last_event_id_gets_the_current_state(state_dir):
+    _write(state_dir, 'payment_confirmed', 'terraform_init')
+    hub = _hub(state_dir)
+
+    # Ahead of anything written, e.g. the journals were removed since
+    stream = hub.stream('example.com', last_event_id=500)
+    assert _events([next(stream), next(stream)]) == [(2, 'terraform_init')]
+
+    # Live events after it are still delivered
+    _write(state_dir, 'failed')
+    hub.poll_once()
+    assert _events(list(stream)) == [(3, 'failed')]
@@ -0,0 +1,105 @@
+import io
+import multiprocessing
+
+import pytest
+
+from neo.api import create_app
+from neo.api.ratelimit import RateLimiter
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    """Opens limiters on one shared table file; closes them after the test"""
+    opened = []
+
+    def open_limiter(limit=3, window=60.0, algorithm='token_bucket'):
+        opened.append(RateLimiter(limit, window, algorithm, path=str(tmp_path / 'ratelimit.mmap')))
+        return opened[-1]
+
+    yield open_limiter
+    for each in opened:
+        each.close()
+
+
+def _call(app, key=None, addr='198.51.100.7'):
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/no-such-route', 'REMOTE_ADDR': addr,
+               'wsgi.input': io.BytesIO()}
+    if key:
+        environ['HTTP_AUTHORIZATION'] = f"Bearer {key}"
+    statuses = []
+    b''.join(app(environ, lambda status, headers: statuses.append((status, dict(headers)))))
+    status, headers = statuses[0]
+    return int(status.split()[0]), headers
+
+
+def test_token_bucket_bursts_then_refills(limiter):
+    bucket = limiter(limit=3, window=60)
+    assert [bucket.hit('k', NOW).allowed for _ in range(4)] == [True, True, True, False]
+
+    denied = bucket.hit('k', NOW)
+    assert (denied.remaining, denied.retry_after) == (0, pytest.approx(20))
+    assert denied.headers()['Retry-After'] == '20'
+    # Other keys have buckets of their own
+    assert bucket.hit('other', NOW).allowed
+
+    # One token back every window/limit seconds
+    assert bucket.hit('k', NOW + 20).allowed
+    assert not bucket.hit('k', NOW + 21).allowed
+
+
+def test_sliding_window_weighs_the_previous_window(limiter):
+    window = limiter(limit=4, window=10, algorithm='sliding_window')
+    assert [window.hit('k', NOW + n).allowed for n in range(5)] == [True] * 4 + [False]
+
+    # A full previous window still counts for most of the next one
+    later = [window.hit('k', NOW + 10 + n).allowed for n in range(4)]
+    assert later[0] is False and True in later
+    # Two windows on, it's forgotten
+    assert [window.hit('k', NOW + 30).allowed for _ in range(4)] == [True] * 4
+
+
+def test_limiters_on_one_file_share_buckets(limiter):
+    first, second = limiter(limit=4), limiter(limit=4)
+    assert [first.hit('k', NOW).allowed, second.hit('k', NOW).allowed] == [True, True]
+    assert second.hit('k', NOW).remaining == 1
+
+    # A table laid out differently is started over, not misread
+    resized = RateLimiter(4, 60, path=first.path, groups=16)
+    try:
+        assert resized.hit('k', NOW).remaining == 3
+    finally:
+        resized.close()
+
+
+def _hits(path: str, count: int) -> int:
+    limiter = RateLimiter(50, 3600, path=path)
+    try:
+        return sum(limiter.hit('shared', NOW).allowed for _ in range(count))
+    finally:
+        limiter.close()
+
+
+def test_processes_share_one_bucket(tmp_path):
+    path = str(tmp_path / 'ratelimit.mmap')
+    RateLimiter(50, 3600, path=path).close()
+
+    with multiprocessing.get_context('fork').Pool(4) as pool:
+        allowed = pool.starmap(_hits, [(path, 40)] * 4)
+    # 160 requests from four workers, exactly the limit let through
+    assert sum(allowed) == 50
+
+
+def test_unauthenticated_floods_are_limited(limiter, monkeypatch):
+    monkeypatch.setenv('NEO_API_KEYS', 'good-key')
+    app = create_app(limiter(limit=3))
+
+    # Missing and guessed keys all draw on the caller's address
+    assert [_call(app, key)[0] for key in (None, 'guess-1', 'guess-2', 'guess-3')] == [401, 401, 401, 429]
+    status, headers = _call(app, 'guess-4')
+    assert status == 429 and headers['Retry-After'] == '20'
+
+    # A real key has its own quota, and so does another address
+    assert _call(app, 'good-key')[0] == 404
+    assert _call(app, addr='203.0.113.9')[0] == 401
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pytest
+
+from neo import retention
+from neo.retention import Policy, Snapshot
+
+
+def _remaining():
+    # moto also owns the snapshots behind its stock AMIs
+    pages = boto3.client('ec2').describe_snapshots(OwnerIds=['self'],
+                                                   Filters=[{'Name': 'tag-key', 'Values': ['Domain']}])
+    return {s['SnapshotId'] for s in pages['Snapshots']}
+
+
+def _snapshot(ec2, volume_id: str, **tags) -> str:
+    tags.setdefault('Domain', 'example.com')
+    return ec2.create_snapshot(
+        VolumeId=volume_id,
+        TagSpecifications=[{'ResourceType': 'snapshot',
+                            'Tags': [{'Key': k, 'Value': v} for k, v in tags.items()]}],
+    )['SnapshotId']
+
+
+@pytest.fixture
+def snapshots(aws):
+    """Three automatic snapshots of one volume (all taken today), one manual and one pinned"""
+    ec2 = boto3.client('ec2')
+    volume_id = ec2.create_volume(AvailabilityZone='us-east-1a', Size=20)['VolumeId']
+    automatic = [_snapshot(ec2, volume_id, Type='AutoBackup') for _ in range(3)]
+    manual = _snapshot(ec2, volume_id, Type='ManualBackup')
+    pinned = _snapshot(ec2, volume_id, Type='AutoBackup', Retain='true')
+    return {'automatic': automatic, 'manual': manual, 'pinned': pinned}
+
+
+def test_keep_set_tiers():
+    now = datetime(2026, 3, 31, 12, tzinfo=timezone.utc)
+    history = [Snapshot(f"snap-{n}", 'vol-1', 'example.com', now - timedelta(days=n), 20) for n in range(120)]
+    keep = retention.keep_set(history, Policy(daily=7, weekly=4, monthly=3))
+    # 7 days; Sundays closing the previous ISO weeks; the last day of February and January
+    assert keep == {f"snap-{n}" for n in [*range(7), 9, 16, 31, 59]}
+
+
+def test_list_snapshots_skips_manual_and_pinned(snapshots):
+    listed = {s.snapshot_id for s in retention.list_snapshots()}
+    assert listed == set(snapshots['automatic'])
+
+
+def test_retention_days_tag_widens_the_daily_tier():
+    now = datetime(2026, 3, 31, 12, tzinfo=timezone.utc)
+    history = [Snapshot(f"snap-{n}", 'vol-1', 'example.com', now - timedelta(days=n), 20, 14) for n in range(20)]
+    expired = {s.snapshot_id for s in retention.plan(history, Policy(daily=7, weekly=0, monthly=0))}
+    assert expired == {f"snap-{n}" for n in range(14, 20)}
+
+
+def test_main_dry_run(snapshots, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        retention.main(['--dry-run'])
+    assert exit_info.value.code == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert result['dry_run'] is True
+    assert result['scanned'] == 3
+    # Same day, same week, same month: only the newest survives
+    assert result['deleted'] == 2
+    assert len(_remaining()) == 5
+
+
+def test_main_deletes_expired_only(snapshots, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        retention.main([])
+    assert exit_info.value.code == 0
+
+    remaining = _remaining()
+    assert snapshots['manual'] in remaining
+    assert snapshots['pinned'] in remaining
+    assert len(remaining & set(snapshots['automatic'])) == 1
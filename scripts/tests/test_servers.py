@@ -0,0 +1,23 @@
+from neo.api.servers import ResponseCache
+
+KEY = ((), 20, None)
+
+
+def test_a_write_in_one_worker_drops_every_workers_listings(tmp_path):
+    version_file = str(tmp_path / 'servers.version')
+    # Two API worker processes, each with its own cache
+    workers = [ResponseCache(ttl=60, version_file=version_file) for _ in range(2)]
+    for n, worker in enumerate(workers):
+        worker.put(KEY, {'count': n}, worker.version())
+    assert [w.get(KEY, w.version()) for w in workers] == [{'count': 0}, {'count': 1}]
+
+    workers[0].invalidate()
+    assert [w.get(KEY, w.version()) for w in workers] == [None, None]
+
+    # A listing read while a write lands is not served afterwards
+    before = workers[1].version()
+    workers[0].invalidate()
+    workers[1].put(KEY, {'count': 2}, before)
+    assert workers[1].get(KEY, workers[1].version()) is None
+    workers[1].put(KEY, {'count': 3}, workers[1].version())
+    assert workers[1].get(KEY, workers[1].version()) == {'count': 3}
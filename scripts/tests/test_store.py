@@ -0,0 +1,84 @@
+import pytest
+
+from neo import aws, store
+from neo.config import INSTANCES_TABLE
+
+
+@pytest.fixture
+def instances(create_table):
+    table = create_table(INSTANCES_TABLE, 'instance_id')
+    with table.batch_writer() as batch:
+        for n in range(250):
+            batch.put_item(Item={'instance_id': f"i-{n}", 'domain': f"c{n}.com", 'public_ip': '192.0.2.1',
+                                 'panel': 'cyberpanel', 'status': 'active', 'notes': 'x' * 2000})
+    return table
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(store.time, 'sleep', slept.append)
+    return slept
+
+
+def _serve(monkeypatch, served):
+    """Route batch_get_item through served(keys) -> how many of the requested keys to answer"""
+    client = aws.resource('dynamodb').meta.client
+    original = client.batch_get_item
+    calls = []
+
+    def batch_get_item(RequestItems, **kwargs):
+        request = RequestItems[INSTANCES_TABLE]
+        keys = request['Keys']
+        calls.append(len(keys))
+        count = served(keys)
+        if count:
+            response = original(RequestItems={INSTANCES_TABLE: dict(request, Keys=keys[:count])}, **kwargs)
+        else:
+            response = {'Responses': {}}
+        if count < len(keys):
+            response['UnprocessedKeys'] = {INSTANCES_TABLE: dict(request, Keys=keys[count:])}
+        return response
+
+    monkeypatch.setattr(client, 'batch_get_item', batch_get_item)
+    return calls
+
+
+def test_unprocessed_keys_are_retried(instances, monkeypatch, sleeps):
+    # Every other call is only half served, like a throttled table
+    asked = []
+
+    def served(keys):
+        asked.append(keys)
+        return len(keys) // 2 if len(asked) % 2 else len(keys)
+    calls = _serve(monkeypatch, served)
+    keys = [f"i-{n}" for n in range(260)] + ['i-1']
+
+    items = store.instances.get_many(keys)
+    assert set(items) == {f"i-{n}" for n in range(250)}
+    # Projected: the key and the store's attributes that exist, not the whole item
+    assert set(items['i-5']) == {'instance_id', 'domain', 'public_ip', 'panel', 'status'}
+    # Batches of 100 + 100 + 60 keys, each retried once for its other half
+    assert calls == [100, 50, 100, 50, 60, 30]
+    assert len(sleeps) == 3
+
+
+def test_incomplete_read_after_max_attempts(instances, monkeypatch, sleeps):
+    calls = _serve(monkeypatch, lambda keys: 0)
+
+    with pytest.raises(store.IncompleteRead):
+        store.batch_get(INSTANCES_TABLE, 'instance_id', ['i-1', 'i-2'])
+    assert len(calls) == store.MAX_ATTEMPTS
+    # No pointless wait after the final attempt
+    assert len(sleeps) == store.MAX_ATTEMPTS - 1
+
+
+def test_cached_reads_skip_the_table(instances, monkeypatch, sleeps):
+    calls = _serve(monkeypatch, len)
+    cached = store.Store(INSTANCES_TABLE, 'instance_id', ('domain',), cache_ttl=60)
+
+    cached.get_many(['i-1', 'i-2'])
+    assert cached.get_many(['i-1', 'i-2', 'i-3']) == {f"i-{n}": {'instance_id': f"i-{n}", 'domain': f"c{n}.com"}
+                                                      for n in (1, 2, 3)}
+    assert calls == [2, 1]
+    assert sleeps == []
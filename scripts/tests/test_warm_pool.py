@@ -0,0 +1,97 @@
+import boto3
+import pytest
+
+from neo.config import WARM_POOL_TABLE
+from neo.warm_pool import STATE_TAG, WarmPool, pool_key
+
+KEY = ('core', 'us-east-1', 'cyberpanel')
+
+
+@pytest.fixture
+def pool(aws):
+    boto3.resource('dynamodb').create_table(
+        TableName=WARM_POOL_TABLE,
+        KeySchema=[{'AttributeName': 'pool_key', 'KeyType': 'HASH'},
+                   {'AttributeName': 'instance_id', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'pool_key', 'AttributeType': 'S'},
+                              {'AttributeName': 'instance_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    ami_id = boto3.client('ec2').describe_images(Owners=['amazon'])['Images'][0]['ImageId']
+    return WarmPool(ami_id, {KEY: 3}, probe=lambda ip, panel: True)
+
+
+def _states(pool):
+    return {m['instance_id']: m['state'] for m in pool.members(*KEY)}
+
+
+def _tags(instance_id):
+    reservations = boto3.client('ec2').describe_instances(InstanceIds=[instance_id])['Reservations']
+    return {t['Key']: t['Value'] for t in reservations[0]['Instances'][0].get('Tags', [])}
+
+
+def test_promote_marks_gone_and_stopped_instances_failed(pool):
+    ec2 = boto3.client('ec2')
+    running, stopped, terminated = pool.launch(*KEY, 3)
+    ec2.stop_instances(InstanceIds=[stopped])
+    ec2.terminate_instances(InstanceIds=[terminated])
+    # Long gone: describe_instances(InstanceIds=...) would fail the whole call
+    pool._table('us-east-1').put_item(Item={'pool_key': pool_key(*KEY), 'instance_id': 'i-0000000000deadbee',
+                                            'state': 'warming'})
+
+    assert pool.promote(*KEY) == [running]
+    states = _states(pool)
+    assert states == {running: 'ready', stopped: 'failed', terminated: 'failed', 'i-0000000000deadbee': 'failed'}
+    assert _tags(running)[STATE_TAG] == 'ready'
+
+    # Failed members don't count towards the target
+    assert len(pool.refill(*KEY)) == 2
+
+
+def test_claim_rolls_back_when_association_fails(pool, monkeypatch):
+    pool.launch(*KEY, 1)
+    [instance_id] = pool.promote(*KEY)
+
+    from neo import aws
+    ec2 = aws.client('ec2', 'us-east-1')
+
+    def fail(**kwargs):
+        raise ec2.exceptions.ClientError({'Error': {'Code': 'InvalidInstanceID', 'Message': 'nope'}},
+                                         'AssociateAddress')
+    monkeypatch.setattr(ec2, 'associate_address', fail)
+
+    with pytest.raises(Exception):
+        pool.claim(*KEY, domain='example.com', customer_id='cust-1', refill=False)
+
+    assert boto3.client('ec2').describe_addresses()['Addresses'] == []
+    [member] = pool.members(*KEY)
+    assert member['state'] == 'ready' and 'claimed_by' not in member
+    tags = _tags(instance_id)
+    assert tags[STATE_TAG] == 'ready' and 'Domain' not in tags
+
+    # The instance can be handed out again
+    monkeypatch.undo()
+    claimed = pool.claim(*KEY, domain='example.com', customer_id='cust-1', refill=False)
+    assert claimed['instance_id'] == instance_id
+    assert _states(pool)[instance_id] == 'claimed'
+
+
+def test_claim_rollback_deletes_the_hosted_zone_it_created(pool, monkeypatch):
+    pool.launch(*KEY, 1)
+    pool.promote(*KEY)
+
+    from neo.legacy import dns_automation
+    automation = dns_automation().DNSAutomation
+    create_dns_records = automation.create_dns_records
+
+    def fail_after_records(self):
+        create_dns_records(self)
+        raise RuntimeError('zone cache write failed')
+    monkeypatch.setattr(automation, 'create_dns_records', fail_after_records)
+
+    with pytest.raises(RuntimeError):
+        pool.claim(*KEY, domain='example.com', customer_id='cust-1', ns1_ip='192.0.2.53', refill=False)
+
+    assert boto3.client('route53').list_hosted_zones()['HostedZones'] == []
+    [member] = pool.members(*KEY)
+    assert member['state'] == 'ready'